@@ -0,0 +1,339 @@
+# backend/app/accuracy.py
+# Precisión de los pronósticos: compara lo pronosticado con la historia real que llega después.
+# - Orígenes: 'versioned' (fact_forecast_versioned, cada versión fechada por forecast_versions.created_at)
+#   y 'stat' (fact_forecast_stat, fechado por el created_at de la fila, es decir de su corrida).
+# - lag = meses entre el mes de creación del pronóstico y el período pronosticado (0 = el mismo mes).
+# - Los reales son la historia de la key figure que corresponde a la pronosticada (ACTUALS_BY_FORECAST_KF),
+#   leída como una matriz series x períodos (crud.load_fact_history_matrix); cada celda pronosticada
+#   se alinea con su real por (fila, período) y las sumas por serie / cliente / total y lag salen de
+#   np.bincount, sin recorrer filas en Python. Sólo se comparan períodos ya cerrados con dato real.
+# - Métricas: WAPE = sum|F - A| / sum|A|, MAPE = promedio de |F - A| / |A| (sólo A != 0) y
+#   bias = sum(F - A) / sum|A| (positivo = sobrepronóstico). Se guardan también las sumas.
+# El resultado reemplaza el contenido de forecast_accuracy (ver ventas-pronostico-app/src/db/forecast_accuracy.sql).
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from datetime import date
+import io
+import time
+import uuid
+import logging
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import crud, schemas
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FORECAST_SOURCES = ("stat", "versioned")
+LEVELS = ("series", "client", "total")
+DEFAULT_MAX_LAG = 36
+
+# Key figure pronosticada -> (key figure, source) de la historia real con la que se compara
+ACTUALS_BY_FORECAST_KF = {
+    schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID: (schemas.KEY_FIGURE_SALES_ID, 'sales'),
+    schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID: (schemas.KEY_FIGURE_ORDERS_ID, 'shipments'),
+    schemas.KEY_FIGURE_FINAL_FORECAST_ID: (schemas.KEY_FIGURE_SALES_ID, 'sales'),
+}
+
+# Columnas de forecast_accuracy que escribe refresh_accuracy_metrics (en el orden del COPY)
+ACCURACY_COLUMNS = (
+    "forecast_source", "key_figure_id", "lag", "level", "client_id", "sku_id",
+    "periods", "actual_sum", "abs_error_sum", "error_sum", "wape", "mape", "bias"
+)
+
+# Mes de creación y mes del período como número absoluto de mes (año * 12 + mes - 1)
+_FORECAST_QUERIES = {
+    "versioned": """
+        SELECT f.client_id, f.sku_id, f.key_figure_id,
+               EXTRACT(YEAR FROM f.period)::int * 12 + EXTRACT(MONTH FROM f.period)::int - 1 AS month,
+               EXTRACT(YEAR FROM v.created_at)::int * 12 + EXTRACT(MONTH FROM v.created_at)::int - 1 AS created_month,
+               f.value
+        FROM fact_forecast_versioned f
+        JOIN forecast_versions v ON v.version_id = f.version_id
+        WHERE f.period < %(end_period)s AND f.value IS NOT NULL AND f.key_figure_id = ANY(%(key_figure_ids)s)
+    """,
+    "stat": """
+        SELECT f.client_id, f.sku_id, f.key_figure_id,
+               EXTRACT(YEAR FROM f.period)::int * 12 + EXTRACT(MONTH FROM f.period)::int - 1 AS month,
+               EXTRACT(YEAR FROM f.created_at)::int * 12 + EXTRACT(MONTH FROM f.created_at)::int - 1 AS created_month,
+               f.value
+        FROM fact_forecast_stat f
+        WHERE f.period < %(end_period)s AND f.value IS NOT NULL AND f.created_at IS NOT NULL
+            AND f.key_figure_id = ANY(%(key_figure_ids)s)
+    """,
+}
+
+
+def _read_forecasts(db: Session, forecast_source: str, end_period: date, max_lag: int) -> "pd.DataFrame":
+    """Forecast cells of `forecast_source` before `end_period` with 0 <= lag <= max_lag, read with COPY."""
+    import pandas as pd  # carga diferida: el endpoint de lectura de métricas no la necesita
+
+    conn = crud.get_raw_connection(db)
+    cursor = conn.cursor()
+    try:
+        query = cursor.mogrify(
+            f"SELECT * FROM ({_FORECAST_QUERIES[forecast_source]}) f WHERE month - created_month BETWEEN 0 AND %(max_lag)s",
+            {"end_period": end_period, "key_figure_ids": list(ACTUALS_BY_FORECAST_KF), "max_lag": max_lag}
+        ).decode()
+        buffer = io.StringIO()
+        cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+    buffer.seek(0)
+    return pd.read_csv(
+        buffer,
+        header=None,
+        names=["client_id", "sku_id", "key_figure_id", "month", "created_month", "value"],
+        dtype={"client_id": str, "sku_id": str, "key_figure_id": np.int64, "month": np.int64, "created_month": np.int64, "value": np.float64}
+    )
+
+
+def lag_error_sums(
+    group_codes: np.ndarray,
+    n_groups: int,
+    lags: np.ndarray,
+    n_lags: int,
+    forecasts: np.ndarray,
+    actuals: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Sums per (group, lag) of aligned forecast / actual cells, as (n_groups x n_lags) arrays:
+    periods, actual_sum (of |A|), abs_error_sum, error_sum, ape_sum and ape_count (cells with A != 0).
+    """
+    bins = group_codes * n_lags + lags
+    size = n_groups * n_lags
+    errors = forecasts - actuals
+    abs_actuals = np.abs(actuals)
+    nonzero = abs_actuals > 0
+    ape = np.divide(np.abs(errors), abs_actuals, out=np.zeros_like(errors), where=nonzero)
+
+    def total(weights=None):
+        return np.bincount(bins, weights=weights, minlength=size).reshape(n_groups, n_lags)
+
+    return {
+        "periods": total(),
+        "actual_sum": total(abs_actuals),
+        "abs_error_sum": total(np.abs(errors)),
+        "error_sum": total(errors),
+        "ape_sum": total(ape),
+        "ape_count": total(nonzero.astype(np.float64)),
+    }
+
+
+def _metric_rows(sums: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Flattens the (group, lag) sums with at least one compared period and adds wape / mape / bias."""
+    groups, lags = np.nonzero(sums["periods"])
+    rows = {name: values[groups, lags] for name, values in sums.items()}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rows["wape"] = np.where(rows["actual_sum"] > 0, rows["abs_error_sum"] / rows["actual_sum"], np.nan)
+        rows["bias"] = np.where(rows["actual_sum"] > 0, rows["error_sum"] / rows["actual_sum"], np.nan)
+        rows["mape"] = np.where(rows["ape_count"] > 0, rows["ape_sum"] / rows["ape_count"], np.nan)
+    rows["group"], rows["lag"] = groups, lags
+    return rows
+
+
+def compute_accuracy(
+    months: np.ndarray,
+    created_months: np.ndarray,
+    values: np.ndarray,
+    actual_rows: np.ndarray,
+    actual_matrix: np.ndarray,
+    first_month: int,
+    row_client_codes: np.ndarray,
+    n_clients: int,
+    max_lag: int
+) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+    """
+    Metrics of the forecast cells of ONE key figure, yielded as (level, rows) for 'series',
+    'client' and 'total'; rows are the arrays of _metric_rows, whose `group` is the actual_matrix
+    row for series, the client code for clients and 0 for the total.
+    Cell i forecasts `values[i]` for absolute month months[i], created in created_months[i];
+    actual_rows[i] is its row of actual_matrix (-1 if none), whose columns are consecutive months
+    from `first_month`. row_client_codes maps each actual_matrix row to a client code < n_clients.
+    """
+    n_lags = max_lag + 1
+    columns = months - first_month
+    in_range = (actual_rows >= 0) & (columns >= 0) & (columns < actual_matrix.shape[1])
+    actuals = np.full(len(values), np.nan)
+    actuals[in_range] = actual_matrix[actual_rows[in_range], columns[in_range]]
+    compared = ~np.isnan(actuals)
+    if not compared.any():
+        return
+
+    actuals, values, series_codes = actuals[compared], values[compared], actual_rows[compared]
+    lags = (months - created_months)[compared]
+    levels = (
+        ("series", series_codes, actual_matrix.shape[0]),
+        ("client", row_client_codes[series_codes], n_clients),
+        ("total", np.zeros(len(values), dtype=np.int64), 1),
+    )
+    for level, codes, n_groups in levels:
+        yield level, _metric_rows(lag_error_sums(codes, n_groups, lags, n_lags, values, actuals))
+
+
+# COPY binario (mucho más rápido que formatear millones de floats como texto): cada fila es un
+# registro de ancho fijo de un dtype estructurado de NumPy, big-endian, con la longitud de cada campo
+# (-1 = NULL) antes del valor. Todas las filas de un mismo dtype tienen el mismo patrón de NULLs.
+_COPY_BINARY_HEADER = b"PGCOPY\n\xff\r\n\x00" + np.array([0, 0], dtype=">i4").tobytes()
+_COPY_BINARY_TRAILER = np.array([-1], dtype=">i2").tobytes()
+COPY_CHUNK_ROWS = 500000
+
+
+def _copy_binary_rows(fields: List[Tuple[str, Any]], n_rows: int) -> bytes:
+    """
+    Binary COPY tuples of `n_rows` rows from `fields`: (column, value) in ACCURACY_COLUMNS order,
+    where value is a bytes constant (text), an int / float array (int4 / float8), a 'V16' array
+    (uuid) or None (NULL in every row).
+    """
+    dtype = [("field_count", ">i2")]
+    for name, value in fields:
+        dtype.append((f"{name}_length", ">i4"))
+        if isinstance(value, bytes):
+            dtype.append((name, f"S{len(value)}"))
+        elif value is not None:
+            dtype.append((name, "V16" if value.dtype.kind == "V" else (">f8" if value.dtype.kind == "f" else ">i4")))
+    records = np.empty(n_rows, dtype=dtype)
+    records["field_count"] = len(fields)
+    for name, value in fields:
+        if value is None:
+            records[f"{name}_length"] = -1
+            continue
+        records[f"{name}_length"] = len(value) if isinstance(value, bytes) else records.dtype[name].itemsize
+        records[name] = value
+    return records.tobytes()
+
+
+def _uuid_bytes(uuids: List[Any]) -> np.ndarray:
+    """The 16 bytes of each UUID as a 'V16' array."""
+    return np.frombuffer(b"".join(value.bytes for value in uuids), dtype="V16")
+
+
+def _copy_accuracy_rows(
+    db: Session,
+    forecast_source: str,
+    key_figure_id: int,
+    level: str,
+    rows: Dict[str, np.ndarray],
+    client_bytes: Optional[np.ndarray],
+    sku_bytes: Optional[np.ndarray]
+) -> int:
+    """Appends the metric rows of one level to forecast_accuracy with binary COPY; returns the row count."""
+    cursor = crud.get_raw_connection(db).cursor()
+    try:
+        for chunk_start in range(0, len(rows["lag"]), COPY_CHUNK_ROWS):
+            chunk = {name: values[chunk_start:chunk_start + COPY_CHUNK_ROWS] for name, values in rows.items()}
+            # wape / bias son NULL cuando no hubo reales, mape cuando todos los reales fueron 0
+            null_patterns = np.isnan(chunk["wape"]) * 2 + np.isnan(chunk["mape"])
+            for pattern in np.unique(null_patterns):
+                selected = null_patterns == pattern
+                groups = chunk["group"][selected]
+                fields = [
+                    ("forecast_source", forecast_source.encode()),
+                    ("key_figure_id", np.full(len(groups), key_figure_id)),
+                    ("lag", chunk["lag"][selected]),
+                    ("level", level.encode()),
+                    ("client_id", client_bytes[groups] if client_bytes is not None else None),
+                    ("sku_id", sku_bytes[groups] if sku_bytes is not None else None),
+                    ("periods", chunk["periods"][selected].astype(np.int64)),
+                    ("actual_sum", chunk["actual_sum"][selected]),
+                    ("abs_error_sum", chunk["abs_error_sum"][selected]),
+                    ("error_sum", chunk["error_sum"][selected]),
+                    ("wape", None if pattern & 2 else chunk["wape"][selected]),
+                    ("mape", None if pattern & 1 else chunk["mape"][selected]),
+                    ("bias", None if pattern & 2 else chunk["bias"][selected]),
+                ]
+                payload = _COPY_BINARY_HEADER + _copy_binary_rows(fields, len(groups)) + _COPY_BINARY_TRAILER
+                cursor.copy_expert(
+                    f"COPY forecast_accuracy ({', '.join(ACCURACY_COLUMNS)}) FROM STDIN WITH (FORMAT binary)",
+                    io.BytesIO(payload)
+                )
+    finally:
+        cursor.close()
+    return len(rows["lag"])
+
+
+def write_accuracy_metrics(
+    db: Session,
+    forecasts_by_source: Dict[str, "pd.DataFrame"],
+    actual_matrix: np.ndarray,
+    row_index: Dict[Tuple[uuid.UUID, uuid.UUID, int], int],
+    first_month: int,
+    max_lag: int
+) -> Dict[str, Dict[str, int]]:
+    """
+    Replaces forecast_accuracy with the metrics of the forecast cells of every source (frames as
+    read by _read_forecasts) against the actuals (crud.load_fact_history_matrix output whose
+    columns start at `first_month`). Does not commit. Returns the cell and row counts per source.
+    """
+    import pandas as pd
+
+    keys = sorted(row_index, key=row_index.get)  # claves en el orden de las filas de la matriz
+    actual_index = pd.MultiIndex.from_tuples(
+        [(str(client_id), str(sku_id), key_figure_id) for client_id, sku_id, key_figure_id in keys],
+        names=["client_id", "sku_id", "actual_kf"]
+    ) if keys else None
+    row_client_codes, client_uniques = pd.factorize(pd.Series([client_id for client_id, _, _ in keys], dtype=object))
+    uuid_bytes = {
+        "series": (_uuid_bytes([client_id for client_id, _, _ in keys]), _uuid_bytes([sku_id for _, sku_id, _ in keys])),
+        "client": (_uuid_bytes(list(client_uniques)), None),
+        "total": (None, None),
+    }
+
+    counts = {}
+    db.execute(text("TRUNCATE forecast_accuracy"))
+    for forecast_source, forecasts in forecasts_by_source.items():
+        compared_cells = written_rows = 0
+        for key_figure_id, kf_forecasts in forecasts.groupby("key_figure_id"):
+            # Fila de la matriz de reales de cada celda pronosticada (-1 si la serie no tiene historia)
+            actual_rows = np.full(len(kf_forecasts), -1, dtype=np.int64)
+            if actual_index is not None:
+                actual_rows = actual_index.get_indexer(pd.MultiIndex.from_arrays([
+                    kf_forecasts["client_id"], kf_forecasts["sku_id"],
+                    np.full(len(kf_forecasts), ACTUALS_BY_FORECAST_KF[key_figure_id][0])
+                ]))
+            for level, rows in compute_accuracy(
+                kf_forecasts["month"].to_numpy(), kf_forecasts["created_month"].to_numpy(), kf_forecasts["value"].to_numpy(),
+                actual_rows, actual_matrix, first_month, row_client_codes, len(client_uniques), max_lag
+            ):
+                if level == "total":
+                    compared_cells += int(rows["periods"].sum())
+                written_rows += _copy_accuracy_rows(db, forecast_source, int(key_figure_id), level, rows, *uuid_bytes[level])
+        counts[forecast_source] = {"forecast_cells": len(forecasts), "compared_cells": compared_cells, "rows": written_rows}
+    return counts
+
+
+def refresh_accuracy_metrics(db: Session, max_lag: int = DEFAULT_MAX_LAG, end_period: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Recomputes forecast_accuracy for every forecast source, forecasted key figure, lag (0..max_lag)
+    and level, comparing the periods before `end_period` (default: the current month) with the
+    history, and replaces the table content in one transaction (commits).
+    Returns the number of compared cells and written rows per source, and the elapsed seconds.
+    """
+    started = time.perf_counter()
+    end_period = end_period or date.today().replace(day=1)
+    summary: Dict[str, Any] = {}
+
+    # Se lee todo antes de reemplazar la tabla: el TRUNCATE bloquea las lecturas hasta el commit
+    forecasts_by_source = {source: _read_forecasts(db, source, end_period, max_lag) for source in FORECAST_SOURCES}
+    months = [frame["month"] for frame in forecasts_by_source.values() if not frame.empty]
+    actual_matrix, row_index, first_month = np.empty((0, 0)), {}, 0
+    if months:
+        first_month = int(min(month.min() for month in months))
+        last_month = int(max(month.max() for month in months))
+        actual_matrix, row_index, _ = crud.load_fact_history_matrix(
+            db,
+            start_period=date(first_month // 12, first_month % 12 + 1, 1),
+            end_period=date(last_month // 12, last_month % 12 + 1, 1),
+            key_figure_sources=sorted(set(ACTUALS_BY_FORECAST_KF.values()))
+        )
+    summary.update(write_accuracy_metrics(db, forecasts_by_source, actual_matrix, row_index, first_month, max_lag))
+    db.commit()
+
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Forecast accuracy refreshed: {summary}")
+    return summary
@@ -0,0 +1,84 @@
+# backend/app/conditional_get.py
+# GET condicional (ETag / Last-Modified) para los endpoints de lectura que el frontend vuelve a pedir
+# en cada cambio de selección: listas de dimensiones y la grilla.
+# El ETag se arma con las versiones de change_counters de los alcances de los que depende la
+# respuesta (ver crud.bump_change_counters). Si el cliente manda un If-None-Match que coincide, se
+# responde 304 sin leer las tablas de hechos ni armar el payload. Last-Modified es informativo: con
+# resolución de segundos no distingue dos escrituras del mismo segundo, así que If-Modified-Since no
+# se usa para decidir el 304.
+# Las versiones leídas quedan en request.state.change_counters: la grilla arma con ellas la clave de
+# result_cache, así el cuerpo nunca es más viejo que el ETag con el que se envía.
+# Con Cache-Control: no-cache el navegador guarda la respuesta y la revalida en cada fetch, así que
+# el frontend no necesita cambios.
+
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import crud
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of If-None-Match (a list of tags, or '*') against `etag`."""
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    db: Session,
+    scopes: Iterable[str]
+) -> Optional[Response]:
+    """
+    Computes the validators of the response from the change counters of `scopes` (one small query)
+    and sets ETag, Last-Modified and Cache-Control on `response`.
+    Returns a 304 Response when the request's If-None-Match still matches; the route must return it as is.
+    Call it BEFORE reading the data: a write that lands in between then yields a newer body with the
+    older ETag, which only costs one extra 200 on the next request. The counters it read are left in
+    request.state.change_counters (e.g. for the result_cache key of the body).
+    """
+    scopes = sorted(set(scopes))
+    return _not_modified(request, response, scopes, crud.get_change_counters(db, scopes))
+
+
+async def check_not_modified_async(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    scopes: Iterable[str]
+) -> Optional[Response]:
+    """check_not_modified for the async endpoints."""
+    scopes = sorted(set(scopes))
+    return _not_modified(request, response, scopes, await crud.get_change_counters_async(db, scopes))
+
+
+def _not_modified(
+    request: Request,
+    response: Response,
+    scopes: List[str],
+    counters: Dict[str, Tuple[int, datetime]]
+) -> Optional[Response]:
+    request.state.change_counters = counters
+    fingerprint = crud.change_counters_fingerprint(scopes, counters)
+    variant = f"{request.url.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.query_params.multi_items()))}"
+    etag = '"' + hashlib.sha1(f"{variant}#{fingerprint}".encode()).hexdigest() + '"'
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if counters and len(counters) == len(scopes):
+        last_modified = max(changed_at for _, changed_at in counters.values())
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -3,6 +3,73 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     # Variables de entorno para la base de datos
     DATABASE_URL: str
+
+    # Pool de conexiones, POR PROCESO y por motor (sync psycopg2 y async asyncpg): cada worker de
+    # uvicorn abre hasta 2 x (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexiones; dimensionar contra
+    # max_connections de Postgres. El uso real se ve en GET /data/pool/metrics.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Segundos que un request espera una conexión libre antes de fallar
+    DB_POOL_TIMEOUT: int = 30
+    # Reemplaza las conexiones con más de N segundos (-1 = nunca)
+    DB_POOL_RECYCLE: int = 1800
+    # Validar cada conexión con un ping al sacarla del pool (un round-trip por checkout). Con False
+    # se confía en DB_POOL_RECYCLE y una conexión caída falla una vez y se descarta del pool.
+    DB_POOL_PRE_PING: bool = True
+
+    # Ajuste de modelos en paralelo para el pronóstico por lotes
+    # 0 = un proceso por core, 1 = ajustar en el mismo proceso (sin pool)
+    FORECAST_FIT_WORKERS: int = 0
+    # Cantidad de series que se envían juntas a cada proceso
+    FORECAST_FIT_CHUNK_SIZE: int = 64
+    # Motor para el modelo ETS en el pronóstico por lotes: 'statsmodels' (el mismo ajuste que
+    # /forecast/generate/, parámetros optimizados e inicialización estimada) o 'native' (vectorizado,
+    # NumPy: beta y gamma de una grilla e inicialización 'simple'; mucho más rápido, pero sus
+    # pronósticos difieren de los de statsmodels para la misma serie)
+    FORECAST_ETS_ENGINE: str = "statsmodels"
+    # Selección automática de modelo (model_name 'AUTO', ver forecast_engine.select_forecast_model):
+    # períodos pronosticados en cada origen del holdout móvil y cantidad de orígenes
+    FORECAST_AUTO_HOLDOUT_PERIODS: int = 6
+    FORECAST_AUTO_HOLDOUT_FOLDS: int = 3
+    # Si el mejor candidato barato tiene un WAPE de holdout menor o igual, no se prueban los ARIMA
+    FORECAST_AUTO_GOOD_ENOUGH_WAPE: float = 0.05
+    # Un ARIMA cuyo error acumulado supera al del líder en más de este margen relativo se descarta
+    FORECAST_AUTO_RACE_MARGIN: float = 0.25
+    # Estados de modelo guardados (forecast_model_states): un mes nuevo cuyo error a un paso supera
+    # este múltiplo del RMSE del ajuste fuerza un reajuste, y también superar FORECAST_STATE_MAX_UPDATES
+    # meses avanzados desde el último ajuste completo
+    FORECAST_STATE_DRIFT_THRESHOLD: float = 3.0
+    FORECAST_STATE_MAX_UPDATES: int = 6
+    # statsmodels / pandas se importan en el primer ajuste (segundos y decenas de MB por proceso).
+    # True los carga al arrancar: para los procesos dedicados a ajustar (JOB_WORKERS > 0 sin tráfico
+    # web), así el primer trabajo no paga la importación. Los procesos de ajuste los cargan siempre.
+    FORECAST_PRELOAD_MODELING_STACK: bool = False
+
+    # Exportación Parquet / Arrow: filas por lote leídas del cursor del servidor (y por row group)
+    EXPORT_BATCH_SIZE: int = 100000
+
+    # Caché de dimensiones de los listados de hechos: segundos hasta releer lo que escribieron otros procesos
+    DIMENSION_CACHE_TTL_SECONDS: int = 300
+
+    # Caché de resultados de la grilla / Manual input / Final Forecast por cliente-SKU (app/result_cache.py)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 512
+    # Vencimiento de las entradas (las de versiones viejas de change_counters ya no se leen)
+    RESULT_CACHE_TTL_SECONDS: int = 600
+    # Backend compartido entre procesos/workers (opcional, requiere el paquete redis), p.ej. redis://localhost:6379/0
+    RESULT_CACHE_REDIS_URL: str = ""
+
+    # Trabajos en segundo plano (app/jobs.py): hilos por proceso que toman trabajos de la tabla jobs.
+    # 0 = este proceso sólo encola (los ejecuta otro proceso, o jobs.run_pending en scripts / pruebas)
+    JOB_WORKERS: int = 1
+    # Cada cuántos segundos un worker ocioso vuelve a mirar la cola (los envíos del mismo proceso lo despiertan antes)
+    JOB_POLL_SECONDS: float = 2.0
+    # Latido de los trabajos en curso; uno sin latido por JOB_STALE_SECONDS (proceso caído) se marca failed
+    JOB_HEARTBEAT_SECONDS: int = 10
+    JOB_STALE_SECONDS: int = 120
+    # Directorio de los archivos subidos para importar (vacío = temporal del sistema); con varios
+    # servidores tiene que ser compartido
+    JOB_FILES_DIR: str = ""
     
     # Configura la ruta al archivo .env
     model_config = SettingsConfigDict(env_file='.env', extra='ignore')
@@ -2,20 +2,160 @@
 # NO debe contener ninguna definición de API (@router.get, etc.) ni declaración de APIRouter.
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, distinct 
-from typing import List, Optional, Dict, Any 
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, distinct, tuple_, select, text
+from typing import List, Optional, Dict, Any, Tuple, Set, Iterable, Callable
+from collections import defaultdict
 from datetime import date, datetime
 import uuid
+import io
+import json
+import base64
+import numpy as np
 import psycopg2.extras # Para ejecutar valores en lote
 from psycopg2 import extras
 
-from . import models, schemas 
+from . import models, schemas, dimension_cache
+from .final_forecast import compute_final_forecast_values
 
 # Helper function to get raw connection from SQLAlchemy session
 def get_raw_connection(db: Session):
     """Obtiene la conexión psycopg2 subyacente de la sesión de SQLAlchemy."""
     return db.connection().connection
 
+# --- Paginación por keyset (listados de hechos) ---
+# Los listados se ordenan por la PK y cada página empieza después de la última fila de la anterior
+# (WHERE (pk...) > (último pk...) ORDER BY pk LIMIT n): el costo por página no depende de la posición,
+# a diferencia de OFFSET. La posición viaja al cliente como un token opaco (JSON en base64url).
+def _primary_key_columns(model) -> List[Any]:
+    return list(model.__table__.primary_key.columns)
+
+def encode_page_token(model, row) -> str:
+    """Token that points right after `row` in the primary-key order of `model`."""
+    values = [row[column.key] if isinstance(row, dict) else getattr(row, column.key) for column in _primary_key_columns(model)]
+    payload = json.dumps([value.isoformat() if isinstance(value, date) else str(value) if isinstance(value, uuid.UUID) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_page_token(model, token: str) -> Tuple:
+    """Primary-key values encoded in `token`. Raises ValueError if the token is not valid for `model`."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        columns = _primary_key_columns(model)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type is date:
+                decoded.append(date.fromisoformat(value))
+            elif python_type is uuid.UUID:
+                decoded.append(uuid.UUID(value))
+            else:
+                decoded.append(python_type(value))
+        return tuple(decoded)
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid page_token.")
+
+def _paginate(query, model, page_after: Optional[Tuple], skip: int, limit: int):
+    """Orders `query` by the primary key and applies the keyset position (page_after) or the offset."""
+    columns = [getattr(model, column.key) for column in _primary_key_columns(model)]
+    if page_after is not None:
+        query = query.filter(tuple_(*columns) > tuple_(*page_after))
+    return query.order_by(*columns).offset(skip).limit(limit)
+
+def next_page_token(model, rows: List[Any], limit: int) -> Optional[str]:
+    """Token for the page after `rows`, or None when `rows` is the last page."""
+    return encode_page_token(model, rows[-1]) if rows and len(rows) == limit else None
+
+
+# --- Listados de hechos sin joinedload ---
+# Los listados leen sólo las columnas del hecho (sin objetos ORM ni identity map) y resuelven las
+# dimensiones desde dimension_cache: una consulta IN por los ids que todavía no están en caché.
+FACT_DIMENSION_IDS = {"client": "client_id", "sku": "sku_id", "key_figure": "key_figure_id"}
+
+def _fact_columns(model) -> List[Any]:
+    return [getattr(model, column.key) for column in model.__table__.columns]
+
+def _fact_records(db: Session, rows, dimensions: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Rows of a column query as dicts, with the dimension objects attached.
+    `dimensions` maps the attribute to fill (a dimension_cache dimension) to the id column of the row.
+    """
+    records = [row._asdict() for row in rows]
+    for attribute, id_key in dimensions.items():
+        resolved = dimension_cache.get_many(db, attribute, {record[id_key] for record in records})
+        for record in records:
+            record[attribute] = resolved.get(record[id_key])
+    return records
+
+def _attach_related(db: Session, records: List[Dict[str, Any]], attribute: str, id_column, schema):
+    """Fills `attribute` of each record with the row of id_column's table (one IN query for the page)."""
+    ids = {record[id_column.key] for record in records} - {None}
+    related = {
+        getattr(row, id_column.key): schema.model_validate(row)
+        for row in (db.query(id_column.class_).filter(id_column.in_(ids)) if ids else [])
+    }
+    for record in records:
+        record[attribute] = related.get(record[id_column.key])
+
+
+# --- Contadores de cambios (ETag / Last-Modified) ---
+# Cada escritura sube, en su misma transacción, la versión de los alcances que modifica; los GET
+# condicionales (app/conditional_get.py) sólo leen estas filas para decidir si responder 304.
+CHANGE_SCOPE_CLIENTS = "dim_clients"
+CHANGE_SCOPE_SKUS = "dim_skus"
+CHANGE_SCOPE_KEY_FIGURES = "dim_keyfigures"
+CHANGE_SCOPE_ADJUSTMENT_TYPES = "dim_adjustment_types"
+CHANGE_SCOPE_FACT_HISTORY = "fact_history"  # qué SKUs tiene cada cliente (/skus/?client_id=)
+CHANGE_SCOPE_FACTS = "facts"  # cargas masivas: cambia todas las series
+
+def series_change_scope(client_id: uuid.UUID, sku_id: uuid.UUID) -> str:
+    return f"series:{client_id}:{sku_id}"
+
+def bump_change_counters(db: Session, scopes: Iterable[str]):
+    """Increments the version of every scope, inside the session's transaction (no commit)."""
+    bump_change_counters_conn(get_raw_connection(db), scopes)
+
+def bump_change_counters_conn(conn, scopes: Iterable[str]):
+    """
+    bump_change_counters on a psycopg2 connection (history importer, scripts).
+    Scopes are locked in sorted order so concurrent writers cannot deadlock.
+    """
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    with conn.cursor() as cursor:
+        extras.execute_values(
+            cursor,
+            """
+            INSERT INTO change_counters (scope) VALUES %s
+            ON CONFLICT (scope) DO UPDATE
+            SET version = change_counters.version + 1, changed_at = CURRENT_TIMESTAMP
+            """,
+            [(scope,) for scope in scopes]
+        )
+
+CHANGE_COUNTERS_QUERY = text("SELECT scope, version, changed_at FROM change_counters WHERE scope = ANY(:scopes)")
+
+def get_change_counters(db: Session, scopes: Iterable[str]) -> Dict[str, Tuple[int, datetime]]:
+    """{scope: (version, changed_at)} of the scopes that were ever written (one query)."""
+    rows = db.execute(CHANGE_COUNTERS_QUERY, {"scopes": list(scopes)}).all()
+    return {scope: (version, changed_at) for scope, version, changed_at in rows}
+
+def change_counters_fingerprint(scopes: Iterable[str], counters: Dict[str, Tuple[int, datetime]]) -> str:
+    """
+    "scope=version@changed_at|..." of `scopes` (sorted). changed_at tells apart the same version
+    number after change_counters is emptied (Resettables.sql, a restored backup).
+    """
+    return "|".join(
+        f"{scope}={counters[scope][0]}@{counters[scope][1].isoformat()}" if scope in counters else f"{scope}=-"
+        for scope in sorted(set(scopes))
+    )
+
+def _series_change_scopes(series: Iterable[Tuple[Any, Any]]) -> Set[str]:
+    return {series_change_scope(client_id, sku_id) for client_id, sku_id in series}
+
+
 # --- Operaciones CRUD para DimClients, DimSkus, DimKeyFigures ---
 
 def get_client_by_name(db: Session, client_name: str):
@@ -30,8 +170,10 @@ def get_clients(db: Session, skip: int = 0, limit: int = 100):
 def create_client(db: Session, client: schemas.DimClientCreate):
     db_client = models.DimClient(client_name=client.client_name)
     db.add(db_client)
+    bump_change_counters(db, [CHANGE_SCOPE_CLIENTS])
     db.commit()
     db.refresh(db_client)
+    dimension_cache.invalidate("client")
     return db_client
 
 def get_sku_by_name(db: Session, sku_name: str):
@@ -55,8 +197,10 @@ def get_skus_by_client(db: Session, client_id: uuid.UUID, skip: int = 0, limit:
 def create_sku(db: Session, sku: schemas.DimSkuCreate):
     db_sku = models.DimSku(sku_name=sku.sku_name) # Changed from sku_name to name as per model
     db.add(db_sku)
+    bump_change_counters(db, [CHANGE_SCOPE_SKUS])
     db.commit()
     db.refresh(db_sku)
+    dimension_cache.invalidate("sku")
     return db_sku
 
 def get_key_figure(db: Session, key_figure_id: int):
@@ -77,8 +221,10 @@ def create_key_figure(db: Session, key_figure: schemas.DimKeyFigureCreate):
         order=key_figure.order
     )
     db.add(db_key_figure)
+    bump_change_counters(db, [CHANGE_SCOPE_KEY_FIGURES])
     db.commit()
     db.refresh(db_key_figure)
+    dimension_cache.invalidate("key_figure")
     return db_key_figure
 
 # --- Operaciones CRUD para DimAdjustmentTypes ---
@@ -97,8 +243,10 @@ def create_adjustment_type(db: Session, adj_type: schemas.DimAdjustmentTypeCreat
         name=adj_type.name
     )
     db.add(db_adj_type)
+    bump_change_counters(db, [CHANGE_SCOPE_ADJUSTMENT_TYPES])
     db.commit()
     db.refresh(db_adj_type)
+    dimension_cache.invalidate("adjustment_type")
     return db_adj_type
 
 
@@ -130,16 +278,31 @@ def get_fact_history_data(
     key_figure_ids: Optional[List[int]] = None,
     sources: Optional[List[str]] = None,
     skip: int = 0,
-    limit: int = 100
-) -> List[models.FactHistory]:
+    limit: int = 100,
+    page_after: Optional[Tuple] = None
+) -> List[Dict[str, Any]]:
     """
     Obtiene datos de historial de ventas con varios filtros.
     """
-    query = db.query(models.FactHistory).options(
-        joinedload(models.FactHistory.client),
-        joinedload(models.FactHistory.sku),
-        joinedload(models.FactHistory.key_figure)
+    statement = fact_history_statement(
+        client_ids, sku_ids, start_period, end_period, key_figure_ids, sources, skip, limit, page_after
     )
+    rows = db.execute(statement).all()
+    return _fact_records(db, rows, FACT_DIMENSION_IDS)
+
+def fact_history_statement(
+    client_ids: Optional[List[uuid.UUID]] = None,
+    sku_ids: Optional[List[uuid.UUID]] = None,
+    start_period: Optional[date] = None,
+    end_period: Optional[date] = None,
+    key_figure_ids: Optional[List[int]] = None,
+    sources: Optional[List[str]] = None,
+    skip: int = 0,
+    limit: int = 100,
+    page_after: Optional[Tuple] = None
+):
+    """SELECT of one page of get_fact_history_data (runs on a Session or an AsyncSession)."""
+    query = select(*_fact_columns(models.FactHistory))
     if client_ids:
         query = query.filter(models.FactHistory.client_id.in_(client_ids))
     if sku_ids:
@@ -152,8 +315,7 @@ def get_fact_history_data(
         query = query.filter(models.FactHistory.key_figure_id.in_(key_figure_ids))
     if sources:
         query = query.filter(models.FactHistory.source.in_(sources))
-
-    return query.offset(skip).limit(limit).all()
+    return _paginate(query, models.FactHistory, page_after, skip, limit)
 
 # Función para obtener historial de datos para cálculos específicos
 def get_fact_history_for_calculation(
@@ -179,6 +341,89 @@ def get_fact_history_for_calculation(
         query = query.filter(models.FactHistory.key_figure_id == key_figure_id)
     return query.all()
 
+# Lectura columnar de historia para el pronóstico por lotes
+def load_fact_history_matrix(
+    db: Session,
+    start_period: date,
+    end_period: date,
+    key_figure_sources: List[Tuple[int, str]],
+    client_ids: Optional[List[uuid.UUID]] = None,
+    sku_ids: Optional[List[uuid.UUID]] = None,
+    series_keys: Optional[List[Tuple[uuid.UUID, uuid.UUID, int]]] = None
+) -> Tuple[np.ndarray, Dict[Tuple[uuid.UUID, uuid.UUID, int], int], List[date]]:
+    """
+    Lee fact_history para muchas combinaciones (client_id, sku_id, key_figure_id) en una sola
+    consulta (COPY ... TO STDOUT) y la devuelve como una matriz densa series x periodos,
+    sin hidratar objetos ORM.
+    - key_figure_sources: pares (key_figure_id, source) a leer, p.ej. [(5, 'sales'), (1, 'sales')].
+    - client_ids / sku_ids: filtros opcionales (None = todos).
+    - series_keys: combinaciones exactas (client_id, sku_id, key_figure_id) a leer, opcional.
+    Devuelve (matriz, índice de filas {(client_id, sku_id, key_figure_id): fila}, periodos).
+    Las celdas sin dato (o con valor nulo) quedan en NaN; una serie aparece en el índice
+    si tiene al menos una fila en el rango.
+    """
+    import pandas as pd  # carga diferida: sólo la usan el pronóstico por lotes y los benchmarks
+
+    start_month = start_period.year * 12 + start_period.month - 1
+    end_month = end_period.year * 12 + end_period.month - 1
+    periods = [date(month // 12, month % 12 + 1, 1) for month in range(start_month, end_month + 1)]
+    if not key_figure_sources or not periods:
+        return np.empty((0, len(periods))), {}, periods
+
+    conn = get_raw_connection(db)
+    cursor = conn.cursor()
+    try:
+        conditions = [
+            cursor.mogrify("h.period BETWEEN %s AND %s", (start_period, end_period)).decode(),
+            cursor.mogrify(
+                "(h.key_figure_id, h.source) IN (SELECT * FROM unnest(%s::int[], %s::text[]))",
+                ([kf_id for kf_id, _ in key_figure_sources], [source for _, source in key_figure_sources])
+            ).decode()
+        ]
+        if client_ids:
+            conditions.append(cursor.mogrify("h.client_id = ANY(%s::uuid[])", (list(client_ids),)).decode())
+        if sku_ids:
+            conditions.append(cursor.mogrify("h.sku_id = ANY(%s::uuid[])", (list(sku_ids),)).decode())
+        if series_keys:
+            conditions.append(cursor.mogrify(
+                "(h.client_id, h.sku_id, h.key_figure_id) IN (SELECT * FROM unnest(%s::uuid[], %s::uuid[], %s::int[]))",
+                ([k[0] for k in series_keys], [k[1] for k in series_keys], [k[2] for k in series_keys])
+            ).decode())
+
+        copy_query = f"""
+            COPY (
+                SELECT h.client_id, h.sku_id, h.key_figure_id,
+                       (EXTRACT(YEAR FROM h.period)::int * 12 + EXTRACT(MONTH FROM h.period)::int - 1 - {start_month}) AS period_index,
+                       h.value
+                FROM fact_history h
+                WHERE {" AND ".join(conditions)}
+            ) TO STDOUT WITH (FORMAT csv)
+        """
+        buffer = io.StringIO()
+        cursor.copy_expert(copy_query, buffer)
+    finally:
+        cursor.close()
+
+    buffer.seek(0)
+    frame = pd.read_csv(
+        buffer,
+        header=None,
+        names=["client_id", "sku_id", "key_figure_id", "period_index", "value"],
+        dtype={"client_id": str, "sku_id": str, "key_figure_id": np.int64, "period_index": np.int64, "value": np.float64}
+    )
+    if frame.empty:
+        return np.empty((0, len(periods))), {}, periods
+
+    # Número de fila por serie, sin recorrer las filas en Python
+    series_codes, series_uniques = pd.MultiIndex.from_frame(frame[["client_id", "sku_id", "key_figure_id"]]).factorize()
+    matrix = np.full((len(series_uniques), len(periods)), np.nan)
+    matrix[series_codes, frame["period_index"].to_numpy()] = frame["value"].to_numpy()
+    row_index = {
+        (uuid.UUID(client_id), uuid.UUID(sku_id), int(key_figure_id)): row
+        for row, (client_id, sku_id, key_figure_id) in enumerate(series_uniques)
+    }
+    return matrix, row_index, periods
+
 
 def create_fact_history(db: Session, fact_history: schemas.FactHistoryCreate, user_id: uuid.UUID):
     db_fact_history = models.FactHistory(
@@ -192,6 +437,9 @@ def create_fact_history(db: Session, fact_history: schemas.FactHistoryCreate, us
         user_id=user_id
     )
     db.add(db_fact_history)
+    db.flush()
+    refresh_final_forecast(db, {(fact_history.client_id, fact_history.sku_id): {fact_history.period}})
+    bump_change_counters(db, [series_change_scope(fact_history.client_id, fact_history.sku_id), CHANGE_SCOPE_FACT_HISTORY])
     db.commit()
     db.refresh(db_fact_history)
     return db_fact_history
@@ -212,6 +460,9 @@ def update_fact_history(
         for key, value in fact_history_update.model_dump(exclude_unset=True).items():
             setattr(db_fact_history, key, value)
         db_fact_history.updated_at = func.now()
+        db.flush()
+        refresh_final_forecast(db, {(client_id, sku_id): {period, db_fact_history.period}})
+        bump_change_counters(db, [series_change_scope(client_id, sku_id), CHANGE_SCOPE_FACT_HISTORY])
         db.commit()
         db.refresh(db_fact_history)
     return db_fact_history
@@ -228,6 +479,9 @@ def delete_fact_history(
     db_fact_history = get_fact_history(db, client_id, sku_id, client_final_id, period, key_figure_id, source)
     if db_fact_history:
         db.delete(db_fact_history)
+        db.flush()
+        refresh_final_forecast(db, {(client_id, sku_id): {period}})
+        bump_change_counters(db, [series_change_scope(client_id, sku_id), CHANGE_SCOPE_FACT_HISTORY])
         db.commit()
     return db_fact_history
 
@@ -251,6 +505,169 @@ def create_forecast_smoothing_parameter(db: Session, forecast_run_id: uuid.UUID,
     db.refresh(db_param)
     return db_param
 
+def create_forecast_smoothing_parameters_batch(db: Session, parameters: List[Dict[str, Any]]):
+    """
+    Inserta un lote de corridas de pronóstico (una por cliente en el pronóstico por lotes).
+    """
+    if not parameters:
+        return 0
+
+    conn = get_raw_connection(db)
+    cursor = conn.cursor()
+
+    query = """
+        INSERT INTO forecast_smoothing_parameters (forecast_run_id, client_id, alpha, user_id)
+        VALUES %s
+        ON CONFLICT (forecast_run_id) DO NOTHING;
+    """
+
+    values_to_insert = [
+        (p['forecast_run_id'], p['client_id'], p['alpha'], p['user_id'])
+        for p in parameters
+    ]
+
+    try:
+        extras.execute_values(cursor, query, values_to_insert, page_size=1000)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+
+    return len(parameters)
+
+# --- Estados de modelo ajustado (ver forecast_engine, sección de estados persistidos) ---
+def create_forecast_model_state(
+    db: Session,
+    forecast_run_id: uuid.UUID,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    history_source: str,
+    history_key_figure_id: int,
+    model_name: str,
+    model_used: str,
+    model_state: Dict[str, Any],
+    history_start: date,
+    history_values: Iterable[float],
+    updates_since_fit: int
+):
+    db_state = models.ForecastModelState(
+        forecast_run_id=forecast_run_id,
+        client_id=client_id,
+        sku_id=sku_id,
+        history_source=history_source,
+        history_key_figure_id=history_key_figure_id,
+        model_name=model_name,
+        model_used=model_used,
+        model_kind=model_state["kind"],
+        params=model_state["params"],
+        state=model_state["state"],
+        rmse=model_state["rmse"],
+        history_start=history_start,
+        history_values=[float(v) for v in history_values],
+        updates_since_fit=updates_since_fit
+    )
+    db.add(db_state)
+    db.commit()
+    return db_state
+
+def get_latest_forecast_model_state(
+    db: Session,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    history_source: str,
+    history_key_figure_id: int,
+    model_name: str,
+    alpha: float
+) -> Optional[models.ForecastModelState]:
+    """Last model state stored for the series with the same history, requested model and alpha of the run."""
+    return db.query(models.ForecastModelState).join(
+        models.ForecastSmoothingParameter,
+        models.ForecastSmoothingParameter.forecast_run_id == models.ForecastModelState.forecast_run_id
+    ).filter(
+        models.ForecastModelState.client_id == client_id,
+        models.ForecastModelState.sku_id == sku_id,
+        models.ForecastModelState.history_source == history_source,
+        models.ForecastModelState.history_key_figure_id == history_key_figure_id,
+        models.ForecastModelState.model_name == model_name,
+        models.ForecastSmoothingParameter.alpha == alpha
+    ).order_by(models.ForecastModelState.created_at.desc()).first()
+
+# --- Huellas de la entrada del pronóstico por lotes (ver forecast_engine.generate_forecast_batch) ---
+def get_current_forecast_input_hashes(
+    db: Session,
+    key_figure_id: int,
+    client_ids: Optional[List[uuid.UUID]] = None,
+    sku_ids: Optional[List[uuid.UUID]] = None
+) -> Dict[Tuple[uuid.UUID, uuid.UUID], Tuple[str, float]]:
+    """
+    Devuelve {(client_id, sku_id): (input_hash, forecast_seconds)} de las series cuyo pronóstico
+    estadístico en key_figure_id sigue siendo el de la corrida de la huella: las forecast_periods
+    filas de fact_forecast_stat siguen con ese forecast_run_id (otra corrida, p.ej. un pronóstico
+    individual, las reemplaza y la huella deja de valer).
+    """
+    conn = get_raw_connection(db)
+    cursor = conn.cursor()
+    try:
+        conditions = [cursor.mogrify("h.key_figure_id = %s", (key_figure_id,)).decode()]
+        if client_ids:
+            conditions.append(cursor.mogrify("h.client_id = ANY(%s::uuid[])", (list(client_ids),)).decode())
+        if sku_ids:
+            conditions.append(cursor.mogrify("h.sku_id = ANY(%s::uuid[])", (list(sku_ids),)).decode())
+        cursor.execute(f"""
+            SELECT h.client_id, h.sku_id, h.input_hash, h.forecast_seconds
+            FROM forecast_input_hashes h
+            WHERE {" AND ".join(conditions)}
+              AND h.forecast_periods = (
+                  SELECT count(*) FROM fact_forecast_stat f
+                  WHERE f.client_id = h.client_id AND f.sku_id = h.sku_id AND f.client_final_id = h.client_id
+                    AND f.key_figure_id = h.key_figure_id AND f.forecast_run_id = h.forecast_run_id
+              )
+        """)
+        return {(client_id, sku_id): (input_hash, forecast_seconds) for client_id, sku_id, input_hash, forecast_seconds in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+def upsert_forecast_input_hashes(db: Session, input_hashes: List[Dict[str, Any]]):
+    """
+    Guarda la huella de la entrada de cada serie pronosticada (una fila por cliente, SKU y key figure
+    del pronóstico estadístico) junto a la corrida que escribió su pronóstico.
+    """
+    if not input_hashes:
+        return 0
+
+    conn = get_raw_connection(db)
+    cursor = conn.cursor()
+
+    query = """
+        INSERT INTO forecast_input_hashes (client_id, sku_id, key_figure_id, input_hash, forecast_run_id, forecast_periods, forecast_seconds)
+        VALUES %s
+        ON CONFLICT (client_id, sku_id, key_figure_id) DO UPDATE
+        SET
+            input_hash = EXCLUDED.input_hash,
+            forecast_run_id = EXCLUDED.forecast_run_id,
+            forecast_periods = EXCLUDED.forecast_periods,
+            forecast_seconds = EXCLUDED.forecast_seconds,
+            updated_at = CURRENT_TIMESTAMP;
+    """
+
+    values_to_insert = [
+        (h['client_id'], h['sku_id'], h['key_figure_id'], h['input_hash'], h['forecast_run_id'], h['forecast_periods'], h['forecast_seconds'])
+        for h in input_hashes
+    ]
+
+    try:
+        extras.execute_values(cursor, query, values_to_insert, page_size=1000)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+
+    return len(input_hashes)
+
 
 # --- Operaciones CRUD para ForecastVersions ---
 def get_forecast_version(db: Session, version_id: uuid.UUID):
@@ -262,21 +679,24 @@ def get_forecast_versions(db: Session, client_id: Optional[uuid.UUID] = None, sk
         query = query.filter(models.ForecastVersion.client_id == client_id)
     return query.offset(skip).limit(limit).all()
 
-def create_forecast_version(db: Session, version_data: schemas.ForecastVersionCreate, current_forecast_data_to_version: List[Dict[str, Any]]) -> models.ForecastVersion:
-    new_version_id = uuid.uuid4()
+def _add_forecast_version(db: Session, version_data: schemas.ForecastVersionCreate) -> models.ForecastVersion:
+    # smoothing_parameter_used no tiene columna: el alpha vive en forecast_smoothing_parameters (forecast_run_id)
     db_version = models.ForecastVersion(
-        version_id=new_version_id,
+        version_id=uuid.uuid4(),
         client_id=version_data.client_id,
         user_id=version_data.user_id,
         version_name=version_data.version_name,
         history_source_used=version_data.history_source_used,
-        smoothing_parameter_used=version_data.smoothing_parameter_used,
-        statistical_model_applied=version_data.statistical_model_applied,
+        model_used=version_data.statistical_model_applied,
         creation_date=datetime.now(),
         notes=version_data.notes
     )
     db.add(db_version)
-    db.flush() 
+    db.flush()
+    return db_version
+
+def create_forecast_version(db: Session, version_data: schemas.ForecastVersionCreate, current_forecast_data_to_version: List[Dict[str, Any]]) -> models.ForecastVersion:
+    db_version = _add_forecast_version(db, version_data)
 
     versioned_records = []
     for row in current_forecast_data_to_version:
@@ -286,14 +706,13 @@ def create_forecast_version(db: Session, version_data: schemas.ForecastVersionCr
         period = row["period"].date() if isinstance(row["period"], datetime) else row["period"]
         
         versioned_record = models.FactForecastVersioned(
-            version_id=new_version_id,
+            version_id=db_version.version_id,
             client_id=client_id,
             sku_id=sku_id,
             client_final_id=client_final_id,
             key_figure_id=row["key_figure_id"], 
             period=period,
-            value=row["value"],
-            user_id=version_data.user_id 
+            value=row["value"]
         )
         versioned_records.append(versioned_record)
 
@@ -304,6 +723,73 @@ def create_forecast_version(db: Session, version_data: schemas.ForecastVersionCr
     db.refresh(db_version)
     return db_version
 
+def create_forecast_version_snapshot(
+    db: Session,
+    version_data: schemas.ForecastVersionCreate,
+    sku_ids: Optional[List[uuid.UUID]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    chunk_size: int = 200
+) -> Tuple[models.ForecastVersion, int]:
+    """
+    Crea una versión con una copia del pronóstico actual del cliente (sku_ids: sólo esos SKUs):
+    pronóstico estadístico (6 / 7) y Final Forecast (8). Las series cuyo Final Forecast todavía no
+    está materializado se materializan antes, de a `chunk_size` series, llamando a
+    progress_callback(series hechas, total) después de cada bloque. La copia es un INSERT ... SELECT.
+    Hace commit (una sola transacción). Devuelve (versión, celdas versionadas).
+    """
+    with get_raw_connection(db).cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT s.sku_id, fs.client_id IS NOT NULL AS materialized
+            FROM (
+                SELECT DISTINCT sku_id FROM fact_history WHERE client_id = %(client_id)s
+                UNION
+                SELECT DISTINCT sku_id FROM fact_forecast_stat WHERE client_id = %(client_id)s
+            ) s
+            LEFT JOIN final_forecast_series fs ON fs.client_id = %(client_id)s AND fs.sku_id = s.sku_id
+            WHERE %(all_skus)s OR s.sku_id = ANY(%(sku_ids)s::uuid[])
+            ORDER BY s.sku_id
+            """,
+            {"client_id": version_data.client_id, "all_skus": not sku_ids, "sku_ids": [str(sku_id) for sku_id in sku_ids or []]}
+        )
+        series = cursor.fetchall()
+
+    pending = [sku_id for sku_id, materialized in series if not materialized]
+    for chunk_start in range(0, len(pending), chunk_size):
+        refresh_final_forecast(
+            db, {(version_data.client_id, sku_id): None for sku_id in pending[chunk_start:chunk_start + chunk_size]}
+        )
+        if progress_callback is not None:
+            progress_callback(len(series) - len(pending) + min(chunk_start + chunk_size, len(pending)), len(series))
+
+    db_version = _add_forecast_version(db, version_data)
+    with get_raw_connection(db).cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO fact_forecast_versioned (version_id, client_id, sku_id, client_final_id, period, key_figure_id, value)
+            SELECT %(version_id)s::uuid, s.client_id, s.sku_id, s.client_final_id, s.period, s.key_figure_id, s.value
+            FROM fact_forecast_stat s
+            WHERE s.client_id = %(client_id)s AND s.sku_id = ANY(%(sku_ids)s::uuid[])
+              AND s.key_figure_id IN (%(stat_sales_kf)s, %(stat_orders_kf)s)
+            UNION ALL
+            SELECT %(version_id)s::uuid, f.client_id, f.sku_id, f.client_id, f.period, %(final_kf)s, f.value
+            FROM fact_final_forecast f
+            WHERE f.client_id = %(client_id)s AND f.sku_id = ANY(%(sku_ids)s::uuid[])
+            """,
+            {
+                "version_id": db_version.version_id,
+                "client_id": version_data.client_id,
+                "sku_ids": [str(sku_id) for sku_id, _ in series],
+                "stat_sales_kf": schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID,
+                "stat_orders_kf": schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID,
+                "final_kf": schemas.KEY_FIGURE_FINAL_FORECAST_ID
+            }
+        )
+        versioned_cells = cursor.rowcount
+    db.commit()
+    db.refresh(db_version)
+    return db_version, versioned_cells
+
 
 # --- Operaciones CRUD para FactForecastStat ---
 def get_fact_forecast_stat(
@@ -326,13 +812,28 @@ def get_fact_forecast_stat_data(
     forecast_run_ids: Optional[List[uuid.UUID]] = None,
     key_figure_ids: Optional[List[int]] = None, # <--- AÑADIDO: key_figure_ids
     skip: int = 0,
-    limit: int = 100
-) -> List[models.FactForecastStat]:
-    query = db.query(models.FactForecastStat).options(
-        joinedload(models.FactForecastStat.client),
-        joinedload(models.FactForecastStat.sku),
-        joinedload(models.FactForecastStat.key_figure)
+    limit: int = 100,
+    page_after: Optional[Tuple] = None
+) -> List[Dict[str, Any]]:
+    statement = fact_forecast_stat_statement(
+        client_ids, sku_ids, start_period, end_period, forecast_run_ids, key_figure_ids, skip, limit, page_after
     )
+    rows = db.execute(statement).all()
+    return _fact_forecast_stat_records(db, rows)
+
+def fact_forecast_stat_statement(
+    client_ids: Optional[List[uuid.UUID]] = None,
+    sku_ids: Optional[List[uuid.UUID]] = None,
+    start_period: Optional[date] = None,
+    end_period: Optional[date] = None,
+    forecast_run_ids: Optional[List[uuid.UUID]] = None,
+    key_figure_ids: Optional[List[int]] = None,
+    skip: int = 0,
+    limit: int = 100,
+    page_after: Optional[Tuple] = None
+):
+    """SELECT of one page of get_fact_forecast_stat_data (runs on a Session or an AsyncSession)."""
+    query = select(*_fact_columns(models.FactForecastStat))
     if client_ids:
         query = query.filter(models.FactForecastStat.client_id.in_(client_ids))
     if sku_ids:
@@ -345,13 +846,18 @@ def get_fact_forecast_stat_data(
         query = query.filter(models.FactForecastStat.forecast_run_id.in_(forecast_run_ids))
     if key_figure_ids: # <--- AÑADIDO: Filtrar por key_figure_ids
         query = query.filter(models.FactForecastStat.key_figure_id.in_(key_figure_ids))
+    return _paginate(query, models.FactForecastStat, page_after, skip, limit)
 
-    return query.offset(skip).limit(limit).all()
+def _fact_forecast_stat_records(db: Session, rows) -> List[Dict[str, Any]]:
+    records = _fact_records(db, rows, FACT_DIMENSION_IDS)
+    _attach_related(db, records, "forecast_run", models.ForecastSmoothingParameter.forecast_run_id, schemas.ForecastSmoothingParameter)
+    return records
 
 def create_fact_forecast_stat_batch(db: Session, forecast_records: List[Dict[str, Any]]):
     """
     Inserta o actualiza un lote de registros de pronóstico estadístico.
     Utiliza ON CONFLICT DO UPDATE para manejar duplicados.
+    En la misma transacción recalcula el Final Forecast materializado de las series del lote.
     """
     if not forecast_records:
         return 0
@@ -381,8 +887,12 @@ def create_fact_forecast_stat_batch(db: Session, forecast_records: List[Dict[str
         extras.execute_values(
             cursor,
             query,
-            values_to_insert
+            values_to_insert,
+            page_size=1000
         )
+        # Un pronóstico nuevo puede mover el primer periodo de pronóstico: se recalcula la serie completa
+        refresh_final_forecast(db, {(r['client_id'], r['sku_id']): None for r in forecast_records})
+        bump_change_counters(db, _series_change_scopes((r['client_id'], r['sku_id']) for r in forecast_records))
         conn.commit()
     except Exception as e:
         conn.rollback()
@@ -417,14 +927,10 @@ def get_fact_adjustments_data(
     key_figure_ids: Optional[List[int]] = None,
     adjustment_type_ids: Optional[List[int]] = None,
     skip: int = 0,
-    limit: int = 100
-) -> List[models.FactAdjustments]:
-    query = db.query(models.FactAdjustments).options(
-        joinedload(models.FactAdjustments.client),
-        joinedload(models.FactAdjustments.sku),
-        joinedload(models.FactAdjustments.key_figure),
-        joinedload(models.FactAdjustments.adjustment_type)
-    )
+    limit: int = 100,
+    page_after: Optional[Tuple] = None
+) -> List[Dict[str, Any]]:
+    query = db.query(*_fact_columns(models.FactAdjustments))
     if client_ids:
         query = query.filter(models.FactAdjustments.client_id.in_(client_ids))
     if sku_ids:
@@ -437,7 +943,11 @@ def get_fact_adjustments_data(
         query = query.filter(models.FactAdjustments.key_figure_id.in_(key_figure_ids))
     if adjustment_type_ids:
         query = query.filter(models.FactAdjustments.adjustment_type_id.in_(adjustment_type_ids))
-    return query.offset(skip).limit(limit).all()
+    rows = _paginate(query, models.FactAdjustments, page_after, skip, limit).all()
+    return _fact_records(
+        db, rows,
+        {"client": "client_id", "sku": "sku_id", "key_figure": "key_figure_id", "adjustment_type": "adjustment_type_id"}
+    )
 
 # Nueva función para obtener ajustes para cálculos específicos
 def get_fact_adjustments_for_calculation(
@@ -454,11 +964,6 @@ def get_fact_adjustments_for_calculation(
         models.FactAdjustments.sku_id == sku_id,
         models.FactAdjustments.period >= start_period,
         models.FactAdjustments.period <= end_period
-    ).options(
-        joinedload(models.FactAdjustments.client),
-        joinedload(models.FactAdjustments.sku),
-        joinedload(models.FactAdjustments.key_figure),
-        joinedload(models.FactAdjustments.adjustment_type)
     )
     if key_figure_id:
         query = query.filter(models.FactAdjustments.key_figure_id == key_figure_id)
@@ -482,6 +987,9 @@ def update_fact_adjustment(
         for key, value in adjustment_update.model_dump(exclude_unset=True).items():
             setattr(db_adjustment, key, value)
         db_adjustment.timestamp = func.now()
+        db.flush()
+        refresh_final_forecast(db, {(client_id, sku_id): {period, db_adjustment.period}})
+        bump_change_counters(db, [series_change_scope(client_id, sku_id)])
         db.commit()
         db.refresh(db_adjustment)
     return db_adjustment
@@ -523,10 +1031,125 @@ def upsert_fact_adjustment(db: Session, adjustment: schemas.FactAdjustmentsCreat
             user_id=adjustment.user_id
         )
         db.add(db_adjustment)
+        db.flush()
+        refresh_final_forecast(db, {(adjustment.client_id, adjustment.sku_id): {adjustment.period}})
+        bump_change_counters(db, [series_change_scope(adjustment.client_id, adjustment.sku_id)])
         db.commit()
         db.refresh(db_adjustment)
         return db_adjustment
 
+def upsert_fact_adjustments_batch(
+    db: Session,
+    adjustments: List[schemas.FactAdjustmentsCreate],
+    default_user_id: Optional[uuid.UUID] = None
+) -> List[Dict[str, Any]]:
+    """
+    Inserta o actualiza muchas celdas de ajuste con un único INSERT ... ON CONFLICT DO UPDATE
+    (execute_values) y un solo commit.
+    - Valida en UNA consulta que existan los clientes, SKUs, key figures y tipos de ajuste referenciados;
+      las celdas con referencias inexistentes se informan con status 'error' y no se escriben.
+    - Si la misma celda (PK) aparece más de una vez, gana la última y las anteriores quedan 'skipped'.
+    - Actualiza el Final Forecast materializado de las celdas escritas en la misma transacción.
+    Devuelve un resultado por celda, en el orden del request:
+    {'index', 'client_id', 'sku_id', 'client_final_id', 'period', 'key_figure_id', 'status', 'detail'}.
+    """
+    results = [
+        {
+            "index": index, "client_id": adj.client_id, "sku_id": adj.sku_id, "client_final_id": adj.client_final_id,
+            "period": adj.period, "key_figure_id": adj.key_figure_id, "status": None, "detail": None
+        }
+        for index, adj in enumerate(adjustments)
+    ]
+    if not adjustments:
+        return results
+
+    conn = get_raw_connection(db)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT 'client', client_id::text FROM dim_clients WHERE client_id = ANY(%s::uuid[])
+            UNION ALL
+            SELECT 'sku', sku_id::text FROM dim_skus WHERE sku_id = ANY(%s::uuid[])
+            UNION ALL
+            SELECT 'key_figure', key_figure_id::text FROM dim_keyfigures WHERE key_figure_id = ANY(%s::int[])
+            UNION ALL
+            SELECT 'adjustment_type', adjustment_type_id::text FROM dim_adjustment_types WHERE adjustment_type_id = ANY(%s::int[])
+            """,
+            (
+                list({str(adj.client_id) for adj in adjustments}),
+                list({str(adj.sku_id) for adj in adjustments}),
+                list({adj.key_figure_id for adj in adjustments}),
+                list({adj.adjustment_type_id for adj in adjustments})
+            )
+        )
+        existing = set(cursor.fetchall())
+
+        # La última aparición de cada celda es la que se escribe
+        rows_by_cell = {}
+        for index, adj in enumerate(adjustments):
+            references = (
+                ("Client", "client", str(adj.client_id)),
+                ("SKU", "sku", str(adj.sku_id)),
+                ("Key Figure", "key_figure", str(adj.key_figure_id)),
+                ("Adjustment Type", "adjustment_type", str(adj.adjustment_type_id))
+            )
+            missing = [label for label, dimension, value in references if (dimension, value) not in existing]
+            if missing:
+                results[index]["status"] = "error"
+                results[index]["detail"] = f"{', '.join(missing)} not found."
+                continue
+            cell = (str(adj.client_id), str(adj.sku_id), str(adj.client_final_id), adj.period, adj.key_figure_id)
+            if cell in rows_by_cell:
+                results[rows_by_cell[cell]]["status"] = "skipped"
+                results[rows_by_cell[cell]]["detail"] = "Superseded by a later adjustment for the same cell."
+            rows_by_cell[cell] = index
+
+        if rows_by_cell:
+            values_to_upsert = [
+                (
+                    adjustments[index].client_id, adjustments[index].sku_id, adjustments[index].client_final_id,
+                    adjustments[index].period, adjustments[index].key_figure_id, adjustments[index].adjustment_type_id,
+                    adjustments[index].value, adjustments[index].comment, adjustments[index].user_id or default_user_id
+                )
+                for index in rows_by_cell.values()
+            ]
+            written = extras.execute_values(
+                cursor,
+                """
+                INSERT INTO fact_adjustments (client_id, sku_id, client_final_id, period, key_figure_id, adjustment_type_id, value, comment, user_id)
+                VALUES %s
+                ON CONFLICT (client_id, sku_id, client_final_id, period, key_figure_id) DO UPDATE
+                SET
+                    adjustment_type_id = EXCLUDED.adjustment_type_id,
+                    value = EXCLUDED.value,
+                    comment = EXCLUDED.comment,
+                    user_id = EXCLUDED.user_id,
+                    timestamp = CURRENT_TIMESTAMP
+                RETURNING client_id::text, sku_id::text, client_final_id::text, period, key_figure_id, (xmax = 0) AS inserted
+                """,
+                values_to_upsert,
+                page_size=1000,
+                fetch=True
+            )
+            for client_id, sku_id, client_final_id, period, key_figure_id, inserted in written:
+                index = rows_by_cell[(client_id, sku_id, client_final_id, period, key_figure_id)]
+                results[index]["status"] = "inserted" if inserted else "updated"
+
+            affected_periods = defaultdict(set)
+            for index in rows_by_cell.values():
+                affected_periods[(adjustments[index].client_id, adjustments[index].sku_id)].add(adjustments[index].period)
+            refresh_final_forecast(db, affected_periods)
+            bump_change_counters(db, _series_change_scopes(affected_periods))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return results
+
 # --- Operaciones CRUD para FactForecastVersioned (Básicas GET y CREATE) ---
 def get_fact_forecast_versioned(
     db: Session,
@@ -552,14 +1175,10 @@ def get_fact_forecast_versioned_data(
     end_period: Optional[date] = None,
     key_figure_ids: Optional[List[int]] = None,
     skip: int = 0,
-    limit: int = 100
-) -> List[models.FactForecastVersioned]:
-    query = db.query(models.FactForecastVersioned).options(
-        joinedload(models.FactForecastVersioned.version),
-        joinedload(models.FactForecastVersioned.client),
-        joinedload(models.FactForecastVersioned.sku),
-        joinedload(models.FactForecastVersioned.key_figure)
-    )
+    limit: int = 100,
+    page_after: Optional[Tuple] = None
+) -> List[Dict[str, Any]]:
+    query = db.query(*_fact_columns(models.FactForecastVersioned))
     if version_ids:
         query = query.filter(models.FactForecastVersioned.version_id.in_(version_ids))
     if client_ids:
@@ -572,7 +1191,35 @@ def get_fact_forecast_versioned_data(
         query = query.filter(models.FactForecastVersioned.period <= end_period)
     if key_figure_ids:
         query = query.filter(models.FactForecastVersioned.key_figure_id.in_(key_figure_ids))
-    return query.offset(skip).limit(limit).all()
+    rows = _paginate(query, models.FactForecastVersioned, page_after, skip, limit).all()
+    records = _fact_records(db, rows, FACT_DIMENSION_IDS)
+    _attach_related(db, records, "version", models.ForecastVersion.version_id, schemas.ForecastVersion)
+    return records
+
+# --- Métricas de precisión (las calcula app/accuracy.py) ---
+def get_forecast_accuracy(
+    db: Session,
+    level: str = "total",
+    forecast_source: Optional[str] = None,
+    key_figure_ids: Optional[List[int]] = None,
+    lags: Optional[List[int]] = None,
+    client_ids: Optional[List[uuid.UUID]] = None,
+    sku_ids: Optional[List[uuid.UUID]] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[models.ForecastAccuracy]:
+    query = db.query(models.ForecastAccuracy).filter(models.ForecastAccuracy.level == level)
+    if forecast_source:
+        query = query.filter(models.ForecastAccuracy.forecast_source == forecast_source)
+    if key_figure_ids:
+        query = query.filter(models.ForecastAccuracy.key_figure_id.in_(key_figure_ids))
+    if lags:
+        query = query.filter(models.ForecastAccuracy.lag.in_(lags))
+    if client_ids:
+        query = query.filter(models.ForecastAccuracy.client_id.in_(client_ids))
+    if sku_ids:
+        query = query.filter(models.ForecastAccuracy.sku_id.in_(sku_ids))
+    return query.order_by(models.ForecastAccuracy.accuracy_id).offset(skip).limit(limit).all()
 
 # --- Operaciones CRUD para ManualInputComments (Básicas GET y CREATE) ---
 def get_manual_input_comment(
@@ -626,6 +1273,338 @@ def create_manual_input_comment(db: Session, comment: schemas.ManualInputComment
         user_id=comment.user_id
     )
     db.add(db_comment)
+    bump_change_counters(db, [series_change_scope(comment.client_id, comment.sku_id)])
     db.commit()
     db.refresh(db_comment)
-    return db_comment
\ No newline at end of file
+    return db_comment
+
+# --- Lectura de la grilla (AG-Grid) ---
+GRID_FACTS_QUERY = text(
+    """
+    SELECT 'history' AS fact, h.key_figure_id, h.source, NULL::int AS adjustment_type_id, h.period, h.value
+    FROM fact_history h
+    WHERE h.client_id = :client_id AND h.sku_id = :sku_id
+      AND h.period BETWEEN :start_period AND :end_period
+      AND h.key_figure_id = ANY(:history_kf_ids)
+    UNION ALL
+    SELECT 'stat', s.key_figure_id, NULL, NULL, s.period, s.value
+    FROM fact_forecast_stat s
+    WHERE s.client_id = :client_id AND s.sku_id = :sku_id
+      AND s.period BETWEEN :start_period AND :end_period
+      AND s.key_figure_id = ANY(:stat_kf_ids)
+    UNION ALL
+    SELECT 'adjustment', a.key_figure_id, NULL, a.adjustment_type_id, a.period, a.value
+    FROM fact_adjustments a
+    WHERE a.client_id = :client_id AND a.sku_id = :sku_id
+      AND a.period BETWEEN :start_period AND :end_period
+    UNION ALL
+    SELECT 'final', NULL, NULL, NULL, f.period, f.value
+    FROM fact_final_forecast f
+    WHERE f.client_id = :client_id AND f.sku_id = :sku_id
+      AND f.period BETWEEN :start_period AND :end_period
+    UNION ALL
+    SELECT 'final_series', NULL, NULL, NULL, NULL, NULL
+    FROM final_forecast_series fs
+    WHERE fs.client_id = :client_id AND fs.sku_id = :sku_id
+    ORDER BY fact, period
+    """
+)
+
+GRID_DIMENSIONS_QUERY = text(
+    """
+    SELECT kf.key_figure_id, kf.name, kf."order",
+           (SELECT c.client_name FROM dim_clients c WHERE c.client_id = :client_id) AS client_name,
+           (SELECT s.sku_name FROM dim_skus s WHERE s.sku_id = :sku_id) AS sku_name
+    FROM dim_keyfigures kf
+    """
+)
+
+def grid_facts_params(client_id: uuid.UUID, sku_id: uuid.UUID, start_period: date, end_period: date) -> Dict[str, Any]:
+    return {
+        "client_id": client_id,
+        "sku_id": sku_id,
+        "start_period": start_period,
+        "end_period": end_period,
+        "history_kf_ids": [
+            schemas.KEY_FIGURE_SALES_ID, schemas.KEY_FIGURE_SMOOTHED_SALES_ID, schemas.KEY_FIGURE_ORDERS_ID,
+            schemas.KEY_FIGURE_SMOOTHED_ORDERS_ID, schemas.KEY_FIGURE_MANUAL_INPUT_ID
+        ],
+        "stat_kf_ids": [schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID]
+    }
+
+def get_grid_facts(
+    db: Session,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> List[Tuple]:
+    """
+    Obtiene en UNA sola consulta (UNION ALL, GRID_FACTS_QUERY) todos los hechos que necesita la
+    grilla de un cliente/SKU: historia (key figures 1-5), pronóstico estadístico (6 y 7), ajustes y
+    el Final Forecast materializado.
+    Cada fila tiene (fact, key_figure_id, source, adjustment_type_id, period, value),
+    con fact = 'history' | 'stat' | 'adjustment' | 'final' | 'final_series'. La fila 'final_series'
+    sólo aparece si la serie ya está materializada. Los ajustes vienen ordenados por period.
+    """
+    return db.execute(GRID_FACTS_QUERY, grid_facts_params(client_id, sku_id, start_period, end_period)).all()
+
+def get_grid_dimensions(db: Session, client_id: uuid.UUID, sku_id: uuid.UUID) -> List[Tuple]:
+    """
+    Obtiene las key figures (id, nombre, orden) junto con el nombre del cliente y del SKU
+    en una sola consulta. client_name / sku_name son None si no existen.
+    """
+    return db.execute(GRID_DIMENSIONS_QUERY, {"client_id": client_id, "sku_id": sku_id}).all()
+
+
+# --- Final Forecast materializado (fact_final_forecast / final_forecast_series) ---
+# Lo mantienen las escrituras (ajustes, historia, pronóstico estadístico, importaciones, versiones):
+# las lecturas nunca escriben. Una serie que todavía no está materializada (datos cargados antes de la
+# materialización o por fuera del backend) se calcula en memoria en cada lectura hasta su próxima escritura.
+def _compute_final_forecast_cells(
+    cursor,
+    requested: Dict[Tuple[str, str], Optional[Set[date]]]
+) -> List[Tuple[str, str, date, Optional[float]]]:
+    """
+    Lee historia, pronóstico estadístico y ajustes de todas las series de `requested`
+    ({(client_id, sku_id) como texto: periodos, o None para toda la serie}) en una sola consulta y
+    aplica final_forecast.compute_final_forecast_values. Devuelve (client_id, sku_id, period, value)
+    por periodo calculado, también los que quedan sin valor (None).
+    """
+    series_params = {"client_ids": [key[0] for key in requested], "sku_ids": [key[1] for key in requested]}
+    cursor.execute(
+        """
+        WITH series AS (SELECT * FROM unnest(%(client_ids)s::uuid[], %(sku_ids)s::uuid[]) AS s(client_id, sku_id))
+        SELECT 'history' AS fact, h.client_id::text, h.sku_id::text, h.key_figure_id, NULL::int AS adjustment_type_id, h.period, h.value
+        FROM fact_history h JOIN series USING (client_id, sku_id)
+        WHERE h.source = 'sales' AND h.key_figure_id IN (%(sales_kf)s, %(manual_input_kf)s)
+        UNION ALL
+        SELECT 'stat', s.client_id::text, s.sku_id::text, s.key_figure_id, NULL, s.period, s.value
+        FROM fact_forecast_stat s JOIN series USING (client_id, sku_id)
+        WHERE s.key_figure_id IN (%(stat_sales_kf)s, %(stat_orders_kf)s)
+        UNION ALL
+        SELECT 'adjustment', a.client_id::text, a.sku_id::text, a.key_figure_id, a.adjustment_type_id, a.period, a.value
+        FROM fact_adjustments a JOIN series USING (client_id, sku_id)
+        -- en un mismo periodo el override de Final Forecast (8) tiene prioridad sobre el de Manual input (5)
+        ORDER BY fact, period, key_figure_id DESC
+        """,
+        {
+            **series_params,
+            "sales_kf": schemas.KEY_FIGURE_SALES_ID,
+            "manual_input_kf": schemas.KEY_FIGURE_MANUAL_INPUT_ID,
+            "stat_sales_kf": schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID,
+            "stat_orders_kf": schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID
+        }
+    )
+    rows_by_series = defaultdict(list)
+    for row in cursor.fetchall():
+        rows_by_series[(row.client_id, row.sku_id)].append(row)
+
+    cells = []
+    for (client_id, sku_id), periods in requested.items():
+        rows = rows_by_series.get((client_id, sku_id), [])
+        if periods is None:
+            if not rows:
+                continue
+            first_period, last_period = min(r.period for r in rows), max(r.period for r in rows)
+            periods = [
+                date(month // 12, month % 12 + 1, 1)
+                for month in range(first_period.year * 12 + first_period.month - 1, last_period.year * 12 + last_period.month)
+            ]
+        history_map = {
+            (r.period, r.key_figure_id): r.value for r in rows if r.fact == 'history' and r.value is not None
+        }
+        values = compute_final_forecast_values(
+            sorted(periods),
+            [r for r in rows if r.fact == 'stat'],
+            [r for r in rows if r.fact == 'adjustment'],
+            history_map
+        )
+        cells.extend((client_id, sku_id, period, value) for period, value in values)
+    return cells
+
+def refresh_final_forecast_conn(
+    conn,
+    series_periods: Dict[Tuple[uuid.UUID, uuid.UUID], Optional[Set[date]]]
+) -> int:
+    """
+    Recalcula el Final Forecast materializado de las celdas afectadas por una escritura, sobre una
+    conexión psycopg2 (la usan también las importaciones de historia).
+    - series_periods: {(client_id, sku_id): periodos a recalcular, o None para toda la serie}.
+    Las series que todavía no están en final_forecast_series se calculan completas y quedan
+    materializadas. No hace commit: corre dentro de la transacción de la escritura que lo llama.
+    Devuelve la cantidad de celdas con valor escritas.
+    """
+    requested = {(str(client_id), str(sku_id)): periods for (client_id, sku_id), periods in series_periods.items()}
+    if not requested:
+        return 0
+
+    with conn.cursor(cursor_factory=extras.NamedTupleCursor) as cursor:
+        cursor.execute(
+            """
+            SELECT client_id::text, sku_id::text FROM final_forecast_series
+            WHERE (client_id, sku_id) IN (SELECT * FROM unnest(%s::uuid[], %s::uuid[]))
+            """,
+            ([key[0] for key in requested], [key[1] for key in requested])
+        )
+        materialized = {(row.client_id, row.sku_id) for row in cursor.fetchall()}
+        requested = {key: periods if key in materialized else None for key, periods in requested.items()}
+
+        cells = [cell for cell in _compute_final_forecast_cells(cursor, requested) if cell[3] is not None]
+
+        # Borrar las celdas recalculadas (las que quedan sin valor no se guardan) y escribir las nuevas
+        whole_series = [key for key, periods in requested.items() if periods is None]
+        if whole_series:
+            cursor.execute(
+                """
+                DELETE FROM fact_final_forecast
+                WHERE (client_id, sku_id) IN (SELECT * FROM unnest(%s::uuid[], %s::uuid[]))
+                """,
+                ([key[0] for key in whole_series], [key[1] for key in whole_series])
+            )
+        partial_cells = [(key, period) for key, periods in requested.items() if periods is not None for period in periods]
+        if partial_cells:
+            cursor.execute(
+                """
+                DELETE FROM fact_final_forecast
+                WHERE (client_id, sku_id, period) IN (SELECT * FROM unnest(%s::uuid[], %s::uuid[], %s::date[]))
+                """,
+                ([key[0] for key, _ in partial_cells], [key[1] for key, _ in partial_cells], [period for _, period in partial_cells])
+            )
+        if cells:
+            extras.execute_values(
+                cursor,
+                """
+                INSERT INTO fact_final_forecast (client_id, sku_id, period, value) VALUES %s
+                ON CONFLICT (client_id, sku_id, period) DO UPDATE
+                SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP
+                """,
+                cells,
+                template="(%s::uuid, %s::uuid, %s, %s)",
+                page_size=1000
+            )
+        extras.execute_values(
+            cursor,
+            """
+            INSERT INTO final_forecast_series (client_id, sku_id) VALUES %s
+            ON CONFLICT (client_id, sku_id) DO UPDATE SET refreshed_at = CURRENT_TIMESTAMP
+            """,
+            list(requested),
+            template="(%s::uuid, %s::uuid)",
+            page_size=1000
+        )
+    return len(cells)
+
+def refresh_final_forecast(
+    db: Session,
+    series_periods: Dict[Tuple[uuid.UUID, uuid.UUID], Optional[Set[date]]]
+) -> int:
+    """refresh_final_forecast_conn on the psycopg2 connection of the session (inside its transaction)."""
+    return refresh_final_forecast_conn(get_raw_connection(db), series_periods)
+
+def materialize_pending_final_forecast(
+    db: Session,
+    chunk_size: int = 500,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """
+    Materializa el Final Forecast de todas las series con historia o pronóstico estadístico que todavía
+    no están en final_forecast_series (datos cargados por fuera del backend o antes de la
+    materialización), de a `chunk_size` series con un commit por bloque, llamando a
+    progress_callback(series hechas, total). Devuelve la cantidad de series materializadas.
+    """
+    with get_raw_connection(db).cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT s.client_id, s.sku_id
+            FROM (
+                SELECT DISTINCT client_id, sku_id FROM fact_history
+                UNION
+                SELECT DISTINCT client_id, sku_id FROM fact_forecast_stat
+            ) s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM final_forecast_series fs WHERE fs.client_id = s.client_id AND fs.sku_id = s.sku_id
+            )
+            ORDER BY s.client_id, s.sku_id
+            """
+        )
+        pending = cursor.fetchall()
+
+    for chunk_start in range(0, len(pending), chunk_size):
+        chunk = pending[chunk_start:chunk_start + chunk_size]
+        refresh_final_forecast(db, {(client_id, sku_id): None for client_id, sku_id in chunk})
+        db.commit()  # los valores no cambian, sólo se guardan: no hace falta subir los contadores
+        if progress_callback is not None:
+            progress_callback(chunk_start + len(chunk), len(pending))
+    return len(pending)
+
+def get_final_forecast_data(
+    db: Session,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> Dict[date, float]:
+    """
+    Lee el Final Forecast materializado de un cliente/SKU en el rango ({period: value}; los periodos
+    sin valor no aparecen). Si la serie todavía no está materializada lo calcula en memoria, sin
+    escribir: la materializa la próxima escritura de la serie.
+    """
+    conn = get_raw_connection(db)
+    with conn.cursor(cursor_factory=extras.NamedTupleCursor) as cursor:
+        cursor.execute(
+            """
+            SELECT s.client_id IS NOT NULL AS materialized, f.period, f.value
+            FROM (SELECT %(client_id)s::uuid AS client_id, %(sku_id)s::uuid AS sku_id) k
+            LEFT JOIN final_forecast_series s ON s.client_id = k.client_id AND s.sku_id = k.sku_id
+            LEFT JOIN fact_final_forecast f ON s.client_id IS NOT NULL
+                AND f.client_id = k.client_id AND f.sku_id = k.sku_id
+                AND f.period BETWEEN %(start_period)s AND %(end_period)s
+            """,
+            {"client_id": client_id, "sku_id": sku_id, "start_period": start_period, "end_period": end_period}
+        )
+        rows = cursor.fetchall()
+        if rows[0].materialized:
+            return {row.period: row.value for row in rows if row.period is not None}
+
+        cells = _compute_final_forecast_cells(cursor, {(str(client_id), str(sku_id)): None})
+    return {
+        period: value for _, _, period, value in cells
+        if value is not None and start_period <= period <= end_period
+    }
+
+
+# --- Lecturas asíncronas (AsyncSession / asyncpg) ---
+# Las usan los endpoints de lectura `async def` (grilla, historia, pronóstico estadístico), que no
+# ocupan un hilo del threadpool de Starlette mientras esperan a la base. Ejecutan las mismas
+# sentencias que las versiones sincrónicas de arriba; las dimensiones se resuelven con run_sync, que
+# corre el código sincrónico (dimension_cache) sobre la misma conexión asyncpg sin bloquear.
+
+async def get_change_counters_async(db: AsyncSession, scopes: Iterable[str]) -> Dict[str, Tuple[int, datetime]]:
+    """get_change_counters on an AsyncSession."""
+    rows = (await db.execute(CHANGE_COUNTERS_QUERY, {"scopes": list(scopes)})).all()
+    return {scope: (version, changed_at) for scope, version, changed_at in rows}
+
+async def get_fact_history_data_async(db: AsyncSession, **filters) -> List[Dict[str, Any]]:
+    """get_fact_history_data on an AsyncSession (same keyword filters)."""
+    rows = (await db.execute(fact_history_statement(**filters))).all()
+    return await db.run_sync(_fact_records, rows, FACT_DIMENSION_IDS)
+
+async def get_fact_forecast_stat_data_async(db: AsyncSession, **filters) -> List[Dict[str, Any]]:
+    """get_fact_forecast_stat_data on an AsyncSession (same keyword filters)."""
+    rows = (await db.execute(fact_forecast_stat_statement(**filters))).all()
+    return await db.run_sync(_fact_forecast_stat_records, rows)
+
+async def get_grid_facts_async(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> List[Tuple]:
+    """get_grid_facts on an AsyncSession."""
+    return (await db.execute(GRID_FACTS_QUERY, grid_facts_params(client_id, sku_id, start_period, end_period))).all()
+
+async def get_grid_dimensions_async(db: AsyncSession, client_id: uuid.UUID, sku_id: uuid.UUID) -> List[Tuple]:
+    """get_grid_dimensions on an AsyncSession."""
+    return (await db.execute(GRID_DIMENSIONS_QUERY, {"client_id": client_id, "sku_id": sku_id})).all()
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from psycopg2.extensions import register_adapter, AsIs
@@ -14,17 +16,31 @@ add_uuid_adapter()
 
 # Importa la configuración desde config.py
 from .config import settings
+from .pool_metrics import TimedQueuePool, TimedAsyncAdaptedQueuePool
 
 # URL de la base de datos (se obtiene de las variables de entorno)
 DATABASE_URL = settings.DATABASE_URL
 
-# Crear el motor de SQLAlchemy
-# pool_pre_ping=True ayuda a manejar conexiones inactivas
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Tamaño, overflow, timeout, reciclado y pre-ping del pool (config.Settings, DB_POOL_*)
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+# Crear el motor de SQLAlchemy (pool instrumentado: ver pool_metrics)
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
 
 # Crear una SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Motor asíncrono (asyncpg) sobre la misma base, para los endpoints de lectura `async def`
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=TimedAsyncAdaptedQueuePool, **POOL_OPTIONS)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base para los modelos declarativos de SQLAlchemy
 Base = declarative_base()
 
@@ -34,4 +50,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Sesión asíncrona para los endpoints `async def` (ver crud: lecturas asíncronas)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,70 @@
+# backend/app/dimension_cache.py
+# Caché en memoria (por proceso) de las tablas de dimensiones: clientes, SKUs, figuras clave y tipos
+# de ajuste. Los listados de hechos leen sólo las columnas del hecho y resuelven client / sku /
+# key_figure / adjustment_type desde acá, en vez de un joinedload por fila.
+# Las entradas se cargan a demanda (una consulta IN por los ids que faltan), se invalidan cuando este
+# proceso escribe la dimensión (crud.create_*, importación de historia) y vencen a los
+# DIMENSION_CACHE_TTL_SECONDS, para ver también lo que escriben otros procesos.
+
+from typing import Dict, Any, Iterable
+import threading
+import time
+import logging
+
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Dimensión -> (modelo, columna id, esquema de respuesta)
+DIMENSIONS = {
+    "client": (models.DimClient, models.DimClient.client_id, schemas.DimClient),
+    "sku": (models.DimSku, models.DimSku.sku_id, schemas.DimSku),
+    "key_figure": (models.DimKeyFigure, models.DimKeyFigure.key_figure_id, schemas.DimKeyFigure),
+    "adjustment_type": (models.DimAdjustmentType, models.DimAdjustmentType.adjustment_type_id, schemas.DimAdjustmentType),
+}
+
+_entries: Dict[str, Dict[Any, Any]] = {dimension: {} for dimension in DIMENSIONS}
+_loaded_at: Dict[str, float] = {dimension: 0.0 for dimension in DIMENSIONS}
+_generation = 0  # sube con cada invalidación: una lectura que se cruza con una invalidación no se guarda
+_lock = threading.Lock()
+
+
+def get_many(db: Session, dimension: str, ids: Iterable[Any]) -> Dict[Any, Any]:
+    """
+    {id: schema object} for the requested ids of `dimension`. Ids that are not cached are read with
+    one query; ids that do not exist in the table are left out of the result.
+    """
+    model, id_column, schema = DIMENSIONS[dimension]
+    ids = set(ids)
+    with _lock:
+        if time.monotonic() - _loaded_at[dimension] > settings.DIMENSION_CACHE_TTL_SECONDS:
+            _entries[dimension] = {}
+            _loaded_at[dimension] = time.monotonic()
+        entries = _entries[dimension]
+        found = {id_: entries[id_] for id_ in ids if id_ in entries}
+        generation = _generation
+
+    missing = ids - found.keys()
+    if missing:
+        loaded = {
+            getattr(row, id_column.key): schema.model_validate(row)
+            for row in db.query(model).filter(id_column.in_(missing))
+        }
+        with _lock:
+            if generation == _generation:
+                _entries[dimension].update(loaded)
+        found.update(loaded)
+    return found
+
+def invalidate(*dimensions: str):
+    """Drops the cached entries of `dimensions` (every dimension when none is given)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        for dimension in dimensions or DIMENSIONS:
+            _entries[dimension] = {}
+            _loaded_at[dimension] = time.monotonic()
+    logger.debug(f"Dimension cache invalidated: {', '.join(dimensions or DIMENSIONS)}.")
@@ -0,0 +1,244 @@
+# backend/app/fact_exporter.py
+# Exportación masiva de los cubos de hechos (historia, pronóstico estadístico, versionado y Final
+# Forecast) a Arrow IPC o Parquet, para las cargas nocturnas de BI.
+# Las filas se leen con un cursor del lado del servidor (named cursor) de a `batch_size` y cada bloque
+# se escribe como un RecordBatch: la memoria no depende de la cantidad de filas exportadas.
+# Clientes, SKUs y figuras clave salen dictionary-encoded: el diccionario se arma una vez con las
+# tablas de dimensiones y la consulta devuelve sólo el índice de cada fila.
+
+from typing import Dict, Any, Iterator, Optional, Tuple
+import io
+import uuid
+import logging
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from . import schemas
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    # formato -> (media type, extensión)
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# Cubo -> tabla, columnas propias (nombre, expresión SQL, tipo Arrow) y filtros que acepta
+EXPORT_DATASETS = {
+    "history": {
+        "table": "fact_history",
+        "columns": [
+            ("client_final_id", "f.client_final_id::text", pa.string()),
+            ("source", "f.source", pa.string()),
+        ],
+        "filters": {"sources"},
+    },
+    "forecast_stat": {
+        "table": "fact_forecast_stat",
+        "columns": [
+            ("client_final_id", "f.client_final_id::text", pa.string()),
+            ("model_used", "f.model_used", pa.string()),
+            ("forecast_run_id", "f.forecast_run_id::text", pa.string()),
+        ],
+        "filters": {"forecast_run_ids"},
+    },
+    "forecast_versioned": {
+        "table": "fact_forecast_versioned",
+        "columns": [
+            ("version_id", "f.version_id::text", pa.string()),
+            ("client_final_id", "f.client_final_id::text", pa.string()),
+        ],
+        "filters": {"version_ids"},
+    },
+    "final_forecast": {
+        "table": "fact_final_forecast",
+        "key_figure_id": schemas.KEY_FIGURE_FINAL_FORECAST_ID,  # la tabla no tiene key_figure_id
+        "columns": [],
+        "filters": set(),
+    },
+}
+
+COMMON_FILTERS = {"client_ids", "sku_ids", "start_period", "end_period", "key_figure_ids"}
+
+
+def _load_dictionaries(cursor) -> Dict[str, Tuple[pa.Array, pa.Array]]:
+    """
+    (ids, names) of every dimension, in the same order as the indices computed by the export
+    query (ORDER BY the id).
+    """
+    dictionaries = {}
+    for dimension, query in (
+        ("client", "SELECT client_id::text, client_name FROM dim_clients ORDER BY client_id"),
+        ("sku", "SELECT sku_id::text, sku_name FROM dim_skus ORDER BY sku_id"),
+        ("key_figure", "SELECT key_figure_id, name FROM dim_keyfigures ORDER BY key_figure_id"),
+    ):
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        ids = pa.array([row[0] for row in rows], pa.int32() if dimension == "key_figure" else pa.string())
+        names = pa.array([row[1] for row in rows], pa.string())
+        dictionaries[dimension] = (ids, names)
+    return dictionaries
+
+
+def build_export_query(dataset: str, filters: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    SELECT of the dataset with the dimension indices (0-based, ordered by id) and the filters.
+    Raises ValueError for an unknown dataset or a filter the dataset does not have.
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}'. Valid datasets: {', '.join(EXPORT_DATASETS)}.")
+    spec = EXPORT_DATASETS[dataset]
+    unsupported = {name for name, value in filters.items() if value} - COMMON_FILTERS - spec["filters"]
+    if unsupported:
+        raise ValueError(f"Filter(s) {', '.join(sorted(unsupported))} not supported for dataset '{dataset}'.")
+
+    key_figure_sql = str(spec["key_figure_id"]) if "key_figure_id" in spec else "f.key_figure_id"
+    conditions = []
+    params = {}
+    for name, sql in (
+        ("client_ids", "f.client_id = ANY(%(client_ids)s::uuid[])"),
+        ("sku_ids", "f.sku_id = ANY(%(sku_ids)s::uuid[])"),
+        ("start_period", "f.period >= %(start_period)s"),
+        ("end_period", "f.period <= %(end_period)s"),
+        ("key_figure_ids", f"{key_figure_sql} = ANY(%(key_figure_ids)s::int[])"),
+        ("sources", "f.source = ANY(%(sources)s::text[])"),
+        ("forecast_run_ids", "f.forecast_run_id = ANY(%(forecast_run_ids)s::uuid[])"),
+        ("version_ids", "f.version_id = ANY(%(version_ids)s::uuid[])"),
+    ):
+        value = filters.get(name)
+        if value:
+            conditions.append(sql)
+            params[name] = [str(v) for v in value] if isinstance(value, (list, tuple, set)) else value
+
+    query = f"""
+        SELECT c.idx, s.idx, k.idx, f.period, f.value{''.join(f', {sql}' for _, sql, _ in spec['columns'])}
+        FROM {spec['table']} f
+        JOIN (SELECT client_id, (row_number() OVER (ORDER BY client_id) - 1)::int AS idx FROM dim_clients) c
+            ON c.client_id = f.client_id
+        JOIN (SELECT sku_id, (row_number() OVER (ORDER BY sku_id) - 1)::int AS idx FROM dim_skus) s
+            ON s.sku_id = f.sku_id
+        JOIN (SELECT key_figure_id, (row_number() OVER (ORDER BY key_figure_id) - 1)::int AS idx FROM dim_keyfigures) k
+            ON k.key_figure_id = {key_figure_sql}
+        {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+    """
+    return query, params
+
+
+def export_schema(dataset: str) -> pa.Schema:
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("client_id", dictionary), ("client_name", dictionary),
+            ("sku_id", dictionary), ("sku_name", dictionary),
+            ("key_figure_id", pa.dictionary(pa.int32(), pa.int32())), ("key_figure_name", dictionary),
+            ("period", pa.date32()), ("value", pa.float64()),
+        ]
+        + [(name, arrow_type) for name, _, arrow_type in EXPORT_DATASETS[dataset]["columns"]]
+    )
+
+
+def iter_export_batches(
+    conn,
+    dataset: str,
+    filters: Optional[Dict[str, Any]] = None,
+    batch_size: Optional[int] = None
+) -> Iterator[pa.RecordBatch]:
+    """
+    Yields the rows of `dataset` as RecordBatches of at most `batch_size` rows, read with a
+    server-side cursor on `conn` (psycopg2). Runs in its own REPEATABLE READ READ ONLY transaction
+    so the dictionaries and the rows come from the same snapshot: `conn` must not have pending work
+    (it is rolled back before and after the export).
+    """
+    filters = filters or {}
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    query, params = build_export_query(dataset, filters)
+    schema = export_schema(dataset)
+
+    conn.rollback()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            dictionaries = _load_dictionaries(cursor)
+
+        rows_exported = 0
+        with conn.cursor(name=f"export_{dataset}_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                columns = list(zip(*rows))
+                client_idx = pa.array(columns[0], pa.int32())
+                sku_idx = pa.array(columns[1], pa.int32())
+                key_figure_idx = pa.array(columns[2], pa.int32())
+                arrays = [
+                    pa.DictionaryArray.from_arrays(client_idx, dictionaries["client"][0]),
+                    pa.DictionaryArray.from_arrays(client_idx, dictionaries["client"][1]),
+                    pa.DictionaryArray.from_arrays(sku_idx, dictionaries["sku"][0]),
+                    pa.DictionaryArray.from_arrays(sku_idx, dictionaries["sku"][1]),
+                    pa.DictionaryArray.from_arrays(key_figure_idx, dictionaries["key_figure"][0]),
+                    pa.DictionaryArray.from_arrays(key_figure_idx, dictionaries["key_figure"][1]),
+                    pa.array(columns[3], pa.date32()),
+                    pa.array(columns[4], pa.float64()),
+                ]
+                arrays += [
+                    pa.array(columns[5 + i], arrow_type)
+                    for i, (_, _, arrow_type) in enumerate(EXPORT_DATASETS[dataset]["columns"])
+                ]
+                rows_exported += len(rows)
+                yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+        logger.info(f"Exported {rows_exported} rows of {dataset}.")
+    finally:
+        conn.rollback()
+
+
+def write_export(
+    conn,
+    dataset: str,
+    sink,
+    export_format: str = "parquet",
+    filters: Optional[Dict[str, Any]] = None,
+    batch_size: Optional[int] = None
+) -> Iterator[int]:
+    """
+    Writes the export to `sink` (path or binary file object) as Parquet (one row group per batch)
+    or as an Arrow IPC stream. Yields the rows written after each batch, so the caller can drain
+    the sink or report progress.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format '{export_format}'. Valid formats: {', '.join(EXPORT_FORMATS)}.")
+    schema = export_schema(dataset)
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+    with writer:
+        for batch in iter_export_batches(conn, dataset, filters, batch_size):
+            if export_format == "parquet":
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            yield batch.num_rows
+
+
+def iter_export_bytes(
+    conn,
+    dataset: str,
+    export_format: str = "parquet",
+    filters: Optional[Dict[str, Any]] = None,
+    batch_size: Optional[int] = None
+) -> Iterator[bytes]:
+    """Same as write_export but yields the encoded bytes as they are produced (for a StreamingResponse)."""
+    buffer = io.BytesIO()
+    writer = write_export(conn, dataset, buffer, export_format, filters, batch_size)
+    while True:
+        finished = next(writer, None) is None
+        if buffer.tell():
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if finished:
+            break
@@ -0,0 +1,99 @@
+# backend/app/final_forecast.py
+# Reglas del Final Forecast (key figure 8) sobre datos ya leídos, sin acceso a la base.
+# Las usan crud (materialización en fact_final_forecast) y forecast_engine.
+
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date
+
+import numpy as np
+
+from . import schemas
+
+# Categorías de ajuste que intervienen en el Final Forecast
+_GENERAL_ADJUSTMENT_KF_IDS = (schemas.KEY_FIGURE_FINAL_FORECAST_ID, schemas.KEY_FIGURE_MANUAL_INPUT_ID)
+
+
+def _scatter_first(positions: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """Places values[i] at positions[i] in a NaN array of `size`; the first record wins on repeated positions."""
+    out = np.full(size, np.nan)
+    if len(positions):
+        unique_positions, first_index = np.unique(positions, return_index=True)
+        out[unique_positions] = values[first_index]
+    return out
+
+
+def compute_final_forecast_values(
+    all_periods_in_range: List[date],
+    all_stat_forecasts: List[Any],
+    manual_adjustments: List[Any],
+    history_map: Dict[Tuple[date, int], float]
+) -> List[Tuple[date, Optional[float]]]:
+    """
+    Applies the Final Forecast rules to data that was already fetched, as array operations
+    over the whole period range.
+    - all_stat_forecasts: records with period, value and key_figure_id (Stat Sales / Stat Orders).
+    - manual_adjustments: records with period, value, key_figure_id and adjustment_type_id.
+    - history_map: {(period, key_figure_id): value} of the 'sales' history.
+    Base value: before the first statistical forecast period, Manual input (or Sales when there
+    is no Manual input); from then on, Stat Sales + Stat Orders (or whichever exists).
+    Periods without a base value stay None. Over the base, in order of precedence:
+    1. Override of Final Forecast / Manual input.
+    2. Only in forecast periods: override of Stat Sales, else override of Stat Orders.
+    3. Otherwise, the quantity adjustment is added and then the percentage adjustment applied.
+    When a period has more than one adjustment of the same kind, the first one received is used.
+    Returns (period, value) for every period of all_periods_in_range.
+    """
+    n_periods = len(all_periods_in_range)
+    period_position = {period: i for i, period in enumerate(all_periods_in_range)}
+
+    def scatter(records: List[Any]) -> np.ndarray:
+        records = [r for r in records if r.period in period_position and r.value is not None]
+        return _scatter_first(
+            np.array([period_position[r.period] for r in records], dtype=np.int64),
+            np.array([r.value for r in records], dtype=np.float64),
+            n_periods
+        )
+
+    # Base de los periodos de pronóstico: Stat Sales + Stat Orders
+    stat_sales = scatter([f for f in all_stat_forecasts if f.key_figure_id == schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID])
+    stat_orders = scatter([f for f in all_stat_forecasts if f.key_figure_id == schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID])
+    forecast_base = np.where(
+        np.isnan(stat_sales) & np.isnan(stat_orders),
+        np.nan,
+        np.nan_to_num(stat_sales) + np.nan_to_num(stat_orders)
+    )
+
+    # Base de los periodos históricos: Manual input, o Sales si no hay Manual input
+    manual_input = np.array([history_map.get((p, schemas.KEY_FIGURE_MANUAL_INPUT_ID), np.nan) for p in all_periods_in_range], dtype=np.float64)
+    sales = np.array([history_map.get((p, schemas.KEY_FIGURE_SALES_ID), np.nan) for p in all_periods_in_range], dtype=np.float64)
+    historical_base = np.where(np.isnan(manual_input), sales, manual_input)
+
+    forecast_start_date = min((f.period for f in all_stat_forecasts), default=None)
+    if forecast_start_date is None:
+        is_forecast_period = np.zeros(n_periods, dtype=bool)
+    else:
+        is_forecast_period = np.array([p >= forecast_start_date for p in all_periods_in_range], dtype=bool)
+    base = np.where(is_forecast_period, forecast_base, historical_base)
+
+    def adjustments_of(key_figure_ids: Tuple[int, ...], adjustment_type_id: int) -> np.ndarray:
+        return scatter([
+            a for a in manual_adjustments
+            if a.key_figure_id in key_figure_ids and a.adjustment_type_id == adjustment_type_id
+        ])
+
+    override = adjustments_of(_GENERAL_ADJUSTMENT_KF_IDS, schemas.ADJUSTMENT_TYPE_OVERRIDE_ID)
+    for stat_kf_id in (schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID):
+        stat_override = adjustments_of((stat_kf_id,), schemas.ADJUSTMENT_TYPE_OVERRIDE_ID)
+        override = np.where(np.isnan(override) & is_forecast_period, stat_override, override)
+
+    quantity = np.nan_to_num(adjustments_of(_GENERAL_ADJUSTMENT_KF_IDS, schemas.ADJUSTMENT_TYPE_QTY_ID))
+    percentage = np.nan_to_num(adjustments_of(_GENERAL_ADJUSTMENT_KF_IDS, schemas.ADJUSTMENT_TYPE_PCT_ID))
+    adjusted = (base + quantity) * (1 + percentage / 100)
+
+    final_values = np.where(np.isnan(override), adjusted, override)
+    final_values[np.isnan(base)] = np.nan
+
+    return [
+        (period, None if np.isnan(value) else float(value))
+        for period, value in zip(all_periods_in_range, final_values)
+    ]
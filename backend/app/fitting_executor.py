@@ -0,0 +1,120 @@
+# backend/app/fitting_executor.py
+# Ejecutor de ajustes de modelos en paralelo para el pronóstico por lotes.
+# Reparte las series en bloques (chunks) sobre un ProcessPoolExecutor para usar todos los cores.
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Callable, Iterator, Tuple
+import multiprocessing
+import threading
+import logging
+import os
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Resultado de un ajuste: (posición de la serie, lo que devuelve fit_fn o None, mensaje de error o None)
+FitResult = Tuple[int, Optional[np.ndarray], Optional[str]]
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_worker_count() -> int:
+    """Number of fitting processes: FORECAST_FIT_WORKERS, or every core when it is 0."""
+    workers = settings.FORECAST_FIT_WORKERS
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _init_worker():
+    """Runs once per worker process: loads statsmodels / pandas before the first chunk arrives."""
+    from .forecast_engine import load_modeling_stack
+    load_modeling_stack()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Creates the shared process pool on first use and reuses it for later runs."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = get_worker_count()
+            # 'spawn' evita heredar conexiones a la base de datos e hilos del servidor web
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+            logger.info(f"Fitting executor started with {workers} worker processes.")
+        return _executor
+
+
+def shutdown_executor():
+    """Stops the worker processes (called on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _fit_chunk(
+    fit_fn: Callable[..., np.ndarray],
+    chunk: List[Tuple[int, np.ndarray]],
+    fit_kwargs: Dict[str, Any]
+) -> List[FitResult]:
+    """Runs in a worker process: fits every series of the chunk, one error never stops the chunk."""
+    results = []
+    for position, values in chunk:
+        try:
+            results.append((position, fit_fn(values, **fit_kwargs), None))
+        except Exception as e:
+            # Cualquier error queda en la serie (failures del lote); las ya ajustadas no se pierden
+            results.append((position, None, str(e) or type(e).__name__))
+    return results
+
+
+def fit_many(
+    fit_fn: Callable[..., np.ndarray],
+    series_values: List[np.ndarray],
+    fit_kwargs: Dict[str, Any],
+    chunk_size: Optional[int] = None
+) -> Iterator[FitResult]:
+    """
+    Fits `fit_fn(values, **fit_kwargs)` for every series and yields the results as the
+    chunks complete (not in input order). The result is whatever fit_fn returns: the forecast
+    values, or (values, model_used, scores) for forecast_engine.select_forecast_model.
+    Series are shipped to the workers as contiguous float64 NumPy arrays, `chunk_size`
+    series per task (FORECAST_FIT_CHUNK_SIZE by default). With a single worker, or a
+    single chunk of work, the fits run in the calling process.
+    `fit_fn` must be a module-level function so it can be pickled.
+    """
+    chunk_size = chunk_size or settings.FORECAST_FIT_CHUNK_SIZE
+    indexed_series = [
+        (position, np.ascontiguousarray(values, dtype=np.float64))
+        for position, values in enumerate(series_values)
+    ]
+    chunks = [indexed_series[i:i + chunk_size] for i in range(0, len(indexed_series), chunk_size)]
+
+    if get_worker_count() == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _fit_chunk(fit_fn, chunk, fit_kwargs)
+        return
+
+    executor = _get_executor()
+    futures = [executor.submit(_fit_chunk, fit_fn, chunk, fit_kwargs) for chunk in chunks]
+    try:
+        for future in as_completed(futures):
+            yield from future.result()
+    except BrokenProcessPool:
+        # Un proceso murió (p.ej. sin memoria): descartar el pool para que la próxima corrida cree uno nuevo
+        logger.error("Fitting executor pool is broken, it will be recreated on the next run.")
+        shutdown_executor()
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
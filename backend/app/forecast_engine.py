@@ -1,19 +1,33 @@
 # backend/app/forecast_engine.py
 
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Callable, Union, Iterator, TYPE_CHECKING
 from datetime import date, timedelta
-import pandas as pd
-from statsmodels.tsa.api import ExponentialSmoothing, SimpleExpSmoothing, Holt 
-from statsmodels.tsa.arima.model import ARIMA 
+from collections import defaultdict
+import time
+import hashlib
 import numpy as np
 import uuid 
 import logging 
+import warnings
 
-from . import crud, models, schemas
+from . import crud, models, schemas, fitting_executor, result_cache
+from .config import settings
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__) 
 
+# statsmodels (y con él scipy) y pandas cuestan segundos y decenas de MB por proceso: se importan
+# dentro de las funciones que ajustan, así un worker de uvicorn que sólo sirve listados no los carga.
+# Los procesos de ajuste y los workers de trabajos los precargan con load_modeling_stack.
+def load_modeling_stack():
+    """Imports the modeling libraries ahead of the first fit (no-op once they are loaded)."""
+    import pandas  # noqa: F401
+    import statsmodels.tsa.api  # noqa: F401
+    import statsmodels.tsa.arima.model  # noqa: F401
+
 # Helper function to get dates in a range (first day of each month)
 def get_dates_in_range(start_date: date, end_date: date) -> List[date]:
     dates = []
@@ -39,7 +53,22 @@ def calculate_manual_input_history(
     Calculates manual input history (formerly clean history) by fetching raw history
     and returning it in the CleanHistoryData schema (now representing 'Manual input').
     If there is an override adjustment for Manual input, it takes precedence.
+    Served from result_cache until a write to the client/SKU bumps its change counter (do not modify the list).
     """
+    return result_cache.get_or_compute(
+        "manual_input_history", db, client_id, sku_id, (client_final_id, start_period, end_period, history_source),
+        lambda: _calculate_manual_input_history(db, client_id, sku_id, client_final_id, start_period, end_period, history_source)
+    )
+
+def _calculate_manual_input_history(
+    db: Session,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    client_final_id: uuid.UUID,
+    start_period: date,
+    end_period: date,
+    history_source: str
+) -> List[schemas.CleanHistoryData]:
     # Se debe pedir la historia cruda (KEY_FIGURE_SALES_ID o KEY_FIGURE_ORDERS_ID)
     kf_id_for_raw_history_source = None
     if history_source == 'sales':
@@ -92,71 +121,72 @@ def calculate_manual_input_history(
         ))
     return manual_input_data_list
 
-def generate_forecast(
-    db: Session,
-    client_id: uuid.UUID,
-    sku_id: uuid.UUID,
-    history_source: str,
+def _raw_history_kf_id(history_source: str) -> Optional[int]:
+    """Returns the raw history Key Figure that corresponds to a history source."""
+    if history_source == 'sales':
+        return schemas.KEY_FIGURE_SALES_ID
+    elif history_source == 'order' or history_source == 'shipments':
+        return schemas.KEY_FIGURE_ORDERS_ID
+    return None
+
+def _stat_forecast_kf_id(history_source: str) -> int:
+    """Returns the statistical forecast Key Figure where a run for this history source is stored."""
+    if history_source == 'sales':
+        return schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID
+    elif history_source == 'order' or history_source == 'shipments':
+        return schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID
+    # Fallback si la fuente no es reconocida, o un error si no debería ocurrir
+    logger.warning(f"Fuente de historia '{history_source}' no reconocida para asignar ID de pronóstico estadístico. Usando Sales Stat Forecast como fallback.")
+    return schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID
+
+def _history_window() -> Tuple[date, date]:
+    """Returns the (start, end) history window used to fit the models: the last 3 closed years."""
+    end_history_period = date.today().replace(day=1) - timedelta(days=1)
+    start_history_period = (end_history_period - timedelta(days=365 * 3)).replace(day=1)
+    return start_history_period, end_history_period
+
+def _build_history_series(points: List[Tuple[date, Optional[float]]]) -> Optional["pd.Series"]:
+    """
+    Builds a monthly series from (period, value) points, filling the gaps
+    forward, then backward, then with 0. Returns None when there are no usable values.
+    """
+    import pandas as pd
+    points = [(period, value) for period, value in points if value is not None] # Filtrar None
+    if not points:
+        return None
+    history_series = pd.Series(
+        [value for _, value in points],
+        index=pd.to_datetime([period for period, _ in points])
+    ).sort_index().asfreq('MS')
+    return history_series.ffill().bfill().fillna(0)
+
+def fit_forecast_model(
+    history_series: Union["pd.Series", np.ndarray],
+    model_name: str,
     smoothing_alpha: float,
+    forecast_horizon: int
+) -> np.ndarray:
+    """
+    Fits the requested model ('ETS' or 'ARIMA') on a monthly history series (a pandas
+    Series or a plain NumPy array) and returns the next `forecast_horizon` values.
+    Module-level so the fitting executor can run it in worker processes.
+    """
+    forecast_values, _ = fit_model_state(history_series, model_name, smoothing_alpha, forecast_horizon)
+    return forecast_values
+
+def fit_model_state(
+    history_series: Union["pd.Series", np.ndarray],
     model_name: str,
-    forecast_horizon: int,
-    user_id: uuid.UUID 
-) -> Dict[str, Any]:
+    smoothing_alpha: float,
+    forecast_horizon: int
+) -> Tuple[np.ndarray, Dict[str, Any]]:
     """
-    Generates a statistical forecast for a given SKU-Client pair.
-    Uses 'Manual input' KF (ID 5) as the base for forecasting if available, otherwise raw history.
+    Same fit as fit_forecast_model; also returns the fitted model state (parameters and final
+    level / trend / season, see forecast_from_model_state) so the fit can be stored and reused.
     """
-    end_history_period = date.today().replace(day=1) - timedelta(days=1) 
-    start_history_period = (end_history_period - timedelta(days=365 * 3)).replace(day=1)
-    
-    # Priorizamos 'Manual input' (ID 5) para la serie histórica base, ya que es la versión "limpia" y editable.
-    manual_input_data_for_series = crud.get_fact_history_for_calculation(
-        db=db,
-        client_id=client_id,
-        sku_id=sku_id,
-        start_period=start_history_period,
-        end_period=end_history_period,
-        source='sales', # Manual input suele ser 'sales'
-        key_figure_id=schemas.KEY_FIGURE_MANUAL_INPUT_ID
-    )
-    
-    history_series = None
-    if manual_input_data_for_series: # Si hay datos de 'Manual input', usarlos
-        history_series_manual_input = pd.Series(
-            [d.value for d in manual_input_data_for_series if d.value is not None], # Filtrar None
-            index=[d.period for d in manual_input_data_for_series if d.value is not None]
-        ).asfreq('MS')
-        history_series = history_series_manual_input.fillna(method='ffill').fillna(method='bfill').fillna(0)
-    else: # Si no hay datos de 'Manual input', usar la fuente raw elegida
-        kf_id_for_raw_base = None
-        if history_source == 'sales':
-            kf_id_for_raw_base = schemas.KEY_FIGURE_SALES_ID
-        elif history_source == 'order' or history_source == 'shipments':
-            kf_id_for_raw_base = schemas.KEY_FIGURE_ORDERS_ID
-        
-        if kf_id_for_raw_base:
-            history_base_data = crud.get_fact_history_for_calculation(
-                db=db,
-                client_id=client_id,
-                sku_id=sku_id,
-                client_final_id=client_id,
-                start_period=start_history_period,
-                end_period=end_history_period,
-                source=history_source,
-                key_figure_id=kf_id_for_raw_base # Obtener la KF raw correspondiente a la fuente
-            )
-            if history_base_data:
-                history_series_raw_base = pd.Series(
-                    [d.value for d in history_base_data if d.value is not None], 
-                    index=[d.period for d in history_base_data if d.value is not None]
-                ).asfreq('MS')
-                history_series = history_series_raw_base.fillna(method='ffill').fillna(method='bfill').fillna(0)
+    from statsmodels.tsa.api import ExponentialSmoothing, SimpleExpSmoothing
+    from statsmodels.tsa.arima.model import ARIMA
 
-    if history_series is None or history_series.empty or history_series.isnull().all():
-        raise RuntimeError("La serie histórica está vacía o contiene solo valores nulos. No se puede generar el pronóstico.")
-    
-    forecast_values = []
-    
     if model_name == "ETS":
         seasonal_periods = 12 
         if len(history_series) < (2 * seasonal_periods):
@@ -167,6 +197,7 @@ def generate_forecast(
                 forecast_values = model.forecast(steps=forecast_horizon)
             except Exception as e:
                  raise RuntimeError(f"Error al ajustar o pronosticar con modelo SES (sin estacionalidad): {e}")
+            model_state = _ses_model_state(smoothing_alpha, float(np.asarray(model.level)[-1]), len(history_series), model.sse)
         else:
             try:
                 model = ExponentialSmoothing(
@@ -180,10 +211,11 @@ def generate_forecast(
                 forecast_values = model.forecast(steps=forecast_horizon)
             except Exception as e:
                 raise RuntimeError(f"Error al ajustar o pronosticar con modelo ETS (estacional): {e}")
+            model_state = _statsmodels_holt_winters_state(model, seasonal_periods)
     
     elif model_name == "ARIMA":
         arima_series = history_series 
-        if arima_series.empty:
+        if len(arima_series) == 0:
             raise RuntimeError("La serie para el modelo ARIMA está vacía después de eliminar NaN.")
         
         order = (1,1,1) 
@@ -192,34 +224,566 @@ def generate_forecast(
             forecast_values = model.predict(start=len(arima_series), end=len(arima_series) + forecast_horizon - 1)
         except Exception as e:
             raise RuntimeError(f"Error al ajustar o pronosticar con modelo ARIMA (orden {order}): {e}")
+        model_state = _arima_model_state(model, len(arima_series))
     
     else:
         raise ValueError("Modelo de pronóstico no soportado.")
 
-    forecast_run_id = uuid.uuid4()
-    
-    crud.create_forecast_smoothing_parameter(
-        db=db,
-        forecast_run_id=forecast_run_id,
-        client_id=client_id,
-        alpha=smoothing_alpha,
-        user_id=user_id 
+    return np.asarray(forecast_values, dtype=float), model_state
+
+# --- Motor ETS/SES nativo y vectorizado (muchas series a la vez) ---
+# Valores candidatos de beta (tendencia) y gamma (estacionalidad). Alpha lo fija el usuario,
+# beta y gamma se eligen por serie minimizando el error cuadrático a un paso.
+ETS_TREND_GRID = (0.01, 0.05, 0.1, 0.2, 0.3)
+ETS_SEASONAL_GRID = (0.01, 0.05, 0.1, 0.2, 0.3)
+
+def _ses_recursion(history_matrix: np.ndarray, smoothing_alpha: float) -> np.ndarray:
+    """
+    Simple exponential smoothing over every row of `history_matrix` (series x periods).
+    Initial level is the first observation (statsmodels 'simple' initialization).
+    Returns the final level of each series.
+    """
+    level = history_matrix[:, 0].copy()
+    for t in range(history_matrix.shape[1]):
+        level = smoothing_alpha * history_matrix[:, t] + (1 - smoothing_alpha) * level
+    return level
+
+def _holt_winters_recursion(
+    history_matrix: np.ndarray,
+    smoothing_alpha: float,
+    smoothing_trend: np.ndarray,
+    smoothing_seasonal: np.ndarray,
+    seasonal_periods: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Additive trend / additive seasonal Holt-Winters recursions (same equations as
+    statsmodels ExponentialSmoothing) run for every series and every (beta, gamma)
+    candidate at once.
+    `history_matrix` is (series x periods); `smoothing_trend` and `smoothing_seasonal`
+    are (candidates,). Initial states use the statsmodels 'simple' initialization.
+    Returns (sse, level, trend, season, last_season): sse, level, trend and last_season
+    are (series, candidates); season is (series, candidates, seasonal_periods), a ring
+    buffer indexed by period % seasonal_periods. last_season is the seasonal value used
+    in the last period before its update, which statsmodels reuses for every
+    seasonal_periods-th forecast step.
+    """
+    m = seasonal_periods
+    n_series, n_periods = history_matrix.shape
+    n_candidates = len(smoothing_trend)
+    beta = smoothing_trend[np.newaxis, :]
+    gamma = smoothing_seasonal[np.newaxis, :]
+
+    first_cycle_mean = history_matrix[:, :m].mean(axis=1)
+    level = np.repeat(first_cycle_mean[:, np.newaxis], n_candidates, axis=1)
+    trend = np.repeat(((history_matrix[:, m:2 * m].mean(axis=1) - first_cycle_mean) / m)[:, np.newaxis], n_candidates, axis=1)
+    season = np.repeat((history_matrix[:, :m] - first_cycle_mean[:, np.newaxis])[:, np.newaxis, :], n_candidates, axis=1)
+    sse = np.zeros((n_series, n_candidates))
+
+    for t in range(n_periods):
+        j = t % m
+        y = history_matrix[:, t][:, np.newaxis]
+        level_trend = level + trend
+        season_j = season[:, :, j].copy()
+        sse += (y - level_trend - season_j) ** 2
+        new_level = smoothing_alpha * (y - season_j) + (1 - smoothing_alpha) * level_trend
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, :, j] = gamma * (y - level_trend) + (1 - gamma) * season_j
+        level = new_level
+
+    return sse, level, trend, season, season_j
+
+def _holt_winters_forecast(
+    level: np.ndarray,
+    trend: np.ndarray,
+    season: np.ndarray,
+    last_season: np.ndarray,
+    n_periods: int,
+    forecast_horizon: int
+) -> np.ndarray:
+    """
+    Forecasts (series x forecast_horizon) from the final Holt-Winters states of each
+    series (level, trend and last_season are (series,), season is (series, seasonal_periods)).
+    """
+    seasonal_periods = season.shape[1]
+    steps = np.arange(1, forecast_horizon + 1)
+    seasonal_component = season[:, (n_periods + steps - 1) % seasonal_periods]
+    # Igual que statsmodels: cada 'seasonal_periods' pasos se usa el estacional previo a la última actualización
+    seasonal_component[:, steps % seasonal_periods == 0] = last_season[:, np.newaxis]
+    return level[:, np.newaxis] + steps[np.newaxis, :] * trend[:, np.newaxis] + seasonal_component
+
+def ets_forecast_matrix(
+    history_matrix: np.ndarray,
+    smoothing_alpha: float,
+    forecast_horizon: int,
+    seasonal_periods: int = 12
+) -> np.ndarray:
+    """
+    Native ETS engine for many series of the same length at once.
+    `history_matrix` is (series x periods) without gaps. Uses additive trend and
+    additive seasonality when there are at least two seasonal cycles, otherwise
+    falls back to SES, like fit_forecast_model. `smoothing_alpha` has the same
+    meaning as in the statsmodels models; beta and gamma are picked per series
+    from ETS_TREND_GRID / ETS_SEASONAL_GRID (gamma <= 1 - alpha, as statsmodels does).
+    Returns a (series x forecast_horizon) matrix.
+    """
+    history_matrix = np.asarray(history_matrix, dtype=np.float64)
+    n_periods = history_matrix.shape[1]
+    if n_periods == 0:
+        raise RuntimeError("La serie histórica está vacía. No se puede generar el pronóstico.")
+
+    if n_periods < 2 * seasonal_periods:
+        level = _ses_recursion(history_matrix, smoothing_alpha)
+        return np.repeat(level[:, np.newaxis], forecast_horizon, axis=1)
+
+    _, _, _, level, trend, season, last_season = _fit_holt_winters_grid(history_matrix, smoothing_alpha, seasonal_periods)
+    return _holt_winters_forecast(level, trend, season, last_season, n_periods, forecast_horizon)
+
+def _fit_holt_winters_grid(
+    history_matrix: np.ndarray,
+    smoothing_alpha: float,
+    seasonal_periods: int
+) -> Tuple[np.ndarray, ...]:
+    """
+    Picks beta and gamma per series from the grid (least one-step squared error) and returns
+    (beta, gamma, sse, level, trend, season, last_season) of the chosen candidate, each (series,)
+    except season, which is (series, seasonal_periods).
+    """
+    candidates = [
+        (beta, gamma) for beta in ETS_TREND_GRID for gamma in ETS_SEASONAL_GRID
+        if gamma <= 1 - smoothing_alpha
+    ] or [(ETS_TREND_GRID[0], 0.0)]
+    smoothing_trend = np.array([beta for beta, _ in candidates])
+    smoothing_seasonal = np.array([gamma for _, gamma in candidates])
+
+    sse, level, trend, season, last_season = _holt_winters_recursion(
+        history_matrix, smoothing_alpha, smoothing_trend, smoothing_seasonal, seasonal_periods
+    )
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(history_matrix.shape[0])
+    return (
+        smoothing_trend[best], smoothing_seasonal[best], sse[rows, best],
+        level[rows, best], trend[rows, best], season[rows, best], last_season[rows, best]
     )
 
-    forecast_records = []
-    last_history_date = history_series.index[-1].date() if not history_series.empty else start_history_period
-    
-    stat_forecast_kf_id = None
-    if history_source == 'sales':
-        stat_forecast_kf_id = schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID
-    elif history_source == 'order' or history_source == 'shipments':
-        stat_forecast_kf_id = schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID
+def _fit_native_ets(
+    series_values: List[np.ndarray],
+    smoothing_alpha: float,
+    forecast_horizon: int
+) -> Iterator[Tuple[int, Optional[np.ndarray], Optional[str]]]:
+    """
+    Runs ets_forecast_matrix over groups of series with the same length and yields
+    (position, forecast values, error) like fitting_executor.fit_many.
+    """
+    positions_by_length = defaultdict(list)
+    for position, values in enumerate(series_values):
+        positions_by_length[len(values)].append(position)
+
+    for positions in positions_by_length.values():
+        history_matrix = np.vstack([series_values[position] for position in positions])
+        try:
+            forecast_matrix = ets_forecast_matrix(history_matrix, smoothing_alpha, forecast_horizon)
+        except (RuntimeError, ValueError, FloatingPointError) as e:
+            for position in positions:
+                yield position, None, f"Error al ajustar o pronosticar con el motor ETS nativo: {e}"
+            continue
+        for row, position in enumerate(positions):
+            yield position, forecast_matrix[row], None
+
+# --- Selección automática de modelo (model_name 'AUTO') ---
+# Torneo por serie sobre un holdout móvil: cada candidato pronostica los FORECAST_AUTO_HOLDOUT_PERIODS
+# períodos siguientes a varios orígenes del final de la historia y gana el de menor WAPE
+# (sum |real - pronóstico| / sum |real|). Primero corren los candidatos baratos (NumPy, sin
+# optimizador); si el mejor ya es bueno (FORECAST_AUTO_GOOD_ENOUGH_WAPE) no se prueba ARIMA. Cada
+# variante ARIMA se ajusta una sola vez, en el primer origen, y los demás orígenes sólo se filtran
+# con esos parámetros (ARIMAResults.apply); una variante que queda atrás del líder por más de
+# FORECAST_AUTO_RACE_MARGIN se descarta sin terminar el holdout, y el ARIMA completo sólo se prueba
+# si una variante simple quedó como líder. Así AUTO cuesta a lo sumo unas 2 veces un ajuste ARIMA.
+AUTO_MODEL_NAME = "AUTO"
+# En orden de costo: a igual WAPE gana el más simple
+AUTO_CHEAP_CANDIDATES = ("SEASONAL_NAIVE", "SES", "CROSTON", "HOLT_WINTERS")
+AUTO_ARIMA_ORDERS = ((1, 1, 0), (0, 1, 1))
+AUTO_ARIMA_FULL_ORDER = (1, 1, 1)
+# Historia mínima antes del primer origen del holdout (por candidato, si necesita más)
+AUTO_MIN_TRAIN_PERIODS = 12
+AUTO_CANDIDATE_MIN_TRAIN_PERIODS = {"SEASONAL_NAIVE": 12, "HOLT_WINTERS": 24}
+CROSTON_ALPHA = 0.1
+
+def _croston_forecast(values: np.ndarray, forecast_horizon: int, smoothing_alpha: float = CROSTON_ALPHA) -> np.ndarray:
+    """Croston's method for intermittent demand: smoothed demand size over smoothed interval between demands."""
+    return forecast_from_model_state(_croston_model_state(values, smoothing_alpha), values, forecast_horizon)
+
+def _cheap_candidate_forecast(model: str, values: np.ndarray, smoothing_alpha: float, forecast_horizon: int) -> np.ndarray:
+    if model == "SEASONAL_NAIVE":
+        # El mismo mes del último ciclo, repetido
+        return np.resize(values[-12:], forecast_horizon)
+    if model == "SES":
+        return np.repeat(_ses_recursion(values[np.newaxis, :], smoothing_alpha), forecast_horizon)
+    if model == "CROSTON":
+        return _croston_forecast(values, forecast_horizon)
+    if model == "HOLT_WINTERS":
+        return ets_forecast_matrix(values[np.newaxis, :], smoothing_alpha, forecast_horizon)[0]
+    raise ValueError(f"Candidato '{model}' no soportado.")
+
+def _race_arima(
+    values: np.ndarray,
+    order: Tuple[int, int, int],
+    origins: List[int],
+    leader_errors: List[float],
+    holdout_periods: int
+) -> Optional[Tuple[List[float], Any]]:
+    """
+    Scores an ARIMA variant on the rolling holdout against the current leader's absolute errors
+    per origin. Returns (errors per origin, fitted results) or None when it fails or falls behind.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    margin = settings.FORECAST_AUTO_RACE_MARGIN
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            fitted = ARIMA(values[:origins[0]], order=order).fit()
+            errors = []
+            for k, origin in enumerate(origins):
+                results = fitted if k == 0 else fitted.apply(values[:origin])
+                actuals = values[origin:origin + holdout_periods]
+                errors.append(float(np.abs(actuals - results.forecast(len(actuals))).sum()))
+                if sum(errors) > (1 + margin) * sum(leader_errors[:k + 1]):
+                    return None
+    except (RuntimeError, ValueError, np.linalg.LinAlgError) as e:
+        logger.debug(f"ARIMA{order} descartado en la selección automática: {e}")
+        return None
+    return errors, fitted
+
+def select_forecast_model(
+    history_series: Union["pd.Series", np.ndarray],
+    smoothing_alpha: float,
+    forecast_horizon: int
+) -> Tuple[np.ndarray, str, Dict[str, float]]:
+    """
+    'AUTO' model: runs the candidate tournament on a monthly history series and forecasts
+    `forecast_horizon` values with the winner.
+    Returns (forecast values, winner name for model_used, holdout WAPE of every candidate that
+    completed the holdout). Series too short for a holdout use SES.
+    Module-level so the fitting executor can run it in worker processes.
+    """
+    values = np.asarray(history_series, dtype=np.float64)
+    model_state, winner, scores = select_model_state(values, smoothing_alpha)
+    return forecast_from_model_state(model_state, values, forecast_horizon), winner, scores
+
+def select_model_state(values: np.ndarray, smoothing_alpha: float) -> Tuple[Dict[str, Any], str, Dict[str, float]]:
+    """
+    Candidate tournament of select_forecast_model; returns (model state of the winner fitted on the
+    whole history, winner name, holdout WAPE of every candidate that completed the holdout).
+    """
+    n_periods = len(values)
+    if n_periods == 0:
+        raise RuntimeError("La serie histórica está vacía. No se puede generar el pronóstico.")
+    holdout_periods = settings.FORECAST_AUTO_HOLDOUT_PERIODS
+    step = max(1, holdout_periods // 3)
+    # Orígenes del holdout móvil, del más antiguo al más reciente; el último pronostica los últimos períodos
+    origins = [
+        n_periods - holdout_periods - step * k for k in reversed(range(settings.FORECAST_AUTO_HOLDOUT_FOLDS))
+    ]
+    origins = [origin for origin in origins if origin >= AUTO_MIN_TRAIN_PERIODS]
+    # Menos orígenes antes que menos candidatos: si en alguno entran todos, se usan sólo esos
+    all_candidate_origins = [origin for origin in origins if origin >= max(AUTO_CANDIDATE_MIN_TRAIN_PERIODS.values())]
+    origins = all_candidate_origins or origins
+    if not origins:
+        return _candidate_model_state("SES", values, smoothing_alpha), "SES", {}
+
+    actual_total = sum(float(np.abs(values[origin:origin + holdout_periods]).sum()) for origin in origins)
+    def wape(errors: List[float]) -> float:
+        if actual_total == 0:
+            return 0.0 if sum(errors) == 0 else float("inf")
+        return sum(errors) / actual_total
+
+    errors_by_model: Dict[str, List[float]] = {}
+    for model in AUTO_CHEAP_CANDIDATES:
+        if origins[0] < AUTO_CANDIDATE_MIN_TRAIN_PERIODS.get(model, 1):
+            continue
+        errors_by_model[model] = [
+            float(np.abs(
+                values[origin:origin + holdout_periods]
+                - _cheap_candidate_forecast(model, values[:origin], smoothing_alpha, holdout_periods)
+            ).sum())
+            for origin in origins
+        ]
+    leader = min(errors_by_model, key=lambda model: sum(errors_by_model[model]))
+
+    fitted_arima = {}
+    if wape(errors_by_model[leader]) > settings.FORECAST_AUTO_GOOD_ENOUGH_WAPE:
+        for order in AUTO_ARIMA_ORDERS + (AUTO_ARIMA_FULL_ORDER,):
+            if order == AUTO_ARIMA_FULL_ORDER and leader not in fitted_arima:
+                break
+            raced = _race_arima(values, order, origins, errors_by_model[leader], holdout_periods)
+            if raced is None:
+                continue
+            model = f"ARIMA{order}".replace(" ", "")
+            errors_by_model[model], fitted_arima[model] = raced
+            if sum(errors_by_model[model]) < sum(errors_by_model[leader]):
+                leader = model
+
+    if leader in fitted_arima:
+        # Los parámetros que ganaron el holdout, filtrados sobre toda la historia
+        model_state = _arima_model_state(fitted_arima[leader], n_periods)
+    else:
+        model_state = _candidate_model_state(leader, values, smoothing_alpha)
+    scores = {model: round(wape(errors), 6) for model, errors in errors_by_model.items()}
+    return model_state, leader, scores
+
+# --- Estados de modelo persistidos (forecast_model_states) ---
+# Un ajuste se guarda como parámetros + estados finales (nivel / tendencia / estacionalidad, o los
+# coeficientes ARIMA) junto con la historia que resume. Si la historia no cambió se re-pronostica desde
+# el estado, con cualquier horizonte; si llegaron meses nuevos el estado avanza con la recursión del
+# modelo. Ninguno de los dos casos llama al optimizador. Se reajusta cuando se pide (refit), cuando el
+# error a un paso de un mes nuevo supera FORECAST_STATE_DRIFT_THRESHOLD veces el RMSE del ajuste
+# (deriva) o tras FORECAST_STATE_MAX_UPDATES meses avanzados sin reajuste.
+# Tipos de estado: 'holt_winters', 'ses', 'seasonal_naive', 'croston' y 'arima'. En el anillo
+# estacional el período t usa la posición t % 12, contando desde el inicio de la historia ajustada
+# (state['n_periods'] sigue contando aunque la ventana de historia avance).
+SEASONAL_NAIVE_PERIODS = 12
+
+def _month_index(period: date) -> int:
+    return period.year * 12 + period.month - 1
+
+def _rmse(errors: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(np.square(errors)))) if len(errors) else 0.0
+
+def _ses_model_state(smoothing_alpha: float, level: float, n_periods: int, sse: float) -> Dict[str, Any]:
+    return {
+        "kind": "ses",
+        "params": {"smoothing_level": float(smoothing_alpha)},
+        "state": {"level": float(level), "n_periods": int(n_periods)},
+        "rmse": float(np.sqrt(sse / n_periods)) if n_periods else 0.0,
+    }
+
+def _holt_winters_model_state(
+    smoothing_alpha: float, smoothing_trend: float, smoothing_seasonal: float,
+    level: float, trend: float, season: np.ndarray, last_season: float, n_periods: int, sse: float
+) -> Dict[str, Any]:
+    return {
+        "kind": "holt_winters",
+        "params": {
+            "smoothing_level": float(smoothing_alpha),
+            "smoothing_trend": float(smoothing_trend),
+            "smoothing_seasonal": float(smoothing_seasonal),
+        },
+        "state": {
+            "level": float(level), "trend": float(trend), "season": [float(v) for v in season],
+            "last_season": float(last_season), "n_periods": int(n_periods),
+        },
+        "rmse": float(np.sqrt(sse / n_periods)),
+    }
+
+def _statsmodels_holt_winters_state(results: Any, seasonal_periods: int) -> Dict[str, Any]:
+    """State of a statsmodels additive Holt-Winters fit, in the ring layout of _holt_winters_recursion."""
+    season_history = np.asarray(results.season, dtype=np.float64)
+    n_periods = len(season_history)
+    season = np.empty(seasonal_periods)
+    # season_history[t] es el estacional actualizado con la observación t (el que usa el período t + m)
+    for t in range(n_periods - seasonal_periods, n_periods):
+        season[t % seasonal_periods] = season_history[t]
+    return _holt_winters_model_state(
+        results.params["smoothing_level"], results.params["smoothing_trend"], results.params["smoothing_seasonal"],
+        np.asarray(results.level)[-1], np.asarray(results.trend)[-1], season,
+        season_history[n_periods - seasonal_periods - 1], n_periods, results.sse
+    )
+
+def _arima_model_state(results: Any, n_periods: int) -> Dict[str, Any]:
+    coefficients = np.asarray(results.params, dtype=np.float64)
+    return {
+        "kind": "arima",
+        "params": {"order": [int(v) for v in results.model.order], "coefficients": coefficients.tolist()},
+        "state": {"n_periods": int(n_periods)},
+        # sigma2 (varianza del error a un paso) es el último coeficiente del ARIMA de statsmodels
+        "rmse": float(np.sqrt(coefficients[-1])),
+    }
+
+def _fit_by_recursion(initial_state: Dict[str, Any], values: np.ndarray) -> Dict[str, Any]:
+    """Runs the model recursion over `values` from an initial state; rmse is the one-step error of the run."""
+    model_state, errors = advance_model_state(initial_state, values, values)
+    model_state["rmse"] = _rmse(errors)
+    return model_state
+
+def _croston_model_state(values: np.ndarray, smoothing_alpha: float = CROSTON_ALPHA) -> Dict[str, Any]:
+    return _fit_by_recursion({
+        "kind": "croston",
+        "params": {"smoothing_level": float(smoothing_alpha)},
+        "state": {"size": 0.0, "interval": 0.0, "last_demand": None, "n_periods": 0},
+        "rmse": 0.0,
+    }, values)
+
+def _candidate_model_state(model: str, values: np.ndarray, smoothing_alpha: float) -> Dict[str, Any]:
+    """State of a cheap AUTO candidate fitted on the whole history (same forecasts as _cheap_candidate_forecast)."""
+    if model == "SEASONAL_NAIVE":
+        return _fit_by_recursion({
+            "kind": "seasonal_naive",
+            "params": {},
+            "state": {
+                "last_cycle": [float(v) for v in values[:SEASONAL_NAIVE_PERIODS]],
+                "n_periods": min(len(values), SEASONAL_NAIVE_PERIODS),
+            },
+            "rmse": 0.0,
+        }, values[SEASONAL_NAIVE_PERIODS:])
+    if model == "SES" or (model == "HOLT_WINTERS" and len(values) < 24):
+        # Inicialización 'simple' del motor nativo: el nivel arranca en la primera observación
+        return _fit_by_recursion(_ses_model_state(smoothing_alpha, values[0], 0, 0.0), values)
+    if model == "CROSTON":
+        return _croston_model_state(values)
+    if model == "HOLT_WINTERS":
+        beta, gamma, sse, level, trend, season, last_season = _fit_holt_winters_grid(values[np.newaxis, :], smoothing_alpha, 12)
+        return _holt_winters_model_state(
+            smoothing_alpha, beta[0], gamma[0], level[0], trend[0], season[0], last_season[0], len(values), sse[0]
+        )
+    raise ValueError(f"Candidato '{model}' no soportado.")
+
+def _arima_filter(model_state: Dict[str, Any], values: np.ndarray) -> Any:
+    """The stored ARIMA coefficients run over `values` (Kalman filter only, no optimizer)."""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ARIMA(values, order=tuple(model_state["params"]["order"])).filter(model_state["params"]["coefficients"])
+
+def forecast_from_model_state(model_state: Dict[str, Any], values: np.ndarray, forecast_horizon: int) -> np.ndarray:
+    """
+    Forecasts `forecast_horizon` values from a model state. `values` is the history the state
+    summarizes; only ARIMA states use it (the coefficients are filtered over it).
+    """
+    kind, state = model_state["kind"], model_state["state"]
+    if kind == "holt_winters":
+        return _holt_winters_forecast(
+            np.array([state["level"]]), np.array([state["trend"]]), np.array([state["season"]]),
+            np.array([state["last_season"]]), state["n_periods"], forecast_horizon
+        )[0]
+    if kind == "ses":
+        return np.full(forecast_horizon, state["level"])
+    if kind == "seasonal_naive":
+        return np.resize(np.asarray(state["last_cycle"], dtype=np.float64), forecast_horizon)
+    if kind == "croston":
+        return np.full(forecast_horizon, state["size"] / state["interval"] if state["last_demand"] is not None else 0.0)
+    if kind == "arima":
+        return np.asarray(_arima_filter(model_state, values).forecast(forecast_horizon), dtype=np.float64)
+    raise ValueError(f"Estado de modelo '{kind}' no soportado.")
+
+def advance_model_state(
+    model_state: Dict[str, Any],
+    new_values: np.ndarray,
+    values: np.ndarray
+) -> Tuple[Dict[str, Any], np.ndarray]:
+    """
+    Advances a model state over the new observations `new_values` (the last months of the history
+    `values`) with the model recursions and the stored parameters.
+    Returns (new model state, one-step-ahead error of each new observation); the input is not modified.
+    """
+    kind, params = model_state["kind"], model_state["params"]
+    state = dict(model_state["state"])
+    errors = []
+    if kind == "holt_winters":
+        alpha, beta, gamma = params["smoothing_level"], params["smoothing_trend"], params["smoothing_seasonal"]
+        season = list(state["season"])
+        for y in new_values:
+            # Mismas ecuaciones que _holt_winters_recursion
+            j = state["n_periods"] % len(season)
+            level_trend = state["level"] + state["trend"]
+            season_j = season[j]
+            errors.append(y - level_trend - season_j)
+            new_level = alpha * (y - season_j) + (1 - alpha) * level_trend
+            state["trend"] = beta * (new_level - state["level"]) + (1 - beta) * state["trend"]
+            season[j] = gamma * (y - level_trend) + (1 - gamma) * season_j
+            state["level"], state["last_season"] = new_level, season_j
+            state["n_periods"] += 1
+        state["season"] = season
+    elif kind == "ses":
+        alpha = params["smoothing_level"]
+        for y in new_values:
+            errors.append(y - state["level"])
+            state["level"] = alpha * y + (1 - alpha) * state["level"]
+            state["n_periods"] += 1
+    elif kind == "seasonal_naive":
+        last_cycle = list(state["last_cycle"])
+        for y in new_values:
+            errors.append(y - last_cycle[0])
+            last_cycle = (last_cycle + [float(y)])[-SEASONAL_NAIVE_PERIODS:]
+            state["n_periods"] += 1
+        state["last_cycle"] = last_cycle
+    elif kind == "croston":
+        alpha = params["smoothing_level"]
+        for y in new_values:
+            has_demand = state["last_demand"] is not None
+            errors.append(y - (state["size"] / state["interval"] if has_demand else 0.0))
+            if y != 0:
+                position = state["n_periods"]
+                if has_demand:
+                    state["size"] = alpha * y + (1 - alpha) * state["size"]
+                    state["interval"] = alpha * (position - state["last_demand"]) + (1 - alpha) * state["interval"]
+                else:
+                    state["size"], state["interval"] = float(y), float(position + 1)
+                state["last_demand"] = position
+            state["n_periods"] += 1
+    elif kind == "arima":
+        # Los coeficientes no cambian; el error a un paso sale del filtro sobre la historia completa
+        if len(new_values):
+            errors = _arima_filter(model_state, values).resid[-len(new_values):]
+        state["n_periods"] += len(new_values)
     else:
-        # Fallback si la fuente no es reconocida, o un error si no debería ocurrir
-        logger.warning(f"Fuente de historia '{history_source}' no reconocida para asignar ID de pronóstico estadístico. Usando Sales Stat Forecast como fallback.")
-        stat_forecast_kf_id = schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID
+        raise ValueError(f"Estado de modelo '{kind}' no soportado.")
+    return {**model_state, "state": state}, np.asarray(errors, dtype=np.float64)
 
+def _reusable_model_state(
+    stored: models.ForecastModelState,
+    history_start: date,
+    values: np.ndarray
+) -> Optional[Tuple[Dict[str, Any], str, int]]:
+    """
+    Reuses a stored fit when the current history (starting at `history_start`) is the stored one,
+    or the stored one plus new months. Returns (model state, 'reused' or 'updated', months advanced
+    since the last full fit), or None when the model has to be refitted.
+    """
+    stored_values = np.asarray(stored.history_values, dtype=np.float64)
+    start_offset = _month_index(history_start) - _month_index(stored.history_start)
+    new_periods = start_offset + len(values) - len(stored_values)
+    if start_offset < 0 or start_offset >= len(stored_values) or new_periods < 0:
+        return None
+    # Los meses en común tienen que ser los que resume el estado (la ventana de historia puede haber avanzado)
+    if not np.array_equal(values[:len(stored_values) - start_offset], stored_values[start_offset:]):
+        return None
+    model_state = {"kind": stored.model_kind, "params": stored.params, "state": stored.state, "rmse": stored.rmse}
+    if new_periods == 0:
+        return model_state, "reused", stored.updates_since_fit
+
+    updates_since_fit = stored.updates_since_fit + new_periods
+    if updates_since_fit > settings.FORECAST_STATE_MAX_UPDATES:
+        return None
+    model_state, errors = advance_model_state(model_state, values[-new_periods:], values)
+    if np.any(np.abs(errors) > settings.FORECAST_STATE_DRIFT_THRESHOLD * model_state["rmse"]):
+        logger.info(
+            f"Estado de {stored.model_used} descartado por deriva: error a un paso {np.abs(errors).max():.4g} "
+            f"vs RMSE {model_state['rmse']:.4g}. Se reajusta."
+        )
+        return None
+    return model_state, "updated", updates_since_fit
 
+def _is_finite_model_state(model_state: Dict[str, Any]) -> bool:
+    numbers = [model_state["rmse"]]
+    for section in (model_state["params"], model_state["state"]):
+        for value in section.values():
+            numbers.extend(value if isinstance(value, list) else [value])
+    return all(np.isfinite(v) for v in numbers if isinstance(v, (int, float)))
+
+def _build_forecast_records(
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    last_history_date: date,
+    forecast_values: np.ndarray,
+    model_name: str,
+    forecast_run_id: uuid.UUID,
+    user_id: uuid.UUID,
+    stat_forecast_kf_id: int
+) -> List[Dict[str, Any]]:
+    import pandas as pd
+
+    forecast_records = []
     for i, value in enumerate(forecast_values):
         current_forecast_date = (pd.to_datetime(last_history_date) + pd.DateOffset(months=i+1)).date()
 
@@ -234,213 +798,368 @@ def generate_forecast(
             "user_id": user_id,
             "key_figure_id": stat_forecast_kf_id 
         })
-    
-    crud.create_fact_forecast_stat_batch(db=db, forecast_records=forecast_records)
-
-    return {"status": "success", "forecast_run_id": str(forecast_run_id), "forecast_periods": len(forecast_records)}
+    return forecast_records
 
-
-def calculate_final_forecast(
+def generate_forecast(
     db: Session,
     client_id: uuid.UUID,
     sku_id: uuid.UUID,
-    client_final_id: uuid.UUID,
-    start_period: date,
-    end_period: date
-) -> List[schemas.FinalForecastData]:
+    history_source: str,
+    smoothing_alpha: float,
+    model_name: str,
+    forecast_horizon: int,
+    user_id: uuid.UUID,
+    refit: bool = False,
+    before_save: Optional[Callable[[], None]] = None
+) -> Dict[str, Any]:
     """
-    Calculates the final forecast by applying manual adjustments (cantidad, porcentaje, override)
-    to the statistical forecast.
+    Generates a statistical forecast for a given SKU-Client pair.
+    Uses 'Manual input' KF (ID 5) as the base for forecasting if available, otherwise raw history.
+    With model_name 'AUTO' the model is picked by select_forecast_model; the winner is stored in
+    model_used and returned with the holdout WAPE of the candidates.
+    The fitted model state is stored with the run (forecast_model_states). Unless `refit` is set,
+    the last stored fit for the same series, history, model and alpha is reused: as is when the
+    history did not change (fit_mode 'reused'), advanced over the new months otherwise ('updated',
+    see _reusable_model_state). Otherwise the model is fitted ('fitted'); model_scores is only
+    returned for an 'AUTO' run that ran the tournament.
+    `before_save()` is called once the model is fitted and before anything is written (the
+    cancellation point of the forecast job); if it raises, nothing is saved.
     """
-    logger.info(f"--- Entering calculate_final_forecast for Client: {client_id}, SKU: {sku_id}, Period: {start_period} to {end_period} ---")
-
-    # Obtener Pronósticos Estadísticos de Sales y Orders
-    stat_forecasts_sales = crud.get_fact_forecast_stat_data(
-        db=db, client_ids=[client_id], sku_ids=[sku_id],
-        start_period=start_period, end_period=end_period,
-        key_figure_ids=[schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID]
+    start_history_period, end_history_period = _history_window()
+    
+    # Priorizamos 'Manual input' (ID 5) para la serie histórica base, ya que es la versión "limpia" y editable.
+    manual_input_data_for_series = crud.get_fact_history_for_calculation(
+        db=db,
+        client_id=client_id,
+        sku_id=sku_id,
+        start_period=start_history_period,
+        end_period=end_history_period,
+        source='sales', # Manual input suele ser 'sales'
+        key_figure_id=schemas.KEY_FIGURE_MANUAL_INPUT_ID
     )
-    stat_forecasts_orders = crud.get_fact_forecast_stat_data(
-        db=db, client_ids=[client_id], sku_ids=[sku_id],
-        start_period=start_period, end_period=end_period,
-        key_figure_ids=[schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID]
+    
+    history_series = None
+    if manual_input_data_for_series: # Si hay datos de 'Manual input', usarlos
+        history_kf_id = schemas.KEY_FIGURE_MANUAL_INPUT_ID
+        history_series = _build_history_series([(d.period, d.value) for d in manual_input_data_for_series])
+    else: # Si no hay datos de 'Manual input', usar la fuente raw elegida
+        kf_id_for_raw_base = _raw_history_kf_id(history_source)
+        history_kf_id = kf_id_for_raw_base
+        
+        if kf_id_for_raw_base:
+            history_base_data = crud.get_fact_history_for_calculation(
+                db=db,
+                client_id=client_id,
+                sku_id=sku_id,
+                start_period=start_history_period,
+                end_period=end_history_period,
+                source=history_source,
+                key_figure_id=kf_id_for_raw_base # Obtener la KF raw correspondiente a la fuente
+            )
+            if history_base_data:
+                history_series = _build_history_series([(d.period, d.value) for d in history_base_data])
+
+    if history_series is None or history_series.empty or history_series.isnull().all():
+        raise RuntimeError("La serie histórica está vacía o contiene solo valores nulos. No se puede generar el pronóstico.")
+    
+    values = history_series.to_numpy(dtype=np.float64)
+    history_start = history_series.index[0].date()
+    stored_state = None if refit else crud.get_latest_forecast_model_state(
+        db, client_id, sku_id, history_source, history_kf_id, model_name, smoothing_alpha
     )
-    all_stat_forecasts = stat_forecasts_sales + stat_forecasts_orders
-    logger.info(f"Fetched {len(all_stat_forecasts)} raw statistical forecasts (Sales & Orders).")
+    reusable = _reusable_model_state(stored_state, history_start, values) if stored_state is not None else None
 
+    model_scores = None
+    if reusable is not None:
+        # Sin optimizador: el estado guardado, tal cual o avanzado sobre los meses nuevos
+        model_state, fit_mode, updates_since_fit = reusable
+        model_used = stored_state.model_used
+        forecast_values = forecast_from_model_state(model_state, values, forecast_horizon)
+    else:
+        fit_mode, updates_since_fit = "fitted", 0
+        if model_name == AUTO_MODEL_NAME:
+            model_state, model_used, model_scores = select_model_state(values, smoothing_alpha)
+            forecast_values = forecast_from_model_state(model_state, values, forecast_horizon)
+        else:
+            forecast_values, model_state = fit_model_state(history_series, model_name, smoothing_alpha, forecast_horizon)
+            model_used = model_name
 
-    manual_adjustments = crud.get_fact_adjustments_for_calculation(
+    if before_save is not None:
+        before_save()
+    forecast_run_id = uuid.uuid4()
+    
+    crud.create_forecast_smoothing_parameter(
         db=db,
+        forecast_run_id=forecast_run_id,
         client_id=client_id,
-        sku_id=sku_id,
-        start_period=start_period,
-        end_period=end_period,
-        adjustment_type_ids=[schemas.ADJUSTMENT_TYPE_QTY_ID, schemas.ADJUSTMENT_TYPE_PCT_ID, schemas.ADJUSTMENT_TYPE_OVERRIDE_ID]
+        alpha=smoothing_alpha,
+        user_id=user_id 
     )
-    logger.info(f"Fetched {len(manual_adjustments)} total manual adjustments. Details:")
-    for adj in manual_adjustments:
-        logger.info(f"  - Adj Period: {adj.period}, KF_ID: {adj.key_figure_id}, AdjType_ID: {adj.adjustment_type_id}, Value: {adj.value}")
-
-
-    # Fetch all relevant history data to use as base for historical periods of Final Forecast
-    # Asumimos que 'Manual input' (ID 5) es la base para los ajustes históricos si existe,
-    # o 'Sales' (ID 1) si no.
-    historical_base_kfs = [
-        schemas.KEY_FIGURE_SALES_ID,
-        schemas.KEY_FIGURE_ORDERS_ID,
-        schemas.KEY_FIGURE_SMOOTHED_SALES_ID,
-        schemas.KEY_FIGURE_SMOOTHED_ORDERS_ID,
-        schemas.KEY_FIGURE_MANUAL_INPUT_ID 
-    ]
-    all_history_data_from_db = crud.get_fact_history_for_calculation(
-        db=db,
-        client_id=client_id,
-        sku_id=sku_id,
-        start_period=start_period,
-        end_period=end_period,
-        source='sales', # Asumimos la fuente principal para estas bases históricas
-        key_figure_ids=historical_base_kfs # Obtener todas estas figuras históricas
+    if _is_finite_model_state(model_state):
+        crud.create_forecast_model_state(
+            db=db,
+            forecast_run_id=forecast_run_id,
+            client_id=client_id,
+            sku_id=sku_id,
+            history_source=history_source,
+            history_key_figure_id=history_kf_id,
+            model_name=model_name,
+            model_used=model_used,
+            model_state=model_state,
+            history_start=history_start,
+            history_values=values,
+            updates_since_fit=updates_since_fit
+        )
+    else:
+        logger.warning(f"Estado de modelo no finito para {client_id}/{sku_id} ({model_used}); no se guarda.")
+
+    last_history_date = history_series.index[-1].date() if not history_series.empty else start_history_period
+    forecast_records = _build_forecast_records(
+        client_id, sku_id, last_history_date, forecast_values, model_used,
+        forecast_run_id, user_id, _stat_forecast_kf_id(history_source)
     )
-    history_map = { (item.period, item.key_figure_id): item.value for item in all_history_data_from_db if item.period is not None and item.value is not None}
-    logger.info(f"Historical base map built with {len(history_map)} entries.")
+    
+    crud.create_fact_forecast_stat_batch(db=db, forecast_records=forecast_records)
 
+    result = {
+        "status": "success", "forecast_run_id": str(forecast_run_id),
+        "forecast_periods": len(forecast_records), "fit_mode": fit_mode
+    }
+    if model_name == AUTO_MODEL_NAME:
+        result["model_used"] = model_used
+    if model_scores is not None:
+        result["model_scores"] = model_scores
+    return result
 
-    # Prepare DataFrames for easier lookup
-    stat_forecast_cols = ['period', 'value', 'client_id', 'sku_id', 'client_final_id', 'key_figure_id'] # Añadir key_figure_id
-    adj_cols = ['period', 'value', 'key_figure_id', 'adjustment_type_id']
 
-    if all_stat_forecasts: 
-        forecast_df = pd.DataFrame([
-            {'period': f.period, 'value': f.value, 'client_id': f.client_id, 'sku_id': f.sku_id, 'client_final_id': f.client_final_id, 'key_figure_id': f.key_figure_id}
-            for f in all_stat_forecasts
-        ]).set_index('period')
-    else:
-        forecast_df = pd.DataFrame(columns=stat_forecast_cols).set_index('period')
-    
-    if manual_adjustments:
-        adjustments_df = pd.DataFrame([
-            {'period': a.period, 'value': a.value, 'key_figure_id': a.key_figure_id, 'adjustment_type_id': a.adjustment_type_id}
-            for a in manual_adjustments
-        ]).set_index('period')
-    else:
-        adjustments_df = pd.DataFrame(columns=adj_cols).set_index('period')
+# Versión de la huella de entrada: subirla cuando un cambio en el código de los modelos cambie los
+# pronósticos para la misma historia, así la próxima corrida por lotes reajusta todo
+FORECAST_INPUT_HASH_VERSION = 1
 
+def _forecast_settings_key(model_name: str, smoothing_alpha: float, forecast_horizon: int, history_source: str) -> str:
+    """Model settings that change the batch forecast of a series for the same input history."""
+    parts = [str(FORECAST_INPUT_HASH_VERSION), model_name, repr(float(smoothing_alpha)), str(forecast_horizon), history_source]
+    if model_name == "ETS":
+        parts.append(settings.FORECAST_ETS_ENGINE)
+    elif model_name == AUTO_MODEL_NAME:
+        parts += [
+            str(settings.FORECAST_AUTO_HOLDOUT_PERIODS), str(settings.FORECAST_AUTO_HOLDOUT_FOLDS),
+            repr(settings.FORECAST_AUTO_GOOD_ENOUGH_WAPE), repr(settings.FORECAST_AUTO_RACE_MARGIN)
+        ]
+    return "|".join(parts)
 
-    final_forecast_list = []
+def _series_input_hash(values: np.ndarray, first_period: date, history_kf_id: int, settings_key: str) -> str:
+    """Content hash of what a batch forecast of one series depends on: the filled history vector, its
+    first period (the forecast periods follow from it), the Key Figure it was read from and the model settings."""
+    digest = hashlib.sha1(f"{settings_key}|{history_kf_id}|{first_period.isoformat()}|".encode())
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
 
-    forecast_start_date = None
-    if not forecast_df.empty:
-        forecast_start_date = forecast_df.index.min() 
-    logger.info(f"Derived statistical forecast start date: {forecast_start_date}")
 
-    all_periods_in_range = get_dates_in_range(start_period, end_period)
-    
-    for period in all_periods_in_range:
-        current_base_value = None
-        period_is_historical = (forecast_start_date is None) or (period < forecast_start_date)
-
-        if period_is_historical:
-            manual_input_val = history_map.get((period, schemas.KEY_FIGURE_MANUAL_INPUT_ID))
-            if manual_input_val is not None:
-                current_base_value = manual_input_val
-            else: # Si no hay 'Manual input', usar 'Sales' como historia cruda base
-                current_base_value = history_map.get((period, schemas.KEY_FIGURE_SALES_ID))
-            logger.debug(f"Period {period}: Historical. Base from history_map (Manual Input/Sales): {current_base_value}")
+def generate_forecast_batch(
+    db: Session,
+    history_source: str,
+    smoothing_alpha: float,
+    model_name: str,
+    forecast_horizon: int,
+    user_id: uuid.UUID,
+    client_ids: Optional[List[uuid.UUID]] = None,
+    sku_ids: Optional[List[uuid.UUID]] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    write_chunk_size: int = 10000,
+    refit: bool = False
+) -> Dict[str, Any]:
+    """
+    Generates statistical forecasts for every Client-SKU pair with history in the
+    selection (None means "all" for client_ids / sku_ids).
+    History for all the pairs is read as one period-indexed matrix, the models are fitted in
+    parallel by the fitting executor (or all together by the native ETS engine when
+    FORECAST_ETS_ENGINE is 'native'), one forecast run is registered per client and
+    fact_forecast_stat is written in large upserts of `write_chunk_size` rows.
+    `progress_callback(done, total)` is called while fitting. With model_name 'AUTO' each series
+    runs select_forecast_model and the result counts the winners in `models_selected`.
+    Series whose input (history and model settings, see _series_input_hash) did not change since the
+    batch run that wrote their current statistical forecast are not fitted again and keep their
+    fact_forecast_stat rows, unless `refit` is set; the result counts them in `series_skipped`, with
+    the fitting and writing time they took in the runs that produced them as `time_saved_seconds`.
+    """
+    import pandas as pd
+
+    started_at = time.perf_counter()
+    start_history_period, end_history_period = _history_window()
+    kf_id_for_raw_base = _raw_history_kf_id(history_source)
+    stat_forecast_kf_id = _stat_forecast_kf_id(history_source)
+
+    key_figure_sources = [(schemas.KEY_FIGURE_MANUAL_INPUT_ID, 'sales')] # Manual input suele ser 'sales'
+    if kf_id_for_raw_base:
+        key_figure_sources.append((kf_id_for_raw_base, history_source))
+    history_matrix, row_index, periods = crud.load_fact_history_matrix(
+        db=db,
+        start_period=start_history_period,
+        end_period=end_history_period,
+        key_figure_sources=key_figure_sources,
+        client_ids=client_ids,
+        sku_ids=sku_ids
+    )
+
+    series_keys = sorted({(client_id, sku_id) for client_id, sku_id, _ in row_index}, key=lambda k: (str(k[0]), str(k[1])))
+    total_series = len(series_keys)
+    logger.info(f"Batch forecast: history matrix {history_matrix.shape} loaded for {total_series} series.")
+
+    # Misma prioridad que generate_forecast: 'Manual input' si existe, si no la historia cruda
+    selected_rows = np.array([
+        row_index.get((client_id, sku_id, schemas.KEY_FIGURE_MANUAL_INPUT_ID), row_index.get((client_id, sku_id, kf_id_for_raw_base)))
+        for client_id, sku_id in series_keys
+    ], dtype=np.int64)
+    selected_matrix = history_matrix[selected_rows] if total_series else np.empty((0, len(periods)))
+    # Igual que _build_history_series: la serie va del primer al último dato y los huecos
+    # se completan hacia adelante, hacia atrás y con 0
+    observed = ~np.isnan(selected_matrix)
+    has_values = observed.any(axis=1)
+    first_observed = observed.argmax(axis=1)
+    last_observed = len(periods) - 1 - observed[:, ::-1].argmax(axis=1)
+    filled_matrix = pd.DataFrame(selected_matrix).ffill(axis=1).bfill(axis=1).fillna(0).to_numpy()
+
+    # Series como arrays NumPy compactos: es lo único que viaja a los procesos de ajuste
+    settings_key = _forecast_settings_key(model_name, smoothing_alpha, forecast_horizon, history_source)
+    series_to_fit = []
+    failed_series = []
+    for position, (client_id, sku_id) in enumerate(series_keys):
+        if not has_values[position]:
+            failed_series.append({"client_id": str(client_id), "sku_id": str(sku_id), "error": "La serie histórica está vacía o contiene solo valores nulos."})
+            continue
+        first, last = first_observed[position], last_observed[position]
+        values = filled_matrix[position, first:last + 1]
+        history_kf_id = schemas.KEY_FIGURE_MANUAL_INPUT_ID if (client_id, sku_id, schemas.KEY_FIGURE_MANUAL_INPUT_ID) in row_index else kf_id_for_raw_base
+        input_hash = _series_input_hash(values, periods[first], history_kf_id, settings_key)
+        series_to_fit.append((client_id, sku_id, periods[last], values, input_hash))
+
+    # Series sin cambios desde la corrida que escribió su pronóstico actual: se conservan sus filas
+    stored_hashes = {} if refit else crud.get_current_forecast_input_hashes(db, stat_forecast_kf_id, client_ids, sku_ids)
+    skipped_series, time_saved_seconds = 0, 0.0
+    changed_series = []
+    for series in series_to_fit:
+        stored = stored_hashes.get((series[0], series[1]))
+        if stored is not None and stored[0] == series[4]:
+            skipped_series += 1
+            time_saved_seconds += stored[1]
         else:
-            stat_sales_val = forecast_df.loc[(period, schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID), 'value'] if (period, schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID) in forecast_df.index else None
-            stat_orders_val = forecast_df.loc[(period, schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID), 'value'] if (period, schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID) in forecast_df.index else None
-            
-            if stat_sales_val is not None and stat_orders_val is not None:
-                current_base_value = float(stat_sales_val) + float(stat_orders_val) 
-            elif stat_sales_val is not None:
-                current_base_value = float(stat_sales_val)
-            elif stat_orders_val is not None:
-                current_base_value = float(stat_orders_val)
-            
-            logger.debug(f"Period {period}: Forecast. Base from stat forecast (Sales/Orders): {current_base_value}")
-        
-        if current_base_value is None:
-            logger.debug(f"Period {period}: No base value found, adding None to final forecast.")
-            final_forecast_list.append(schemas.FinalForecastData(
-                client_id=client_id, sku_id=sku_id, client_final_id=client_final_id,
-                period=period, value=None
+            changed_series.append(series)
+    series_to_fit = changed_series
+    if skipped_series:
+        logger.info(f"Batch forecast: {skipped_series} series sin cambios en la entrada, no se reajustan.")
+
+    run_ids_by_client: Dict[uuid.UUID, uuid.UUID] = {}
+    forecast_records = []
+    input_hashes = []
+    forecasted_series = 0
+    done = len(failed_series) + skipped_series
+    if progress_callback is not None and done:
+        progress_callback(done, total_series)
+
+    fitting_started_at = time.perf_counter()
+    series_values = [values for _, _, _, values, _ in series_to_fit]
+    if model_name == "ETS" and settings.FORECAST_ETS_ENGINE == "native":
+        # Motor vectorizado: todas las series de igual largo se ajustan juntas
+        fit_results = _fit_native_ets(series_values, smoothing_alpha, forecast_horizon)
+    elif model_name == AUTO_MODEL_NAME:
+        # Un torneo por serie; el paralelismo es entre series, en los procesos del ejecutor
+        fit_results = fitting_executor.fit_many(
+            select_forecast_model,
+            series_values,
+            {"smoothing_alpha": smoothing_alpha, "forecast_horizon": forecast_horizon}
+        )
+    else:
+        fit_results = fitting_executor.fit_many(
+            fit_forecast_model,
+            series_values,
+            {"model_name": model_name, "smoothing_alpha": smoothing_alpha, "forecast_horizon": forecast_horizon}
+        )
+    models_selected: Dict[str, int] = defaultdict(int)
+    for position, forecast_values, error in fit_results:
+        client_id, sku_id, last_history_date, _, input_hash = series_to_fit[position]
+        if error is not None:
+            failed_series.append({"client_id": str(client_id), "sku_id": str(sku_id), "error": error})
+        else:
+            model_used = model_name
+            if model_name == AUTO_MODEL_NAME:
+                forecast_values, model_used, _ = forecast_values
+                models_selected[model_used] += 1
+            forecast_run_id = run_ids_by_client.setdefault(client_id, uuid.uuid4())
+            forecast_records.extend(_build_forecast_records(
+                client_id, sku_id, last_history_date, forecast_values, model_used,
+                forecast_run_id, user_id, stat_forecast_kf_id
             ))
-            continue 
-
-
-        adjusted_value = current_base_value
-        logger.debug(f"Period {period}: Initial adjusted_value (base): {adjusted_value}")
-
-        period_adjustments_df = pd.DataFrame(columns=['key_figure_id', 'adjustment_type_id', 'value'])
-
-        if period in adjustments_df.index:
-            period_adjustments_df = adjustments_df.loc[[period]] 
-            if isinstance(period_adjustments_df, pd.Series): 
-                period_adjustments_df = pd.DataFrame([period_adjustments_df.to_dict()])
-            logger.debug(f"Period {period}: Raw adjustments for this period:\n{period_adjustments_df.to_string()}")
-
-
-        if not period_adjustments_df.empty: 
-            old_adjusted_value = adjusted_value 
-            
-            override_applied = False
-
-            override_general_adj = period_adjustments_df[
-                (period_adjustments_df['key_figure_id'].isin([schemas.KEY_FIGURE_FINAL_FORECAST_ID, schemas.KEY_FIGURE_MANUAL_INPUT_ID])) &
-                (period_adjustments_df['adjustment_type_id'] == schemas.ADJUSTMENT_TYPE_OVERRIDE_ID)
-            ]
-            if not override_general_adj.empty:
-                adjusted_value = float(override_general_adj['value'].iloc[0]) 
-                logger.info(f"Period {period}: Applied general override (Final/Manual Input). Old: {old_adjusted_value}, New: {adjusted_value}")
-                override_applied = True
-            else:
-                if not period_is_historical: 
-                    override_stat_sales_kf_adj = period_adjustments_df[
-                        (period_adjustments_df['key_figure_id'] == schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID) &
-                        (period_adjustments_df['adjustment_type_id'] == schemas.ADJUSTMENT_TYPE_OVERRIDE_ID)
-                    ]
-                    override_stat_orders_kf_adj = period_adjustments_df[
-                        (period_adjustments_df['key_figure_id'] == schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID) &
-                        (period_adjustments_df['adjustment_type_id'] == schemas.ADJUSTMENT_TYPE_OVERRIDE_ID)
-                    ]
-                    if not override_stat_sales_kf_adj.empty:
-                        adjusted_value = float(override_stat_sales_kf_adj['value'].iloc[0])
-                        logger.info(f"Period {period}: Applied STAT_FORECAST_SALES_ID override. New value: {adjusted_value}")
-                        override_applied = True
-                    elif not override_stat_orders_kf_adj.empty:
-                        adjusted_value = float(override_stat_orders_kf_adj['value'].iloc[0])
-                        logger.info(f"Period {period}: Applied STAT_FORECAST_ORDERS_ID override. New value: {adjusted_value}")
-                        override_applied = True
-            
-            if not override_applied: 
-                qty_adj = period_adjustments_df[
-                    (period_adjustments_df['key_figure_id'].isin([schemas.KEY_FIGURE_FINAL_FORECAST_ID, schemas.KEY_FIGURE_MANUAL_INPUT_ID])) & 
-                    (period_adjustments_df['adjustment_type_id'] == schemas.ADJUSTMENT_TYPE_QTY_ID)
-                ]
-                if not qty_adj.empty:
-                    old_adjusted_value = adjusted_value 
-                    adjusted_value += float(qty_adj['value'].iloc[0])
-                    logger.debug(f"Period {period}: Applied quantity adjustment. Old: {old_adjusted_value}, New: {adjusted_value}")
-
-                pct_adj = period_adjustments_df[
-                    (period_adjustments_df['key_figure_id'].isin([schemas.KEY_FIGURE_FINAL_FORECAST_ID, schemas.KEY_FIGURE_MANUAL_INPUT_ID])) & 
-                    (period_adjustments_df['adjustment_type_id'] == schemas.ADJUSTMENT_TYPE_PCT_ID)
-                ]
-                if not pct_adj.empty:
-                    old_adjusted_value = adjusted_value 
-                    adjusted_value *= (1 + float(pct_adj['value'].iloc[0]) / 100) 
-                    logger.debug(f"Period {period}: Applied percentage adjustment. Old: {old_adjusted_value}, New: {adjusted_value}")
-            else:
-                logger.debug(f"Period {period}: Override (Final/Manual Input or Stat) was applied, skipping Quantity/Percentage adjustments.")
-
-
-        final_forecast_list.append(schemas.FinalForecastData(
-            client_id=client_id,
-            sku_id=sku_id,
-            client_final_id=client_final_id,
-            period=period,
-            value=adjusted_value
-        ))
-    
-    logger.info(f"--- Exiting calculate_final_forecast. Final list size: {len(final_forecast_list)}. First entry value: {final_forecast_list[0].value if final_forecast_list else 'N/A'} ---")
-    return final_forecast_list
\ No newline at end of file
+            input_hashes.append({
+                "client_id": client_id, "sku_id": sku_id, "key_figure_id": stat_forecast_kf_id,
+                "input_hash": input_hash, "forecast_run_id": forecast_run_id, "forecast_periods": len(forecast_values)
+            })
+            forecasted_series += 1
+
+        done += 1
+        if progress_callback is not None:
+            progress_callback(done, total_series)
+        if done % 500 == 0 or done == total_series:
+            elapsed = time.perf_counter() - started_at
+            logger.info(f"Batch forecast progress: {done}/{total_series} series ({done / elapsed:.1f} series/s).")
+
+    crud.create_forecast_smoothing_parameters_batch(db=db, parameters=[
+        {"forecast_run_id": run_id, "client_id": client_id, "alpha": smoothing_alpha, "user_id": user_id}
+        for client_id, run_id in run_ids_by_client.items()
+    ])
+    written_records = 0
+    for chunk_start in range(0, len(forecast_records), write_chunk_size):
+        written_records += crud.create_fact_forecast_stat_batch(
+            db=db, forecast_records=forecast_records[chunk_start:chunk_start + write_chunk_size]
+        )
+    # Ajuste + escritura por serie de esta corrida: lo que se ahorra la próxima vez que la serie no cambie.
+    # Las huellas van después del pronóstico: si la escritura falla a mitad, esas series se reajustan
+    forecast_seconds = (time.perf_counter() - fitting_started_at) / len(series_to_fit) if series_to_fit else 0.0
+    crud.upsert_forecast_input_hashes(db=db, input_hashes=[{**h, "forecast_seconds": forecast_seconds} for h in input_hashes])
+
+    elapsed_seconds = time.perf_counter() - started_at
+    return {
+        "status": "success",
+        "series_total": total_series,
+        "series_forecasted": forecasted_series,
+        "series_failed": len(failed_series),
+        "series_skipped": skipped_series,
+        "time_saved_seconds": round(time_saved_seconds, 3),
+        "failures": failed_series,
+        "forecast_runs": {str(client_id): str(run_id) for client_id, run_id in run_ids_by_client.items()},
+        "forecast_records": written_records,
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "series_per_second": round(total_series / elapsed_seconds, 2) if elapsed_seconds > 0 else None,
+        **({"models_selected": dict(models_selected)} if model_name == AUTO_MODEL_NAME else {}),
+    }
+
+
+def calculate_final_forecast(
+    db: Session,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    client_final_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> List[schemas.FinalForecastData]:
+    """
+    Returns the final forecast (statistical forecast or history with the manual adjustments
+    applied, see final_forecast.compute_final_forecast_values) for every period of the range.
+    Values are read from the materialized fact_final_forecast table, which crud keeps up to date
+    on every write; a series that was never materialized is computed in memory (nothing is written).
+    Served from result_cache until a write to the client/SKU bumps its change counter (do not modify the list).
+    """
+    def compute() -> List[schemas.FinalForecastData]:
+        final_forecast_map = crud.get_final_forecast_data(db, client_id, sku_id, start_period, end_period)
+        return [
+            schemas.FinalForecastData(
+                client_id=client_id,
+                sku_id=sku_id,
+                client_final_id=client_final_id,
+                period=period,
+                value=final_forecast_map.get(period)
+            )
+            for period in get_dates_in_range(start_period, end_period)
+        ]
+
+    return result_cache.get_or_compute("final_forecast", db, client_id, sku_id, (client_final_id, start_period, end_period), compute)
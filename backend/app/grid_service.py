@@ -0,0 +1,289 @@
+# backend/app/grid_service.py
+# Arma los datos de la grilla de AG-Grid (/data/sales_forecast_data) para un cliente/SKU.
+# Todos los hechos se leen con una consulta UNION ALL (crud.get_grid_facts) más una de dimensiones
+# (crud.get_grid_dimensions); Manual input se deriva de esas mismas filas y Final Forecast se lee
+# materializado de fact_final_forecast. El resultado se guarda en result_cache por cliente/SKU.
+# get_grid_data_async hace lo mismo sobre una AsyncSession (endpoint async de la grilla).
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime
+from collections import defaultdict
+import uuid
+import logging
+
+from . import crud, schemas, forecast_engine, result_cache
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def grid_change_scopes(client_id: uuid.UUID, sku_id: uuid.UUID) -> List[str]:
+    """Change-counter scopes the grid payload depends on (its ETag and its result_cache key)."""
+    return [
+        *result_cache.series_scopes(client_id, sku_id),
+        crud.CHANGE_SCOPE_CLIENTS, crud.CHANGE_SCOPE_SKUS, crud.CHANGE_SCOPE_KEY_FIGURES
+    ]
+
+
+# IDs de históricos y pronóstico, en el orden de las filas de la grilla
+HISTORICAL_KF_IDS = [1, 2, 3, 4, 5]
+FORECAST_KF_IDS = [6, 7, 8]
+
+SALES_SOURCES = ('sales',)
+ORDER_SOURCES = ('order', 'shipments')
+
+
+def _consolidate_facts(
+    facts: List[Any],
+    final_forecast_map: Dict[date, float],
+    start_period: date,
+    end_period: date
+) -> List[Dict[str, Any]]:
+    """
+    Converts the rows of crud.get_grid_facts (plus the Final Forecast of _final_forecast_map) into
+    the flat list of {"period", "key_figure_id", "value"} records shown by the grid.
+    """
+    history = [f for f in facts if f.fact == 'history']
+    stat_forecasts = [f for f in facts if f.fact == 'stat']
+    adjustments = [f for f in facts if f.fact == 'adjustment']
+
+    overrides_by_kf = defaultdict(dict)
+    for adj in adjustments:
+        if adj.adjustment_type_id == schemas.ADJUSTMENT_TYPE_OVERRIDE_ID:
+            overrides_by_kf[adj.key_figure_id][adj.period] = adj.value
+
+    consolidated_data = []
+
+    # Sales / Orders (historia cruda): la figura clave la define la fuente
+    for item in history:
+        if item.key_figure_id not in (schemas.KEY_FIGURE_SALES_ID, schemas.KEY_FIGURE_ORDERS_ID):
+            continue
+        if item.source in SALES_SOURCES:
+            consolidated_data.append({"period": item.period, "key_figure_id": schemas.KEY_FIGURE_SALES_ID, "value": item.value})
+        elif item.source in ORDER_SOURCES:
+            consolidated_data.append({"period": item.period, "key_figure_id": schemas.KEY_FIGURE_ORDERS_ID, "value": item.value})
+
+    # Smoothed Sales / Smoothed Orders
+    for item in history:
+        if item.key_figure_id == schemas.KEY_FIGURE_SMOOTHED_SALES_ID and item.source in SALES_SOURCES:
+            consolidated_data.append({"period": item.period, "key_figure_id": schemas.KEY_FIGURE_SMOOTHED_SALES_ID, "value": item.value})
+    for item in history:
+        if item.key_figure_id == schemas.KEY_FIGURE_SMOOTHED_ORDERS_ID and item.source in ORDER_SOURCES:
+            consolidated_data.append({"period": item.period, "key_figure_id": schemas.KEY_FIGURE_SMOOTHED_ORDERS_ID, "value": item.value})
+
+    # Pronóstico estadístico, con el override de su figura clave si existe
+    for kf_id in (schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID):
+        for item in stat_forecasts:
+            if item.key_figure_id == kf_id:
+                consolidated_data.append({
+                    "period": item.period, "key_figure_id": kf_id,
+                    "value": overrides_by_kf[kf_id].get(item.period, item.value)
+                })
+
+    # Manual input: historia cruda de Sales con sus overrides (mismas reglas que
+    # forecast_engine.calculate_manual_input_history)
+    manual_input_overrides = overrides_by_kf[schemas.KEY_FIGURE_MANUAL_INPUT_ID]
+    for item in history:
+        if item.key_figure_id == schemas.KEY_FIGURE_SALES_ID and item.source == 'sales' and item.value is not None:
+            consolidated_data.append({
+                "period": item.period, "key_figure_id": schemas.KEY_FIGURE_MANUAL_INPUT_ID,
+                "value": manual_input_overrides.get(item.period, item.value)
+            })
+
+    # Final Forecast: un registro por cada mes del rango para que la grilla muestre todas las columnas
+    for period in forecast_engine.get_dates_in_range(start_period, end_period):
+        consolidated_data.append({"period": period, "key_figure_id": schemas.KEY_FIGURE_FINAL_FORECAST_ID, "value": final_forecast_map.get(period)})
+
+    return consolidated_data
+
+
+def _materialized_final_forecast(facts: List[Any]) -> Optional[Dict[date, float]]:
+    """Final Forecast {period: value} read by get_grid_facts, or None if the series is not materialized yet."""
+    if any(f.fact == 'final_series' for f in facts):
+        return {f.period: f.value for f in facts if f.fact == 'final'}
+    return None
+
+
+def _compute_final_forecast(
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> Dict[date, float]:
+    """crud.get_final_forecast_data on its own sync session (it reads with psycopg2): used by the async grid."""
+    db = SessionLocal()
+    try:
+        return crud.get_final_forecast_data(db, client_id, sku_id, start_period, end_period)
+    finally:
+        db.close()
+
+
+def build_grid_rows(
+    consolidated_data: List[Dict[str, Any]],
+    key_figure_name_map: Dict[int, str],
+    row_fields: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], List[date]]:
+    """
+    Pivots the consolidated records into one row per key figure with a `date_<period>` field
+    per period. `row_fields` are copied into every row (ids and names).
+    Returns (rows, sorted periods).
+    """
+    # Índice (key_figure_id, period) -> valor: cada celda se resuelve en O(1).
+    # Si hay registros repetidos para una celda gana el primero.
+    cell_values = {}
+    for item in consolidated_data:
+        cell_values.setdefault((item["key_figure_id"], item["period"]), item["value"])
+
+    unique_periods = sorted(set(period for _, period in cell_values))
+    period_fields = [(period, f"date_{period.isoformat()}") for period in unique_periods]
+
+    grid_rows = []
+    for kf_id in HISTORICAL_KF_IDS + FORECAST_KF_IDS:
+        current_row = {"keyFigureName": key_figure_name_map[kf_id], **row_fields}
+        # Históricos: siempre mostrar lo que haya. Forecast: sólo si hay forecast generado.
+        for period, data_field_name in period_fields:
+            current_row[data_field_name] = cell_values.get((kf_id, period))
+        grid_rows.append(current_row)
+    return grid_rows, unique_periods
+
+
+def get_grid_data(
+    db: Session,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    client_final_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> Dict[str, Any]:
+    """
+    Returns {"rows": [...], "columns": [...]} for AG-Grid: one row per key figure and one
+    column per period. Served from result_cache until a write bumps one of grid_change_scopes;
+    the returned dict is shared and must not be modified.
+    """
+    return result_cache.get_or_compute(
+        "grid", db, client_id, sku_id, (client_final_id, start_period, end_period),
+        lambda: _build_grid_data(db, client_id, sku_id, client_final_id, start_period, end_period),
+        scopes=grid_change_scopes(client_id, sku_id)
+    )
+
+
+def _build_grid_data(
+    db: Session,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    client_final_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> Dict[str, Any]:
+    """Builds the grid payload of get_grid_data with two queries in total."""
+    dimensions = crud.get_grid_dimensions(db, client_id, sku_id)
+    facts = crud.get_grid_facts(db, client_id, sku_id, start_period, end_period)
+    # Final Forecast materializado; se calcula en memoria si la serie todavía no lo está
+    final_forecast_map = _materialized_final_forecast(facts)
+    if final_forecast_map is None:
+        final_forecast_map = crud.get_final_forecast_data(db, client_id, sku_id, start_period, end_period)
+    return _assemble_grid_data(
+        dimensions, facts, final_forecast_map, client_id, sku_id, client_final_id, start_period, end_period
+    )
+
+
+async def get_grid_data_async(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    client_final_id: uuid.UUID,
+    start_period: date,
+    end_period: date,
+    counters: Optional[Dict[str, Tuple[int, datetime]]] = None
+) -> Dict[str, Any]:
+    """
+    get_grid_data on an AsyncSession; shares its result_cache entries. `counters` are the change
+    counters of grid_change_scopes already read by the caller (the endpoint's ETag), read here if None.
+    """
+    return await result_cache.get_or_compute_async(
+        "grid", db, client_id, sku_id, (client_final_id, start_period, end_period),
+        lambda: _build_grid_data_async(db, client_id, sku_id, client_final_id, start_period, end_period),
+        scopes=grid_change_scopes(client_id, sku_id), counters=counters
+    )
+
+
+async def _build_grid_data_async(
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    client_final_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> Dict[str, Any]:
+    """Builds the grid payload of get_grid_data_async (the same two queries, awaited)."""
+    dimensions = await crud.get_grid_dimensions_async(db, client_id, sku_id)
+    facts = await crud.get_grid_facts_async(db, client_id, sku_id, start_period, end_period)
+    final_forecast_map = _materialized_final_forecast(facts)
+    if final_forecast_map is None:
+        # Serie sin materializar: se calcula en un hilo con sesión sincrónica, sin escribir
+        final_forecast_map = await run_in_threadpool(_compute_final_forecast, client_id, sku_id, start_period, end_period)
+    return _assemble_grid_data(
+        dimensions, facts, final_forecast_map, client_id, sku_id, client_final_id, start_period, end_period
+    )
+
+
+def _assemble_grid_data(
+    dimensions: List[Any],
+    facts: List[Any],
+    final_forecast_map: Dict[date, float],
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    client_final_id: uuid.UUID,
+    start_period: date,
+    end_period: date
+) -> Dict[str, Any]:
+    """Grid payload from the rows already read (shared by the sync and async builders)."""
+    key_figure_name_map = {kf.key_figure_id: kf.name for kf in dimensions}
+    client_name = dimensions[0].client_name if dimensions and dimensions[0].client_name is not None else "N/A"
+    sku_name = dimensions[0].sku_name if dimensions and dimensions[0].sku_name is not None else "N/A"
+
+    logger.info(f"Fetched {len(facts)} grid fact rows for Client: {client_id}, SKU: {sku_id}.")
+
+    consolidated_data = _consolidate_facts(facts, final_forecast_map, start_period, end_period)
+    if not consolidated_data:
+        logger.info("No consolidated data, returning empty rows and columns.")
+        return {"rows": [], "columns": []}
+
+    grid_rows_final, unique_periods = build_grid_rows(
+        consolidated_data,
+        key_figure_name_map,
+        {
+            "client_id": client_id,
+            "sku_id": sku_id,
+            "client_final_id": client_final_id,
+            "clientName": client_name,
+            "skuName": sku_name
+        }
+    )
+
+    # Columnas: Key Figure + meses
+    dynamic_columns_for_grid = [
+        {
+            "headerName": "Key Figure",
+            "field": "keyFigureName",
+            "pinned": "left",
+            "editable": False  # El frontend decide si es editable
+        }
+    ]
+    for period in unique_periods:
+        period_iso = period.isoformat()
+        dynamic_columns_for_grid.append({
+            "headerName": period.strftime('%b %Y'),
+            "field": f"date_{period_iso}",
+            "colId": f"date_{period_iso}",
+            "type": "numericColumn"
+        })
+
+    logger.info(f"Grid built with {len(grid_rows_final)} rows and {len(dynamic_columns_for_grid)} columns.")
+    return {
+        "rows": grid_rows_final,
+        "columns": dynamic_columns_for_grid
+    }
@@ -0,0 +1,283 @@
+# backend/app/history_importer.py
+# Importación masiva de historia (extractos mensuales DB.xlsx / CSV / Parquet) a fact_history.
+# El archivo se lee en bloques de tamaño fijo (openpyxl read_only para .xlsx), así que la memoria
+# no depende del tamaño del extracto.
+# Los UUID de clientes, SKUs y client_final se calculan una vez por nombre distinto (no por fila),
+# las filas se cargan a una tabla temporal con COPY FROM STDIN y se pasan a fact_history con un
+# único INSERT ... ON CONFLICT que cubre la historia cruda y Manual input.
+
+from typing import Dict, Iterable, Iterator, Optional, Any, Tuple
+import io
+import os
+import time
+import uuid
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import crud, schemas, dimension_cache, xlsx_reader
+
+logger = logging.getLogger(__name__)
+
+# Columnas del extracto -> columnas internas
+HISTORY_FILE_COLUMNS = {
+    'Month': 'period',
+    'DPG': 'client_name',
+    'SKU': 'sku_name',
+    'Sum of Quantity': 'value',
+    'KeyFigure': 'key_figure_name'
+}
+
+# KeyFigure del extracto -> (key_figure_id, source) de la historia cruda
+HISTORY_KEY_FIGURES = {
+    'Sales': (schemas.KEY_FIGURE_SALES_ID, 'sales'),
+    'Order': (schemas.KEY_FIGURE_ORDERS_ID, 'order'),
+    'Shipments': (schemas.KEY_FIGURE_ORDERS_ID, 'shipments'),
+}
+
+# Filas de la tabla temporal: la serie (cliente, SKU) va como un código entero; sus UUID se
+# cargan una sola vez en history_import_series al final.
+STAGE_COLUMNS = ['row_no', 'series_code', 'period', 'source', 'key_figure_id', 'value']
+
+# Series por bloque al recalcular el Final Forecast de lo importado
+FINAL_FORECAST_CHUNK_SIZE = 1000
+
+# Filas por bloque: la memoria de la importación depende de este valor, no del tamaño del archivo
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def _iter_parquet_chunks(file, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Reads a Parquet extract one record batch at a time (needs pyarrow)."""
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(file)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+def read_history_file(file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Yields the extract in DataFrame chunks of at most `chunk_size` rows, with the original column
+    names. Supports .xlsx (first sheet), .csv and .parquet; memory stays bounded by the chunk size.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.csv':
+        yield from pd.read_csv(file_path, chunksize=chunk_size)
+    elif extension == '.parquet':
+        yield from _iter_parquet_chunks(file_path, chunk_size)
+    else:
+        yield from xlsx_reader.iter_xlsx_chunks(file_path, chunk_size)
+
+
+def _name_uuid(name: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, name))
+
+
+class HistoryImport:
+    """
+    Carga de un extracto a fact_history en una transacción de `conn` (psycopg2).
+    Uso: add_chunk() por cada bloque del archivo y merge() al final; merge() no hace commit.
+    """
+
+    def __init__(self, conn, user_id: Optional[uuid.UUID] = None):
+        self.conn = conn
+        self.user_id = user_id
+        self.rows_read = 0
+        self.rows_staged = 0
+        self.clients: Dict[str, str] = {}  # client_name -> client_id
+        self.skus: Dict[str, str] = {}  # sku_name -> sku_id
+        self._series_codes: Dict[Tuple[str, str], int] = {}  # (client_name, sku_name) -> series_code
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE history_import_stage (
+                    row_no BIGINT NOT NULL,
+                    series_code INT NOT NULL,
+                    period DATE NOT NULL,
+                    source TEXT NOT NULL,
+                    key_figure_id INT NOT NULL,
+                    value FLOAT NOT NULL
+                ) ON COMMIT DROP
+                """
+            )
+
+    def _series_codes_for(self, client_names: pd.Series, sku_names: pd.Series) -> np.ndarray:
+        """
+        Series code of every row. Names are stripped and their UUIDs computed once per distinct
+        value (not per row); the codes are then broadcast back to the rows with NumPy.
+        """
+        client_codes, client_uniques = pd.factorize(client_names)
+        sku_codes, sku_uniques = pd.factorize(sku_names)
+        client_uniques = [str(name).strip() for name in client_uniques]
+        sku_uniques = [str(name).strip() for name in sku_uniques]
+        for name in client_uniques:
+            if name not in self.clients:
+                self.clients[name] = _name_uuid(name)
+        for name in sku_uniques:
+            if name not in self.skus:
+                self.skus[name] = _name_uuid(name)
+
+        pair_codes, pair_uniques = pd.factorize(client_codes.astype(np.int64) * len(sku_uniques) + sku_codes)
+        series_codes = np.empty(len(pair_uniques), dtype=np.int64)
+        for position, pair in enumerate(pair_uniques):
+            key = (client_uniques[pair // len(sku_uniques)], sku_uniques[pair % len(sku_uniques)])
+            series_codes[position] = self._series_codes.setdefault(key, len(self._series_codes))
+        return series_codes[pair_codes]
+
+    def add_chunk(self, chunk: pd.DataFrame) -> int:
+        """Normalizes one chunk of the extract and COPYs it to the staging table. Returns the staged rows."""
+        self.rows_read += len(chunk)
+        df = chunk.rename(columns=HISTORY_FILE_COLUMNS)[list(HISTORY_FILE_COLUMNS.values())]
+        df = df.dropna(subset=['key_figure_name', 'period', 'value', 'client_name', 'sku_name'])
+
+        key_figure_codes, key_figure_uniques = pd.factorize(df['key_figure_name'])
+        key_figures = [HISTORY_KEY_FIGURES.get(str(name).strip()) for name in key_figure_uniques]
+        keep = np.asarray([kf is not None for kf in key_figures] + [False], dtype=bool)[key_figure_codes]
+        df, key_figure_codes = df[keep], key_figure_codes[keep]
+        if df.empty:
+            return 0
+
+        period_codes, period_uniques = pd.factorize(df['period'])
+        period_uniques = pd.to_datetime(pd.Series(period_uniques)).dt.strftime('%Y-%m-%d').to_numpy()
+
+        stage = pd.DataFrame({
+            'row_no': np.arange(self.rows_staged, self.rows_staged + len(df), dtype=np.int64),
+            'series_code': self._series_codes_for(df['client_name'], df['sku_name']),
+            'period': period_uniques[period_codes],
+            'source': np.asarray([kf[1] if kf else '' for kf in key_figures], dtype=object)[key_figure_codes],
+            'key_figure_id': np.asarray([kf[0] if kf else 0 for kf in key_figures], dtype=np.int64)[key_figure_codes],
+            'value': pd.to_numeric(df['value']).to_numpy(dtype=np.float64)
+        }, columns=STAGE_COLUMNS)
+
+        buffer = io.StringIO()
+        stage.to_csv(buffer, header=False, index=False)
+        buffer.seek(0)
+        with self.conn.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY history_import_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        self.rows_staged += len(stage)
+        return len(stage)
+
+    def merge(self) -> Dict[str, Any]:
+        """
+        Upserts the dimensions and moves the staged rows to fact_history with one set-based upsert.
+        Raw history keeps its key figure/source; every 'sales' row also feeds Manual input.
+        When a cell appears more than once in the extract the last row wins.
+        The Final Forecast of the imported series is recomputed and the change counters are bumped in
+        the same transaction.
+        """
+        series = sorted(self._series_codes.items(), key=lambda item: item[1])
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMP TABLE history_import_series ON COMMIT DROP AS
+                SELECT * FROM unnest(%s::int[], %s::uuid[], %s::uuid[], %s::uuid[])
+                    AS s(series_code, client_id, sku_id, client_final_id)
+                """,
+                (
+                    [code for _, code in series],
+                    [self.clients[client_name] for (client_name, _), _ in series],
+                    [self.skus[sku_name] for (_, sku_name), _ in series],
+                    # client_final_id = uuid5("<cliente>-<sku>"), como en migrate_data.py
+                    [_name_uuid(f"{client_name}-{sku_name}") for (client_name, sku_name), _ in series]
+                )
+            )
+            cursor.execute("ANALYZE history_import_stage")
+            cursor.execute("ANALYZE history_import_series")
+            if self.clients:
+                cursor.execute(
+                    """
+                    INSERT INTO dim_clients (client_id, client_name)
+                    SELECT * FROM unnest(%s::uuid[], %s::text[])
+                    ON CONFLICT (client_id) DO UPDATE SET client_name = EXCLUDED.client_name
+                    """,
+                    (list(self.clients.values()), list(self.clients))
+                )
+            if self.skus:
+                cursor.execute(
+                    """
+                    INSERT INTO dim_skus (sku_id, sku_name)
+                    SELECT * FROM unnest(%s::uuid[], %s::text[])
+                    ON CONFLICT (sku_id) DO UPDATE SET sku_name = EXCLUDED.sku_name
+                    """,
+                    (list(self.skus.values()), list(self.skus))
+                )
+
+            cursor.execute(
+                """
+                INSERT INTO fact_history (client_id, sku_id, client_final_id, period, source, key_figure_id, value, user_id)
+                SELECT s.client_id, s.sku_id, s.client_final_id, r.period, r.source, r.key_figure_id, r.value, %(user_id)s::uuid
+                FROM (
+                    SELECT DISTINCT ON (series_code, period, key_figure_id, source)
+                           series_code, period, source, key_figure_id, value
+                    FROM (
+                        SELECT row_no, series_code, period, source, key_figure_id, value
+                        FROM history_import_stage
+                        UNION ALL
+                        SELECT row_no, series_code, period, 'sales', %(manual_input_kf)s, value
+                        FROM history_import_stage
+                        WHERE key_figure_id = %(sales_kf)s AND source = 'sales'
+                    ) staged
+                    ORDER BY series_code, period, key_figure_id, source, row_no DESC
+                ) r
+                JOIN history_import_series s USING (series_code)
+                ON CONFLICT (client_id, sku_id, client_final_id, period, key_figure_id, source) DO UPDATE
+                SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP, user_id = EXCLUDED.user_id
+                """,
+                {
+                    "user_id": str(self.user_id) if self.user_id else None,
+                    "sales_kf": schemas.KEY_FIGURE_SALES_ID,
+                    "manual_input_kf": schemas.KEY_FIGURE_MANUAL_INPUT_ID
+                }
+            )
+            rows_merged = cursor.rowcount
+
+        # Final Forecast de las series importadas, completo y de a bloques (una consulta de entrada por bloque)
+        series_keys = [(self.clients[client_name], self.skus[sku_name]) for (client_name, sku_name), _ in series]
+        for chunk_start in range(0, len(series_keys), FINAL_FORECAST_CHUNK_SIZE):
+            crud.refresh_final_forecast_conn(
+                self.conn, {key: None for key in series_keys[chunk_start:chunk_start + FINAL_FORECAST_CHUNK_SIZE]}
+            )
+        # ETag / Last-Modified: una carga masiva cambia muchas series, se sube la versión global
+        crud.bump_change_counters_conn(
+            self.conn,
+            [crud.CHANGE_SCOPE_FACTS, crud.CHANGE_SCOPE_FACT_HISTORY, crud.CHANGE_SCOPE_CLIENTS, crud.CHANGE_SCOPE_SKUS]
+        )
+
+        logger.info(f"History import merged {rows_merged} fact_history rows from {self.rows_staged} staged rows.")
+        return {
+            "rows_read": self.rows_read,
+            "rows_staged": self.rows_staged,
+            "rows_merged": rows_merged,
+            "clients": len(self.clients),
+            "skus": len(self.skus)
+        }
+
+
+def import_history(
+    conn,
+    chunks: Iterable[pd.DataFrame],
+    user_id: Optional[uuid.UUID] = None
+) -> Dict[str, Any]:
+    """
+    Imports every chunk of an extract into fact_history and commits once.
+    Returns the counters of HistoryImport.merge() plus `client_ids` ({name: id}) and `seconds`.
+    """
+    started = time.perf_counter()
+    try:
+        history_import = HistoryImport(conn, user_id=user_id)
+        for chunk in chunks:
+            history_import.add_chunk(chunk)
+        result = history_import.merge()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    # merge() inserta clientes / SKUs nuevos, actualiza nombres y reescribe la historia de muchas series
+    dimension_cache.invalidate("client", "sku")
+    result["client_ids"] = {name: uuid.UUID(client_id) for name, client_id in history_import.clients.items()}
+    result["seconds"] = time.perf_counter() - started
+    return result
@@ -0,0 +1,396 @@
+# backend/app/jobs.py
+# Trabajos en segundo plano: pronósticos (un cliente/SKU o por lotes), snapshots de versiones,
+# importaciones de historia y métricas de precisión, que pueden tardar más que el timeout de un proxy.
+# - La cola es la tabla jobs (ver ventas-pronostico-app/src/db/jobs.sql): sobrevive a reinicios y la
+#   comparten todos los procesos del backend. submit() inserta el trabajo en 'queued'.
+# - Cada proceso corre JOB_WORKERS hilos que toman el trabajo más antiguo con
+#   SELECT ... FOR UPDATE SKIP LOCKED (nunca dos workers el mismo), lo ejecutan con su propia sesión
+#   y guardan result / error. No hace falta un broker externo. run_pending() ejecuta la cola en el
+#   hilo que llama (scripts y pruebas).
+# - Progreso y cancelación: el trabajo informa su avance con JobProgress.update, que escribe en una
+#   transacción aparte (se ve mientras corre) y lanza JobCancelled si se pidió cancelar; la
+#   transacción del trabajo se descarta. Los trabajos sólo consultan la cancelación antes de guardar
+#   (un pronóstico, después de ajustar y antes de escribir): una vez que escriben terminan igual, y
+#   un pedido de cancelación que llega tarde se ignora. Un trabajo en 'queued' se cancela directamente.
+# - Un hilo supervisor renueva heartbeat_at de los trabajos del proceso y marca failed los 'running'
+#   sin latido por JOB_STALE_SECONDS (su proceso se cayó).
+
+from typing import Any, Callable, Dict, List, Optional
+import os
+import socket
+import threading
+import time
+import uuid
+import logging
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, text, update
+from sqlalchemy.orm import Session
+
+from . import accuracy, crud, forecast_engine, models, schemas
+from .config import settings
+from .database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+# Segundos mínimos entre dos escrituras de progreso de un mismo trabajo
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+WORKER_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job when its cancellation was requested."""
+
+
+# Tipo de trabajo -> handler(db, params, progress) que devuelve el resultado (dict serializable a JSON)
+_handlers: Dict[str, Callable[[Session, Dict[str, Any], "JobProgress"], Dict[str, Any]]] = {}
+
+
+def job_handler(kind: str):
+    """Registers the function that runs the jobs of `kind`."""
+    def register(function):
+        _handlers[kind] = function
+        return function
+    return register
+
+
+class JobProgress:
+    """Progress reporting (and cancellation point) handed to the job handlers."""
+
+    def __init__(self, job_id: uuid.UUID):
+        self.job_id = job_id
+        self._last_write = 0.0
+
+    def update(
+        self,
+        done: int,
+        total: Optional[int] = None,
+        message: Optional[str] = None,
+        force: bool = False,
+        cancellable: bool = True
+    ):
+        """
+        Records done / total (at most once per PROGRESS_INTERVAL_SECONDS unless `force`) and raises
+        JobCancelled if the job was cancelled meanwhile. Pass cancellable=False once the job's writes
+        are committed: they can no longer be rolled back, so the job must end as succeeded.
+        """
+        if not force and time.monotonic() - self._last_write < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_write = time.monotonic()
+        with engine.begin() as connection:
+            cancel_requested = connection.execute(
+                text(
+                    """
+                    UPDATE jobs SET progress_done = :done, progress_total = COALESCE(:total, progress_total),
+                        progress_message = COALESCE(:message, progress_message), heartbeat_at = CURRENT_TIMESTAMP
+                    WHERE job_id = :job_id
+                    RETURNING cancel_requested
+                    """
+                ),
+                {"job_id": self.job_id, "done": done, "total": total, "message": message}
+            ).scalar()
+        if cancel_requested and cancellable:
+            raise JobCancelled()
+
+
+# --- Cola ---
+
+def submit(db: Session, kind: str, params: Dict[str, Any], user_id: Optional[uuid.UUID] = None) -> models.Job:
+    """Queues a job of `kind` (commits) and wakes up the workers of this process."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    db_job = models.Job(
+        job_id=uuid.uuid4(), kind=kind, status=JOB_QUEUED, params=jsonable_encoder(params),
+        progress_done=0, cancel_requested=False, user_id=user_id
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    _wakeup.set()
+    logger.info(f"Job {db_job.job_id} ({kind}) queued.")
+    return db_job
+
+def get_job(db: Session, job_id: uuid.UUID) -> Optional[models.Job]:
+    return db.query(models.Job).filter(models.Job.job_id == job_id).first()
+
+def get_jobs(
+    db: Session,
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[models.Job]:
+    """Jobs, newest first."""
+    query = db.query(models.Job)
+    if status:
+        query = query.filter(models.Job.status == status)
+    if kind:
+        query = query.filter(models.Job.kind == kind)
+    return query.order_by(models.Job.created_at.desc()).offset(skip).limit(limit).all()
+
+def cancel(db: Session, job_id: uuid.UUID) -> Optional[models.Job]:
+    """
+    Cancels a queued job right away; a running one is flagged and stops at its next progress update.
+    Finished jobs are left as they are. Returns the job (None if it does not exist).
+    """
+    db.execute(
+        update(models.Job)
+        .where(models.Job.job_id == job_id, models.Job.status == JOB_QUEUED)
+        .values(status=JOB_CANCELLED, cancel_requested=True, finished_at=func.now())
+    )
+    db.execute(
+        update(models.Job)
+        .where(models.Job.job_id == job_id, models.Job.status == JOB_RUNNING)
+        .values(cancel_requested=True)
+    )
+    db.commit()
+    db_job = get_job(db, job_id)
+    if db_job is not None:
+        db.refresh(db_job)
+    return db_job
+
+def _claim_next() -> Optional[Any]:
+    """Marks the oldest queued job as running for this worker and returns (job_id, kind, params)."""
+    with engine.begin() as connection:
+        return connection.execute(
+            text(
+                """
+                UPDATE jobs SET status = :running, started_at = CURRENT_TIMESTAMP,
+                    heartbeat_at = CURRENT_TIMESTAMP, worker = :worker
+                WHERE job_id = (
+                    SELECT job_id FROM jobs WHERE status = :queued
+                    ORDER BY created_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING job_id, kind, params
+                """
+            ),
+            {"running": JOB_RUNNING, "queued": JOB_QUEUED, "worker": WORKER_NAME}
+        ).first()
+
+def _finish(job_id: uuid.UUID, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    with engine.begin() as connection:
+        connection.execute(
+            update(models.Job)
+            .where(models.Job.job_id == job_id)
+            .values(
+                status=status, result=jsonable_encoder(result) if result is not None else None, error=error,
+                finished_at=func.now(), heartbeat_at=func.now()
+            )
+        )
+
+def run_next() -> bool:
+    """Runs the oldest queued job in this thread. Returns False when the queue was empty."""
+    claimed = _claim_next()
+    if claimed is None:
+        return False
+    job_id, kind, params = claimed
+    handler = _handlers.get(kind)
+    started = time.perf_counter()
+    with _running_lock:
+        _running.add(job_id)
+    db = SessionLocal()
+    try:
+        if handler is None:
+            raise ValueError(f"Unknown job kind '{kind}'.")
+        result = handler(db, params, JobProgress(job_id))
+        _finish(job_id, JOB_SUCCEEDED, result=result)
+        logger.info(f"Job {job_id} ({kind}) succeeded in {time.perf_counter() - started:.1f}s.")
+    except JobCancelled:
+        db.rollback()
+        _finish(job_id, JOB_CANCELLED)
+        logger.info(f"Job {job_id} ({kind}) cancelled.")
+    except Exception as e:
+        db.rollback()
+        _finish(job_id, JOB_FAILED, error=str(e) or type(e).__name__)
+        logger.error(f"Job {job_id} ({kind}) failed: {e}", exc_info=True)
+    finally:
+        db.close()
+        with _running_lock:
+            _running.discard(job_id)
+    return True
+
+def run_pending(max_jobs: Optional[int] = None) -> int:
+    """In-process worker: runs queued jobs in the calling thread until the queue is empty. Returns how many ran."""
+    ran = 0
+    while (max_jobs is None or ran < max_jobs) and run_next():
+        ran += 1
+    return ran
+
+
+# --- Workers del proceso ---
+_threads: List[threading.Thread] = []
+_wakeup = threading.Event()
+_stopping = threading.Event()
+_running: set = set()
+_running_lock = threading.Lock()
+
+
+def _worker_loop():
+    while not _stopping.is_set():
+        try:
+            if run_next():
+                continue
+        except Exception as e:
+            logger.error(f"Job worker error: {e}", exc_info=True)
+        _wakeup.wait(settings.JOB_POLL_SECONDS)
+        _wakeup.clear()
+
+def _supervisor_loop():
+    while not _stopping.wait(settings.JOB_HEARTBEAT_SECONDS):
+        try:
+            with engine.begin() as connection:
+                with _running_lock:
+                    running = list(_running)
+                if running:
+                    connection.execute(
+                        text("UPDATE jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE job_id = ANY(:job_ids)"),
+                        {"job_ids": running}
+                    )
+                stale = connection.execute(
+                    text(
+                        """
+                        UPDATE jobs SET status = :failed, finished_at = CURRENT_TIMESTAMP,
+                            error = 'The worker running this job stopped (' || COALESCE(worker, '?') || ').'
+                        WHERE status = :running AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => :stale_seconds)
+                        RETURNING job_id
+                        """
+                    ),
+                    {"failed": JOB_FAILED, "running": JOB_RUNNING, "stale_seconds": settings.JOB_STALE_SECONDS}
+                ).all()
+            for (job_id,) in stale:
+                logger.warning(f"Job {job_id} marked as failed: no heartbeat for {settings.JOB_STALE_SECONDS}s.")
+        except Exception as e:
+            logger.error(f"Job supervisor error: {e}", exc_info=True)
+
+def start_workers():
+    """Starts JOB_WORKERS worker threads plus the heartbeat supervisor (application startup)."""
+    if _threads or settings.JOB_WORKERS <= 0:
+        return
+    _stopping.clear()
+    for i in range(settings.JOB_WORKERS):
+        _threads.append(threading.Thread(target=_worker_loop, name=f"job-worker-{i}", daemon=True))
+    _threads.append(threading.Thread(target=_supervisor_loop, name="job-supervisor", daemon=True))
+    for thread in _threads:
+        thread.start()
+    logger.info(f"Job workers started: {settings.JOB_WORKERS} ({WORKER_NAME}).")
+
+def shutdown_workers(timeout: float = 5.0):
+    """
+    Stops taking new jobs (application shutdown). A job still running after `timeout` dies with the
+    process; another process marks it failed once its heartbeat is stale.
+    """
+    _stopping.set()
+    _wakeup.set()
+    for thread in _threads:
+        thread.join(timeout)
+    _threads.clear()
+
+
+# --- Tipos de trabajo ---
+# Usuario placeholder, igual que los endpoints sincrónicos
+DEFAULT_USER_ID = uuid.UUID('00000000-0000-0000-0000-000000000001')
+
+
+@job_handler("forecast")
+def _run_forecast(db: Session, params: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """
+    Statistical forecast of one Client-SKU pair (forecast_engine.generate_forecast). It can be
+    cancelled until the model is fitted; generate_forecast commits its writes after that.
+    """
+    request = schemas.ForecastJobRequest(**params)
+    progress.update(0, 1, "Fitting model", force=True)
+    result = forecast_engine.generate_forecast(
+        db=db,
+        client_id=request.client_id,
+        sku_id=request.sku_id,
+        history_source=request.history_source,
+        smoothing_alpha=request.smoothing_alpha,
+        model_name=request.model_name,
+        forecast_horizon=request.forecast_horizon,
+        user_id=DEFAULT_USER_ID,
+        refit=request.refit,
+        before_save=lambda: progress.update(0, 1, "Saving forecast", force=True)
+    )
+    progress.update(1, 1, "Done", force=True, cancellable=False)
+    return result
+
+
+@job_handler("forecast_batch")
+def _run_forecast_batch(db: Session, params: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """Batch forecast (forecast_engine.generate_forecast_batch); progress is the number of series done (fitted or skipped)."""
+    request = schemas.ForecastBatchRequest(**params)
+    progress.update(0, None, "Loading history", force=True)
+    return forecast_engine.generate_forecast_batch(
+        db=db,
+        client_ids=request.client_ids or None,
+        sku_ids=request.sku_ids or None,
+        history_source=request.history_source,
+        smoothing_alpha=request.smoothing_alpha,
+        model_name=request.model_name,
+        forecast_horizon=request.forecast_horizon,
+        user_id=DEFAULT_USER_ID,
+        progress_callback=lambda done, total: progress.update(done, total, "Fitting models"),
+        refit=request.refit
+    )
+
+
+@job_handler("forecast_version")
+def _run_forecast_version(db: Session, params: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """Snapshot of the client's current forecast into a new version (crud.create_forecast_version_snapshot)."""
+    request = schemas.ForecastVersionSnapshotRequest(**params)
+    progress.update(0, None, "Materializing Final Forecast", force=True)
+    db_version, versioned_cells = crud.create_forecast_version_snapshot(
+        db,
+        schemas.ForecastVersionCreate(**request.model_dump(exclude={"sku_ids"})),
+        sku_ids=request.sku_ids or None,
+        progress_callback=lambda done, total: progress.update(done, total, "Materializing Final Forecast")
+    )
+    return {"version_id": db_version.version_id, "versioned_cells": versioned_cells}
+
+
+@job_handler("history_import")
+def _run_history_import(db: Session, params: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """
+    Import of an uploaded extract (history_importer.import_history) on its own pooled psycopg2
+    connection; progress is the number of rows read. The file is deleted when the job ends.
+    """
+    from . import history_importer  # pandas se carga con la primera importación, no al arrancar el worker
+
+    path = params["path"]
+
+    def chunks_with_progress():
+        rows_read = 0
+        for chunk in history_importer.read_history_file(path):
+            yield chunk
+            rows_read += len(chunk)
+            progress.update(rows_read, None, f"{rows_read:,} rows read")
+
+    conn = engine.raw_connection()
+    try:
+        progress.update(0, None, f"Reading {params.get('filename') or os.path.basename(path)}", force=True)
+        result = history_importer.import_history(conn, chunks_with_progress(), user_id=DEFAULT_USER_ID)
+    finally:
+        conn.close()
+        if os.path.exists(path):
+            os.remove(path)
+    # import_history ya hizo commit: un pedido de cancelación que llegó durante el merge se ignora
+    progress.update(result["rows_read"], result["rows_read"], "Done", force=True, cancellable=False)
+    return result
+
+
+@job_handler("accuracy")
+def _run_accuracy(db: Session, params: Dict[str, Any], progress: JobProgress) -> Dict[str, Any]:
+    """Recomputes forecast_accuracy (accuracy.refresh_accuracy_metrics)."""
+    request = schemas.AccuracyRefreshRequest(**params)
+    progress.update(0, 1, "Computing accuracy metrics", force=True)
+    return accuracy.refresh_accuracy_metrics(db, max_lag=request.max_lag, end_period=request.end_period)
@@ -3,7 +3,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging # Importar logging
 
-from .routers import clients, skus, keyfigures, sales_forecast
+from .routers import clients, skus, keyfigures, sales_forecast, jobs as jobs_router
+from . import fitting_executor, forecast_engine, jobs
+from .config import settings
 
 # Configurar el nivel de logging para que los mensajes INFO sean visibles
 logging.basicConfig(level=logging.INFO)
@@ -28,12 +30,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Page-Token", "ETag", "Last-Modified"],  # token de página de los listados de hechos y GET condicional
 )
 
 app.include_router(clients.router)
 app.include_router(skus.router)
 app.include_router(keyfigures.router)
 app.include_router(sales_forecast.router)
+app.include_router(jobs_router.router)
+
+@app.on_event("startup")
+def preload_modeling_stack():
+    # Sólo en los procesos dedicados a ajustar; los workers web cargan statsmodels / pandas al primer ajuste
+    if settings.FORECAST_PRELOAD_MODELING_STACK:
+        forecast_engine.load_modeling_stack()
+
+@app.on_event("startup")
+def start_job_workers():
+    # Workers de la cola de trabajos en segundo plano (pronósticos, versiones, importaciones)
+    jobs.start_workers()
+
+@app.on_event("shutdown")
+def shutdown_fitting_executor():
+    # Detener los procesos del ejecutor de ajustes de modelos
+    fitting_executor.shutdown_executor()
+
+@app.on_event("shutdown")
+def shutdown_job_workers():
+    jobs.shutdown_workers()
 
 @app.get("/")
 async def root():
@@ -1,10 +1,10 @@
 # backend/app/models.py
 
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, TIMESTAMP, Boolean 
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, ForeignKey, TIMESTAMP, Boolean 
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
+from sqlalchemy.orm import relationship, declarative_base, synonym
 from sqlalchemy.sql import func
-from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint 
+from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint, Index 
 import uuid
 
 Base = declarative_base()
@@ -46,8 +46,54 @@ class ForecastSmoothingParameter(Base):
     created_at = Column(TIMESTAMP(timezone=True), default=func.now())
     user_id = Column(UUID(as_uuid=True)) 
 
+    __table_args__ = (
+        Index("ix_forecast_smoothing_parameters_client", "client_id"),
+    )
+
     client = relationship("DimClient") 
 
+class ForecastModelState(Base):
+    # Modelo ajustado de una serie en una corrida: parámetros, estados finales y la historia que
+    # resume (ver forecast_engine._reusable_model_state y forecast_model_states.sql)
+    __tablename__ = "forecast_model_states"
+    forecast_run_id = Column(UUID(as_uuid=True), ForeignKey("forecast_smoothing_parameters.forecast_run_id"), nullable=False)
+    client_id = Column(UUID(as_uuid=True), ForeignKey("dim_clients.client_id"), nullable=False)
+    sku_id = Column(UUID(as_uuid=True), ForeignKey("dim_skus.sku_id"), nullable=False)
+    history_source = Column(String, nullable=False)
+    history_key_figure_id = Column(Integer, nullable=False)
+    model_name = Column(String, nullable=False)  # el pedido: ETS | ARIMA | AUTO
+    model_used = Column(String, nullable=False)
+    model_kind = Column(String, nullable=False)  # holt_winters | ses | seasonal_naive | croston | arima
+    params = Column(JSONB, nullable=False)
+    state = Column(JSONB, nullable=False)
+    rmse = Column(Float, nullable=False)
+    history_start = Column(Date, nullable=False)
+    history_values = Column(ARRAY(Float), nullable=False)
+    updates_since_fit = Column(Integer, nullable=False, default=0)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("forecast_run_id", "client_id", "sku_id"),
+        Index("ix_forecast_model_states_series", "client_id", "sku_id", "history_source", "model_name", "created_at"),
+    )
+
+class ForecastInputHash(Base):
+    # Huella de la entrada (historia + configuración del modelo) del último pronóstico por lotes de
+    # cada serie; con la misma huella no se vuelve a ajustar (ver forecast_input_hashes.sql)
+    __tablename__ = "forecast_input_hashes"
+    client_id = Column(UUID(as_uuid=True), ForeignKey("dim_clients.client_id"), nullable=False)
+    sku_id = Column(UUID(as_uuid=True), ForeignKey("dim_skus.sku_id"), nullable=False)
+    key_figure_id = Column(Integer, ForeignKey("dim_keyfigures.key_figure_id"), nullable=False)
+    input_hash = Column(String, nullable=False)
+    forecast_run_id = Column(UUID(as_uuid=True), ForeignKey("forecast_smoothing_parameters.forecast_run_id"), nullable=False)
+    forecast_periods = Column(Integer, nullable=False)
+    forecast_seconds = Column(Float, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("client_id", "sku_id", "key_figure_id"),
+    )
+
 class ForecastVersion(Base): 
     __tablename__ = "forecast_versions"
     version_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -59,9 +105,14 @@ class ForecastVersion(Base):
     creation_date = Column("created_at", TIMESTAMP(timezone=True), default=func.now())
 
     model_used = Column(String, nullable=True)
+    statistical_model_applied = synonym("model_used")  # nombre del campo en schemas.ForecastVersion
     forecast_run_id = Column(UUID(as_uuid=True), ForeignKey("forecast_smoothing_parameters.forecast_run_id"), nullable=True)
     notes = Column(String, nullable=True)
 
+    __table_args__ = (
+        Index("ix_forecast_versions_client", "client_id"),
+    )
+
     client = relationship("DimClient", backref="forecast_versions")
     forecast_run = relationship("ForecastSmoothingParameter")
 
@@ -82,6 +133,9 @@ class FactHistory(Base):
 
     __table_args__ = (
         PrimaryKeyConstraint("client_id", "sku_id", "client_final_id", "period", "key_figure_id", "source"),
+        # Índices secundarios (ver ventas-pronostico-app/src/db/fact_indexes.sql)
+        Index("ix_fact_history_kf_source_period", "key_figure_id", "source", "period", postgresql_include=["value"]),
+        Index("ix_fact_history_period", "period"),
     )
 
     client = relationship("DimClient")
@@ -104,6 +158,8 @@ class FactForecastStat(Base):
 
     __table_args__ = (
         PrimaryKeyConstraint("client_id", "sku_id", "client_final_id", "period", "key_figure_id"), # <-- ¡key_figure_id añadido a PK!
+        Index("ix_fact_forecast_stat_run", "forecast_run_id"),
+        Index("ix_fact_forecast_stat_kf_period", "key_figure_id", "period"),
     )
 
     client = relationship("DimClient")
@@ -127,6 +183,7 @@ class FactAdjustments(Base):
 
     __table_args__ = (
         PrimaryKeyConstraint("client_id", "sku_id", "client_final_id", "period", "key_figure_id"),
+        Index("ix_fact_adjustments_period", "period"),
     )
 
     client = relationship("DimClient")
@@ -147,6 +204,8 @@ class FactForecastVersioned(Base):
     
     __table_args__ = (
         PrimaryKeyConstraint("version_id", "client_id", "sku_id", "client_final_id", "period", "key_figure_id"),
+        Index("ix_fact_forecast_versioned_client_sku_period", "client_id", "sku_id", "period"),
+        Index("ix_fact_forecast_versioned_period_kf", "period", "key_figure_id"),
     )
 
     version = relationship("ForecastVersion")
@@ -172,4 +231,88 @@ class ManualInputComment(Base):
 
     client = relationship("DimClient")
     sku = relationship("DimSku")
-    key_figure = relationship("DimKeyFigure")
\ No newline at end of file
+    key_figure = relationship("DimKeyFigure")
+
+# Final Forecast materializado (ver crud.refresh_final_forecast)
+class FactFinalForecast(Base):
+    __tablename__ = "fact_final_forecast"
+    client_id = Column(UUID(as_uuid=True), ForeignKey("dim_clients.client_id"), nullable=False)
+    sku_id = Column(UUID(as_uuid=True), ForeignKey("dim_skus.sku_id"), nullable=False)
+    period = Column(Date, nullable=False)
+    value = Column(Float, nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("client_id", "sku_id", "period"),
+    )
+
+
+class FinalForecastSeries(Base):
+    # Una fila por cliente/SKU cuyo Final Forecast ya está materializado en fact_final_forecast
+    __tablename__ = "final_forecast_series"
+    client_id = Column(UUID(as_uuid=True), ForeignKey("dim_clients.client_id"), nullable=False)
+    sku_id = Column(UUID(as_uuid=True), ForeignKey("dim_skus.sku_id"), nullable=False)
+    refreshed_at = Column(TIMESTAMP(timezone=True), default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("client_id", "sku_id"),
+    )
+
+
+class ChangeCounter(Base):
+    # Versión por alcance ('dim_clients', 'series:<client>:<sku>', ...) para ETag / Last-Modified
+    # (ver crud.bump_change_counters)
+    __tablename__ = "change_counters"
+    scope = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    changed_at = Column(TIMESTAMP(timezone=True), nullable=False, default=func.now())
+
+
+class Job(Base):
+    # Trabajo en segundo plano (pronósticos, snapshots de versiones, importaciones); ver app/jobs.py
+    __tablename__ = "jobs"
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued | running | succeeded | failed | cancelled
+    params = Column(JSONB, nullable=False, default=dict)
+    progress_done = Column(BigInteger, nullable=False, default=0)
+    progress_total = Column(BigInteger, nullable=True)
+    progress_message = Column(String, nullable=True)
+    result = Column(JSONB, nullable=True)
+    error = Column(String, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    user_id = Column(UUID(as_uuid=True), nullable=True)
+    worker = Column(String, nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=func.now())
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    heartbeat_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "created_at"),
+    )
+
+
+class ForecastAccuracy(Base):
+    # Métricas de precisión por lag, reconstruidas por app/accuracy.py (ver forecast_accuracy.sql)
+    __tablename__ = "forecast_accuracy"
+    accuracy_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    forecast_source = Column(String, nullable=False)  # stat | versioned
+    key_figure_id = Column(Integer, nullable=False)
+    lag = Column(Integer, nullable=False)
+    level = Column(String, nullable=False)  # series | client | total
+    client_id = Column(UUID(as_uuid=True), nullable=True)
+    sku_id = Column(UUID(as_uuid=True), nullable=True)
+    periods = Column(Integer, nullable=False)
+    actual_sum = Column(Float, nullable=False)
+    abs_error_sum = Column(Float, nullable=False)
+    error_sum = Column(Float, nullable=False)
+    wape = Column(Float, nullable=True)
+    mape = Column(Float, nullable=True)
+    bias = Column(Float, nullable=True)
+    computed_at = Column(TIMESTAMP(timezone=True), nullable=False, default=func.now())
+
+    __table_args__ = (
+        Index("ix_forecast_accuracy_level", "level", "forecast_source", "key_figure_id", "lag"),
+        Index("ix_forecast_accuracy_client_sku", "client_id", "sku_id"),
+    )
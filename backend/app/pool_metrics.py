@@ -0,0 +1,88 @@
+# backend/app/pool_metrics.py
+# Métricas de los pools de conexiones de database.py (motor sync de psycopg2 y motor async de asyncpg).
+# Los pools son subclases de QueuePool que miden cada checkout: cuánto esperó el request por una
+# conexión, si la obtuvo del overflow (más allá de DB_POOL_SIZE), si tuvo que hacer cola porque
+# estaban todas en uso y si venció DB_POOL_TIMEOUT. Junto con el estado actual del pool (en uso,
+# libres, overflow) se exponen en GET /data/pool/metrics, para dimensionar el pool según la cantidad
+# de workers de uvicorn (las métricas son por proceso).
+
+from collections import defaultdict
+from typing import Any, Dict
+import threading
+import time
+import logging
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[str, Any] = {}
+_counters: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+    "checkouts": 0, "queued_checkouts": 0, "overflow_checkouts": 0, "timeouts": 0,
+    "wait_ms_total": 0.0, "wait_ms_max": 0.0
+})
+_lock = threading.Lock()
+
+
+class _TimedPoolMixin:
+    """QueuePool that records the checkout wait of every connection under `metrics_name`."""
+
+    metrics_name = "default"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools[self.metrics_name] = self  # el pool vigente (engine.dispose() lo recrea)
+
+    def _do_get(self):
+        queued = self.checkedout() >= self.size() + self._max_overflow
+        overflow_before = self.overflow()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with _lock:
+                _counters[self.metrics_name]["timeouts"] += 1
+            logger.warning(
+                f"Connection pool '{self.metrics_name}' exhausted: no connection within {self._timeout}s "
+                f"({self.checkedout()} checked out, pool size {self.size()} + overflow {self._max_overflow})."
+            )
+            raise
+        wait_ms = (time.perf_counter() - started) * 1000
+        with _lock:
+            counters = _counters[self.metrics_name]
+            counters["checkouts"] += 1
+            counters["queued_checkouts"] += queued
+            counters["overflow_checkouts"] += self.overflow() > max(overflow_before, 0)
+            counters["wait_ms_total"] += wait_ms
+            counters["wait_ms_max"] = max(counters["wait_ms_max"], wait_ms)
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics_name = "sync"
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Current state and checkout counters of every instrumented pool, since the process started."""
+    with _lock:
+        counters = {name: dict(_counters[name]) for name in _pools}
+    metrics = {}
+    for name, pool in _pools.items():
+        values = counters[name]
+        metrics[name] = {
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            **values,
+            "wait_ms_total": round(values["wait_ms_total"], 3),
+            "wait_ms_max": round(values["wait_ms_max"], 3),
+            "wait_ms_avg": round(values["wait_ms_total"] / values["checkouts"], 3) if values["checkouts"] else 0.0,
+        }
+    return metrics
@@ -0,0 +1,243 @@
+# backend/app/result_cache.py
+# Caché de resultados por cliente/SKU: el payload de la grilla (/data/sales_forecast_data) y los
+# resultados de forecast_engine.calculate_manual_input_history / calculate_final_forecast.
+#
+# - Siempre hay un LRU en memoria (RESULT_CACHE_MAX_ENTRIES entradas por proceso) y, opcionalmente,
+#   un backend compartido entre procesos (Redis con RESULT_CACHE_REDIS_URL, o cualquier objeto con la
+#   interfaz de LocalBackend registrado con set_shared_backend).
+# - Invalidación precisa y entre procesos: la clave incluye las versiones de change_counters (con su
+#   changed_at, como el ETag de conditional_get, así vaciar la tabla no reusa claves viejas) de los
+#   alcances de los que depende el resultado: por defecto la serie y CHANGE_SCOPE_FACTS. Toda
+#   escritura sube esas versiones en su misma transacción (crud.bump_change_counters), así que un
+#   cambio hecho por otro worker, un trabajo o un script de la CLI se ve en la próxima lectura; las
+#   entradas viejas ya no se leen y salen del LRU / vencen con el TTL. Las versiones se leen ANTES de
+#   calcular (una consulta por índice, o las mismas que ya leyó el ETag de la grilla): un valor nunca
+#   queda guardado bajo versiones más nuevas que los datos con los que se calculó.
+# - Métricas: hits / misses por tipo de resultado (get_metrics, GET /data/cache/metrics).
+
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+import pickle
+import threading
+import time
+import logging
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import crud
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBackend:
+    """
+    In-process LRU of at most `max_entries` values that expire after `ttl_seconds` (entries of
+    superseded versions are never read again and only take room until then).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._values: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._values[key]
+                return None
+            self._values.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._values[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class RedisBackend:
+    """Shared backend on Redis: pickled values with a TTL."""
+
+    def __init__(self, url: str, ttl_seconds: int, prefix: str = "wirebi:result_cache:"):
+        import redis  # dependencia opcional: sólo si se configura RESULT_CACHE_REDIS_URL
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        payload = self.client.get(self.prefix + key)
+        return pickle.loads(payload) if payload is not None else None
+
+    def set(self, key: str, value: Any):
+        self.client.set(self.prefix + key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ex=self.ttl_seconds)
+
+    def clear(self):
+        pass  # las entradas compartidas vencen con el TTL
+
+
+_local = LocalBackend(settings.RESULT_CACHE_MAX_ENTRIES, settings.RESULT_CACHE_TTL_SECONDS)
+_shared = None
+_shared_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+_counters = {"shared_errors": 0}
+_metrics_lock = threading.Lock()
+
+
+def set_shared_backend(backend):
+    """Plugs a shared backend (same interface as LocalBackend), or None to use only the local LRU."""
+    global _shared
+    with _shared_lock:
+        _shared = backend
+    _local.clear()
+
+
+def _get_shared_backend():
+    global _shared
+    if _shared is None and settings.RESULT_CACHE_REDIS_URL:
+        with _shared_lock:
+            if _shared is None:
+                _shared = RedisBackend(settings.RESULT_CACHE_REDIS_URL, settings.RESULT_CACHE_TTL_SECONDS)
+                logger.info("Result cache using the shared Redis backend.")
+    return _shared
+
+
+def _count(name: str, counter: str):
+    with _metrics_lock:
+        _metrics[name][counter] += 1
+
+
+def _count_shared_error(e: Exception):
+    logger.warning(f"Result cache shared backend unavailable: {e}")
+    with _metrics_lock:
+        _counters["shared_errors"] += 1
+
+
+def series_scopes(client_id: uuid.UUID, sku_id: uuid.UUID) -> Tuple[str, ...]:
+    """Change-counter scopes a per-series result depends on: the series itself and bulk fact loads."""
+    return (crud.series_change_scope(client_id, sku_id), crud.CHANGE_SCOPE_FACTS)
+
+
+def _key(
+    name: str,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    params: Tuple,
+    scopes: Iterable[str],
+    counters: Dict[str, Tuple[int, datetime]]
+) -> str:
+    # Mismas versiones (y changed_at) que el ETag de conditional_get: cuerpo y ETag no pueden diferir
+    versions = crud.change_counters_fingerprint(scopes, counters)
+    return f"{name}:{client_id}:{sku_id}:{versions}:{params!r}"
+
+
+def _lookup(name: str, key: str) -> Any:
+    """Cached value of `key` (or None), counting the hit / miss."""
+    value = _local.get(key)
+    shared = _get_shared_backend()
+    if value is None and shared is not None:
+        try:
+            value = shared.get(key)
+        except Exception as e:
+            _count_shared_error(e)
+        if value is not None:
+            _local.set(key, value)
+    _count(name, "hits" if value is not None else "misses")
+    return value
+
+
+def _store(key: str, value: Any):
+    _local.set(key, value)
+    shared = _get_shared_backend()
+    if shared is not None:
+        try:
+            shared.set(key, value)
+        except Exception as e:
+            _count_shared_error(e)
+
+
+def get_or_compute(
+    name: str,
+    db: Session,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    params: Tuple,
+    compute: Callable[[], Any],
+    scopes: Optional[Iterable[str]] = None,
+    counters: Optional[Dict[str, Tuple[int, datetime]]] = None
+) -> Any:
+    """
+    Cached `compute()` for the series (client_id, sku_id). `name` identifies the kind of result and
+    `params` the rest of its arguments (hashable, with a stable repr). The entry is keyed on the
+    change-counter versions of `scopes` (default series_scopes), read from `db` unless the caller
+    already has them in `counters` (crud.get_change_counters read BEFORE the data). The cached value
+    is shared by every caller: it must not be mutated.
+    """
+    if not settings.RESULT_CACHE_ENABLED:
+        return compute()
+    scopes = tuple(scopes) if scopes is not None else series_scopes(client_id, sku_id)
+    if counters is None:
+        counters = crud.get_change_counters(db, scopes)
+    key = _key(name, client_id, sku_id, params, scopes, counters)
+    value = _lookup(name, key)
+    if value is None:
+        value = compute()
+        _store(key, value)
+    return value
+
+
+async def get_or_compute_async(
+    name: str,
+    db: AsyncSession,
+    client_id: uuid.UUID,
+    sku_id: uuid.UUID,
+    params: Tuple,
+    compute: Callable[[], Awaitable[Any]],
+    scopes: Optional[Iterable[str]] = None,
+    counters: Optional[Dict[str, Tuple[int, datetime]]] = None
+) -> Any:
+    """get_or_compute for a coroutine function `compute` (async endpoints). Same keys as get_or_compute."""
+    if not settings.RESULT_CACHE_ENABLED:
+        return await compute()
+    scopes = tuple(scopes) if scopes is not None else series_scopes(client_id, sku_id)
+    if counters is None:
+        counters = await crud.get_change_counters_async(db, scopes)
+    key = _key(name, client_id, sku_id, params, scopes, counters)
+    value = _lookup(name, key)
+    if value is None:
+        value = await compute()
+        _store(key, value)
+    return value
+
+
+def get_metrics() -> Dict[str, Any]:
+    """Hit / miss counters per kind of result, since the process started."""
+    with _metrics_lock:
+        results = {
+            name: {**counts, "hit_ratio": round(counts["hits"] / max(counts["hits"] + counts["misses"], 1), 4)}
+            for name, counts in _metrics.items()
+        }
+        counters = dict(_counters)
+    return {
+        "enabled": settings.RESULT_CACHE_ENABLED,
+        "backend": "local+shared" if _get_shared_backend() is not None else "local",
+        "local_entries": len(_local),
+        "results": results,
+        **counters,
+    }
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
 
-from .. import crud, schemas, models
+from .. import crud, schemas, models, conditional_get
 from ..database import get_db
 
 router = APIRouter(
@@ -19,7 +19,10 @@ def create_client(client: schemas.DimClientCreate, db: Session = Depends(get_db)
     return crud.create_client(db=db, client=client)
 
 @router.get("/", response_model=List[schemas.DimClient])
-def read_clients(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_clients(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    not_modified = conditional_get.check_not_modified(request, response, db, [crud.CHANGE_SCOPE_CLIENTS])
+    if not_modified:
+        return not_modified
     clients = crud.get_clients(db, skip=skip, limit=limit)
     return clients
 
@@ -0,0 +1,126 @@
+# backend/app/routers/jobs.py
+# Endpoints de la cola de trabajos en segundo plano (app/jobs.py): se encola el trabajo (202 con el
+# job_id), el cliente consulta el estado / progreso con GET /jobs/{job_id} y, cuando termina, pide el
+# resultado. Un trabajo en cola o en ejecución se puede cancelar.
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import os
+import shutil
+import tempfile
+import uuid
+import logging
+
+from .. import crud, jobs, schemas
+from ..config import settings
+from ..database import get_db
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"]
+)
+
+HISTORY_SOURCES = ['sales', 'order', 'shipments']
+MODEL_NAMES = ['ETS', 'ARIMA', 'AUTO']
+HISTORY_IMPORT_EXTENSIONS = ['.xlsx', '.csv', '.parquet']
+
+
+def _validate_forecast_params(history_source: str, model_name: str):
+    if history_source not in HISTORY_SOURCES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid history_source. Must be 'sales', 'order', or 'shipments'.")
+    if model_name not in MODEL_NAMES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid model_name. Must be 'ETS', 'ARIMA' or 'AUTO'.")
+
+def _get_job_or_404(db: Session, job_id: uuid.UUID):
+    db_job = jobs.get_job(db, job_id)
+    if db_job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return db_job
+
+
+@router.post("/forecast", response_model=schemas.Job, status_code=status.HTTP_202_ACCEPTED)
+def submit_forecast_job(job_request: schemas.ForecastJobRequest, db: Session = Depends(get_db)):
+    """Queues the statistical forecast of one Client-SKU pair (same parameters as /data/forecast/generate/)."""
+    _validate_forecast_params(job_request.history_source, job_request.model_name)
+    if not crud.get_client(db, client_id=job_request.client_id) or not crud.get_sku(db, sku_id=job_request.sku_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Client or SKU not found.")
+    return jobs.submit(db, "forecast", job_request.model_dump(), user_id=jobs.DEFAULT_USER_ID)
+
+@router.post("/forecast/batch", response_model=schemas.Job, status_code=status.HTTP_202_ACCEPTED)
+def submit_forecast_batch_job(batch_request: schemas.ForecastBatchRequest, db: Session = Depends(get_db)):
+    """Queues a batch forecast (same body as /data/forecast/generate/batch/); progress counts the series fitted."""
+    _validate_forecast_params(batch_request.history_source, batch_request.model_name)
+    return jobs.submit(db, "forecast_batch", batch_request.model_dump(), user_id=jobs.DEFAULT_USER_ID)
+
+@router.post("/forecast-version", response_model=schemas.Job, status_code=status.HTTP_202_ACCEPTED)
+def submit_forecast_version_job(version_request: schemas.ForecastVersionSnapshotRequest, db: Session = Depends(get_db)):
+    """
+    Queues a snapshot of the client's current forecast (statistical and Final Forecast) into a new
+    forecast version. The result has the version_id and the number of versioned cells.
+    """
+    if version_request.history_source_used not in ['sales', 'shipments']:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid history_source_used. Must be 'sales' or 'shipments'.")
+    if not crud.get_client(db, client_id=version_request.client_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Client not found.")
+    return jobs.submit(db, "forecast_version", version_request.model_dump(), user_id=version_request.user_id)
+
+@router.post("/history-import", response_model=schemas.Job, status_code=status.HTTP_202_ACCEPTED)
+def submit_history_import_job(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    Queues the import of a history extract (.xlsx, .csv or .parquet, same layout as
+    migrate_data.py). The upload is saved to JOB_FILES_DIR (or the temp dir) until the job runs.
+    """
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if extension not in HISTORY_IMPORT_EXTENSIONS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid file type. Must be .xlsx, .csv or .parquet.")
+    # El directorio debe ser visible para los workers de todos los procesos del backend
+    path = os.path.join(settings.JOB_FILES_DIR or tempfile.gettempdir(), f"history-import-{uuid.uuid4()}{extension}")
+    with open(path, "wb") as destination:
+        shutil.copyfileobj(file.file, destination)
+    try:
+        return jobs.submit(db, "history_import", {"path": path, "filename": file.filename}, user_id=jobs.DEFAULT_USER_ID)
+    except Exception:
+        os.remove(path)
+        raise
+
+@router.post("/accuracy", response_model=schemas.Job, status_code=status.HTTP_202_ACCEPTED)
+def submit_accuracy_job(accuracy_request: schemas.AccuracyRefreshRequest, db: Session = Depends(get_db)):
+    """Queues the recomputation of the forecast accuracy metrics served by GET /data/accuracy/."""
+    return jobs.submit(db, "accuracy", accuracy_request.model_dump(), user_id=jobs.DEFAULT_USER_ID)
+
+@router.get("/", response_model=List[schemas.Job])
+def read_jobs(
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by status (queued, running, succeeded, failed, cancelled)"),
+    kind: Optional[str] = Query(None, description="Filter by job kind"),
+    skip: int = 0, limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    return jobs.get_jobs(db, status=status_filter, kind=kind, skip=skip, limit=limit)
+
+@router.get("/{job_id}", response_model=schemas.Job)
+def read_job(job_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Status and progress of a job."""
+    return _get_job_or_404(db, job_id)
+
+@router.post("/{job_id}/cancel", response_model=schemas.Job)
+def cancel_job(job_id: uuid.UUID, db: Session = Depends(get_db)):
+    """
+    Cancels a queued job, or asks a running one to stop: it ends as 'cancelled' at its next progress
+    update and its changes are rolled back. Jobs only check before saving (a forecast, until its
+    model is fitted); a job that is already writing its results ignores the request and succeeds.
+    """
+    db_job = _get_job_or_404(db, job_id)
+    if db_job.status in jobs.FINISHED_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job already {db_job.status}.")
+    return jobs.cancel(db, job_id)
+
+@router.get("/{job_id}/result", response_model=schemas.JobResult)
+def read_job_result(job_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Result of a finished job (null unless it succeeded; see `error` in GET /jobs/{job_id})."""
+    db_job = _get_job_or_404(db, job_id)
+    if db_job.status not in jobs.FINISHED_STATUSES:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is still {db_job.status}.")
+    return {"job_id": db_job.job_id, "status": db_job.status, "result": db_job.result}
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
 
-from .. import crud, schemas, models
+from .. import crud, schemas, models, conditional_get
 from ..database import get_db
 
 router = APIRouter(
@@ -23,7 +23,10 @@ def create_key_figure(key_figure: schemas.DimKeyFigureCreate, db: Session = Depe
     return crud.create_key_figure(db=db, key_figure=key_figure)
 
 @router.get("/", response_model=List[schemas.DimKeyFigure])
-def read_key_figures(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_key_figures(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    not_modified = conditional_get.check_not_modified(request, response, db, [crud.CHANGE_SCOPE_KEY_FIGURES])
+    if not_modified:
+        return not_modified
     key_figures = crud.get_key_figures(db, skip=skip, limit=limit)
     return key_figures
 
@@ -1,15 +1,16 @@
 # backend/app/routers/sales_forecast.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import date, datetime
 import uuid
 import logging
-from collections import defaultdict
 
-from .. import crud, schemas, models, forecast_engine
-from ..database import get_db
+from .. import crud, schemas, models, forecast_engine, grid_service, result_cache, conditional_get, pool_metrics, accuracy
+from ..database import get_db, get_async_db, SessionLocal
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +29,31 @@ def validate_uuid_param(uuid_str: str, param_name: str):
             detail=f"Invalid format for {param_name}. Must be a valid UUID string."
         )
 
+# --- Paginación por keyset de los listados de hechos ---
+# Los listados devuelven la lista de siempre; si la página está completa, el header X-Next-Page-Token
+# trae el token para pedir la siguiente (?page_token=...). Con el token cada página cuesta lo mismo,
+# sin importar cuántas filas haya antes (skip/OFFSET sigue funcionando para los clientes existentes).
+NEXT_PAGE_TOKEN_HEADER = "X-Next-Page-Token"
+PAGE_TOKEN_QUERY = Query(None, description=f"Continuation token from the {NEXT_PAGE_TOKEN_HEADER} header of the previous page")
+
+def decode_page_token_param(model, page_token: Optional[str], skip: int):
+    if page_token is None:
+        return None
+    if skip:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_token and skip cannot be combined.")
+    try:
+        return crud.decode_page_token(model, page_token)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def set_next_page_token(response: Response, model, rows: List[Any], limit: int):
+    token = crud.next_page_token(model, rows, limit)
+    if token:
+        response.headers[NEXT_PAGE_TOKEN_HEADER] = token
+
 # --- Endpoints para FactHistory ---
 @router.get("/history/", response_model=List[schemas.FactHistory])
-def read_history_data(
+async def read_history_data(
     client_ids: List[str] = Query([], description="Filter by client UUIDs"),
     sku_ids: List[str] = Query([], description="Filter by SKU UUIDs"),
     start_period: Optional[date] = Query(None, description="Filter data from this period (YYYY-MM-DD)"),
@@ -39,16 +62,20 @@ def read_history_data(
     sources: List[str] = Query([], description="Filter by source (e.g., 'sales', 'order')"),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    page_token: Optional[str] = PAGE_TOKEN_QUERY,
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrieve historical sales data with various filters.
+    Retrieve historical sales data with various filters, ordered by primary key.
+    Async endpoint: waits for the database without holding a threadpool thread.
     """
+    page_after = decode_page_token_param(models.FactHistory, page_token, skip)
     # Validar y convertir UUIDs
     validated_client_ids = [validate_uuid_param(uid, "client_id") for uid in client_ids] if client_ids else None
     validated_sku_ids = [validate_uuid_param(uid, "sku_id") for uid in sku_ids] if sku_ids else None
 
-    data = crud.get_fact_history_data(
+    data = await crud.get_fact_history_data_async(
         db,
         client_ids=validated_client_ids,
         sku_ids=validated_sku_ids,
@@ -57,10 +84,12 @@ def read_history_data(
         key_figure_ids=key_figure_ids,
         sources=sources,
         skip=skip,
-        limit=limit
+        limit=limit,
+        page_after=page_after
     )
-    if not data:
+    if not data and page_after is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No historical data found matching criteria")
+    set_next_page_token(response, models.FactHistory, data, limit)
     return data
 
 @router.post("/history/", response_model=schemas.FactHistory, status_code=status.HTTP_201_CREATED)
@@ -164,13 +193,17 @@ def generate_forecast_api(
     sku_id_str: str = Query(..., alias="skuId", description="SKU UUID for which to generate forecast"),
     history_source: str = Query(..., alias="historySource", description="Source of historical data ('sales', 'shipments', or 'order')"), 
     smoothing_alpha: float = Query(0.5, ge=0.0, le=1.0, description="Alpha parameter for exponential smoothing (0.0 to 1.0)"),
-    model_name: str = Query("ETS", description="Statistical model to use for forecast (e.g., 'ETS', 'ARIMA')"),
+    model_name: str = Query("ETS", description="Statistical model to use for forecast ('ETS', 'ARIMA', or 'AUTO' to pick the best candidate on a holdout)"),
     forecast_horizon: int = Query(12, ge=1, description="Number of periods to forecast ahead"),
+    refit: bool = Query(False, description="Refit the model even when a stored fit for the same history can be reused"),
     db: Session = Depends(get_db)
 ):
     """
     Triggers the generation of a statistical forecast for a given SKU-Client.
     The generated forecast is stored in fact_forecast_stat.
+    Runs inside the request; POST /jobs/forecast runs it in the background with progress.
+    Reuses the last stored fit of the series when the history did not change or only gained new
+    months (`fit_mode` in the result); `refit=true` always fits the model again.
     """
     logger.info(f"Raw query params received: {request.query_params}")
 
@@ -196,7 +229,8 @@ def generate_forecast_api(
             smoothing_alpha=smoothing_alpha,
             model_name=model_name,
             forecast_horizon=forecast_horizon,
-            user_id=user_id 
+            user_id=user_id,
+            refit=refit
         )
         return {"message": "Pronóstico generado y guardado exitosamente", "result": result}
     except RuntimeError as e:
@@ -205,22 +239,94 @@ def generate_forecast_api(
         logger.error(f"Error during forecast generation: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred during forecast generation: {e}")
 
+# --- Endpoint para generar Forecast Estadístico por lotes (muchos pares Cliente-SKU) ---
+@router.post("/forecast/generate/batch/", response_model=dict, status_code=status.HTTP_201_CREATED)
+def generate_forecast_batch_api(
+    batch_request: schemas.ForecastBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generates statistical forecasts for every Client-SKU pair with history in the selection.
+    Empty client_ids / sku_ids mean all clients / SKUs.
+    Returns the number of series processed and the throughput (series per second).
+    Series whose input did not change since their last batch run are skipped (`series_skipped`)
+    unless refit is true.
+    Runs inside the request; POST /jobs/forecast/batch runs it in the background with progress.
+    """
+    if batch_request.history_source not in ['sales', 'order', 'shipments']:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid history_source. Must be 'sales', 'order', or 'shipments'.")
+    if batch_request.model_name not in ['ETS', 'ARIMA', 'AUTO']:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid model_name. Must be 'ETS', 'ARIMA' or 'AUTO'.")
+
+    user_id = uuid.UUID('00000000-0000-0000-0000-000000000001') 
+
+    try:
+        result = forecast_engine.generate_forecast_batch(
+            db=db,
+            client_ids=batch_request.client_ids or None,
+            sku_ids=batch_request.sku_ids or None,
+            history_source=batch_request.history_source,
+            smoothing_alpha=batch_request.smoothing_alpha,
+            model_name=batch_request.model_name,
+            forecast_horizon=batch_request.forecast_horizon,
+            user_id=user_id,
+            refit=batch_request.refit
+        )
+        return {"message": "Pronósticos por lotes generados y guardados exitosamente", "result": result}
+    except Exception as e:
+        logger.error(f"Error during batch forecast generation: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An unexpected error occurred during batch forecast generation: {e}")
+
 # --- Endpoints para FactForecastStat ---
 @router.get("/forecast_stat/", response_model=List[schemas.FactForecastStat])
-def read_forecast_stat_data_api(
+async def read_forecast_stat_data_api(
     client_ids: List[str] = Query([], description="Filter by client UUIDs"),
     sku_ids: List[str] = Query([], description="Filter by SKU UUIDs"),
     start_period: Optional[date] = Query(None, description="Filter data from this period (YYYY-MM-DD)"),
     end_period: Optional[date] = Query(None, description="Filter data up to this period (YYYY-MM-DD)"),
     forecast_run_ids: List[str] = Query([], description="Filter by specific forecast run UUIDs"),
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    skip: int = 0, limit: int = 100,
+    page_token: Optional[str] = PAGE_TOKEN_QUERY,
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Validar y convertir UUIDs
     validated_client_ids = [validate_uuid_param(uid, "client_id") for uid in client_ids] if client_ids else None
     validated_sku_ids = [validate_uuid_param(uid, "sku_id") for uid in sku_ids] if sku_ids else None
     validated_forecast_run_ids = [validate_uuid_param(uid, "forecast_run_id") for uid in forecast_run_ids] if forecast_run_ids else None
+    page_after = decode_page_token_param(models.FactForecastStat, page_token, skip)
+
+    data = await crud.get_fact_forecast_stat_data_async(
+        db, client_ids=validated_client_ids, sku_ids=validated_sku_ids, start_period=start_period,
+        end_period=end_period, forecast_run_ids=validated_forecast_run_ids,
+        skip=skip, limit=limit, page_after=page_after
+    )
+    set_next_page_token(response, models.FactForecastStat, data, limit)
+    return data
+
+@router.get("/adjustments/", response_model=List[schemas.FactAdjustments])
+def read_adjustments_data_api(
+    client_ids: List[str] = Query([], description="Filter by client UUIDs"),
+    sku_ids: List[str] = Query([], description="Filter by SKU UUIDs"),
+    start_period: Optional[date] = Query(None, description="Filter data from this period (YYYY-MM-DD)"),
+    end_period: Optional[date] = Query(None, description="Filter data up to this period (YYYY-MM-DD)"),
+    key_figure_ids: List[int] = Query([], description="Filter by KeyFigure IDs"),
+    adjustment_type_ids: List[int] = Query([], description="Filter by adjustment type IDs"),
+    skip: int = 0, limit: int = 100,
+    page_token: Optional[str] = PAGE_TOKEN_QUERY,
+    response: Response = None,
+    db: Session = Depends(get_db)
+):
+    # Validar y convertir UUIDs
+    validated_client_ids = [validate_uuid_param(uid, "client_id") for uid in client_ids] if client_ids else None
+    validated_sku_ids = [validate_uuid_param(uid, "sku_id") for uid in sku_ids] if sku_ids else None
+    page_after = decode_page_token_param(models.FactAdjustments, page_token, skip)
 
-    data = crud.get_fact_forecast_stat_data(db, validated_client_ids, validated_sku_ids, start_period, end_period, validated_forecast_run_ids, skip, limit)
+    data = crud.get_fact_adjustments_data(
+        db, validated_client_ids, validated_sku_ids, start_period, end_period, key_figure_ids, adjustment_type_ids,
+        skip=skip, limit=limit, page_after=page_after
+    )
+    set_next_page_token(response, models.FactAdjustments, data, limit)
     return data
 
 @router.post("/adjustments/", response_model=schemas.FactAdjustments, status_code=status.HTTP_201_CREATED)
@@ -244,6 +350,37 @@ def create_adjustment_api(
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to create or update adjustment: {e}")
 
+@router.post("/adjustments/bulk/", response_model=schemas.FactAdjustmentsBulkResponse)
+def create_adjustments_bulk_api(
+    request: schemas.FactAdjustmentsBulkCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Inserta o actualiza muchas celdas de ajuste en un solo request (p.ej. una fila pegada en la grilla).
+    Las referencias se validan en una consulta, todas las celdas se escriben con un único upsert y un
+    solo commit, y se devuelve el resultado de cada celda.
+    """
+    user_id_for_adjustment = uuid.UUID('00000000-0000-0000-0000-000000000001') # Placeholder
+
+    try:
+        results = crud.upsert_fact_adjustments_batch(
+            db=db, adjustments=request.adjustments, default_user_id=user_id_for_adjustment
+        )
+    except Exception as e:
+        logger.error(f"Error in bulk adjustments: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to create or update adjustments: {e}")
+
+    inserted = sum(1 for r in results if r["status"] == "inserted")
+    updated = sum(1 for r in results if r["status"] == "updated")
+    failed = sum(1 for r in results if r["status"] == "error")
+    return {
+        "message": f"{inserted + updated} adjustments saved ({inserted} inserted, {updated} updated), {failed} failed.",
+        "inserted": inserted,
+        "updated": updated,
+        "failed": failed,
+        "results": results
+    }
+
 # --- Endpoints para FactForecastVersioned ---
 @router.get("/forecast/versioned/", response_model=List[schemas.FactForecastVersioned])
 def read_forecast_versioned_data_api(
@@ -253,344 +390,163 @@ def read_forecast_versioned_data_api(
     start_period: Optional[date] = Query(None, description="Filter data from this period (YYYY-MM-DD)"),
     end_period: Optional[date] = Query(None, description="Filter data up to this period (YYYY-MM-DD)"),
     key_figure_ids: List[int] = Query([], description="Filter by KeyFigure IDs"),
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    skip: int = 0, limit: int = 100,
+    page_token: Optional[str] = PAGE_TOKEN_QUERY,
+    response: Response = None,
+    db: Session = Depends(get_db)
 ):
     # Validar y convertir UUIDs
     validated_version_ids = [validate_uuid_param(uid, "version_id") for uid in version_ids] if version_ids else None
     validated_client_ids = [validate_uuid_param(uid, "client_id") for uid in client_ids] if client_ids else None
     validated_sku_ids = [validate_uuid_param(uid, "sku_id") for uid in sku_ids] if sku_ids else None
+    page_after = decode_page_token_param(models.FactForecastVersioned, page_token, skip)
 
-    data = crud.get_fact_forecast_versioned_data(db, validated_version_ids, validated_client_ids, validated_sku_ids, start_period, end_period, key_figure_ids, skip, limit)
+    data = crud.get_fact_forecast_versioned_data(
+        db, validated_version_ids, validated_client_ids, validated_sku_ids, start_period, end_period, key_figure_ids,
+        skip=skip, limit=limit, page_after=page_after
+    )
+    set_next_page_token(response, models.FactForecastVersioned, data, limit)
     return data
 
+# --- Endpoint para métricas de precisión de los pronósticos ---
+@router.get("/accuracy/", response_model=List[schemas.ForecastAccuracy])
+def read_forecast_accuracy_api(
+    level: str = Query("total", description="Aggregation level: 'series', 'client' or 'total'"),
+    forecast_source: Optional[str] = Query(None, description="'stat' (fact_forecast_stat) or 'versioned' (fact_forecast_versioned)"),
+    key_figure_ids: List[int] = Query([], description="Filter by forecasted KeyFigure IDs (6, 7, 8)"),
+    lags: List[int] = Query([], description="Filter by lag (months between forecast creation and period)"),
+    client_ids: List[str] = Query([], description="Filter by client UUIDs"),
+    sku_ids: List[str] = Query([], description="Filter by SKU UUIDs"),
+    skip: int = 0, limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """
+    WAPE, MAPE and bias of past forecasts against the actuals, per lag, as of the last accuracy run
+    (POST /jobs/accuracy or compute_accuracy.py).
+    """
+    if level not in accuracy.LEVELS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid level. Must be 'series', 'client', or 'total'.")
+    if forecast_source is not None and forecast_source not in accuracy.FORECAST_SOURCES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid forecast_source. Must be 'stat' or 'versioned'.")
+    validated_client_ids = [validate_uuid_param(uid, "client_id") for uid in client_ids] if client_ids else None
+    validated_sku_ids = [validate_uuid_param(uid, "sku_id") for uid in sku_ids] if sku_ids else None
+    return crud.get_forecast_accuracy(
+        db, level, forecast_source, key_figure_ids, lags, validated_client_ids, validated_sku_ids, skip=skip, limit=limit
+    )
+
+# --- Exportación masiva (Parquet / Arrow IPC) para BI ---
+@router.get("/export/{dataset}")
+def export_dataset_api(
+    dataset: str,
+    format: str = Query("parquet", description="'parquet' or 'arrow' (Arrow IPC stream)"),
+    client_ids: List[str] = Query([], description="Filter by client UUIDs"),
+    sku_ids: List[str] = Query([], description="Filter by SKU UUIDs"),
+    start_period: Optional[date] = Query(None, description="Filter data from this period (YYYY-MM-DD)"),
+    end_period: Optional[date] = Query(None, description="Filter data up to this period (YYYY-MM-DD)"),
+    key_figure_ids: List[int] = Query([], description="Filter by KeyFigure IDs"),
+    sources: List[str] = Query([], description="history only: filter by source"),
+    forecast_run_ids: List[str] = Query([], description="forecast_stat only: filter by forecast run UUIDs"),
+    version_ids: List[str] = Query([], description="forecast_versioned only: filter by version UUIDs")
+):
+    """
+    Streams a whole fact cube (history, forecast_stat, forecast_versioned, final_forecast) as
+    Parquet or Arrow IPC, read in batches from a server-side cursor (no limit, constant memory).
+    Client, SKU and key figure ids/names are dictionary-encoded.
+    """
+    from .. import fact_exporter  # pyarrow se carga con la primera exportación, no al arrancar el worker
+
+    filters = {
+        "client_ids": [validate_uuid_param(uid, "client_id") for uid in client_ids],
+        "sku_ids": [validate_uuid_param(uid, "sku_id") for uid in sku_ids],
+        "start_period": start_period,
+        "end_period": end_period,
+        "key_figure_ids": key_figure_ids,
+        "sources": sources,
+        "forecast_run_ids": [validate_uuid_param(uid, "forecast_run_id") for uid in forecast_run_ids],
+        "version_ids": [validate_uuid_param(uid, "version_id") for uid in version_ids],
+    }
+    try:
+        fact_exporter.build_export_query(dataset, filters)
+        media_type, extension = fact_exporter.EXPORT_FORMATS[format]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown format '{format}'. Valid formats: {', '.join(fact_exporter.EXPORT_FORMATS)}.")
+
+    def stream_export():
+        # Sesión propia: la de Depends(get_db) se cierra antes de que termine de enviarse la respuesta
+        db = SessionLocal()
+        try:
+            yield from fact_exporter.iter_export_bytes(crud.get_raw_connection(db), dataset, format, filters)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream_export(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'}
+    )
+
 # --- NUEVO Endpoint para proveer datos a la tabla AG-Grid ---
 # ...existing code...
 
 @router.get("/sales_forecast_data", response_model=Dict[str, Any])
-def get_sales_forecast_data_for_grid(
+async def get_sales_forecast_data_for_grid(
+    request: Request,
+    response: Response,
     client_id: uuid.UUID = Query(..., description="Client UUID"),
     sku_id: uuid.UUID = Query(..., description="SKU UUID"),
     client_final_id: uuid.UUID = Query(..., description="Client Final ID"), # Should be same as client_id for now
     start_period: date = Query(..., description="Start period (YYYY-MM-DD)"),
     end_period: date = Query(..., description="End period (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Retrieves and transforms sales and forecast data for AG-Grid display.
     Combines raw history, clean history, statistical forecast, and final forecast.
+    All facts are read in a single query (see grid_service). Supports If-None-Match: while the
+    client/SKU (and the dimensions) have not changed the answer is a 304 without reading any fact.
+    The body is cached under the same change-counter versions as the ETag, so they always match.
+    Async endpoint on asyncpg (grid_service.get_grid_data_async).
     """
+    not_modified = await conditional_get.check_not_modified_async(
+        request, response, db, grid_service.grid_change_scopes(client_id, sku_id)
+    )
+    if not_modified:
+        return not_modified
     logger.info(f"--- get_sales_forecast_data_for_grid called for Client: {client_id}, SKU: {sku_id}, Period: {start_period} to {end_period} ---")
     try:
-        # Fetch all relevant DimKeyFigures for mapping and order
-        all_dim_key_figures = crud.get_key_figures(db)
-        key_figure_name_map = {kf.key_figure_id: kf.name for kf in all_dim_key_figures}
-        key_figure_order_map = {kf.name: kf.order for kf in all_dim_key_figures}
-        logger.info(f"Fetched {len(all_dim_key_figures)} dim_keyfigures.")
-
-        # 1. Fetch data from all relevant tables
-        history_raw_data = crud.get_fact_history_data(
-            db=db,
-            client_ids=[client_id],
-            sku_ids=[sku_id],
-            start_period=start_period,
-            end_period=end_period,
-            sources=['sales', 'order', 'shipments'],
-            key_figure_ids=[schemas.KEY_FIGURE_SALES_ID, schemas.KEY_FIGURE_ORDERS_ID] # Fetch Sales and Orders raw
-        )
-        logger.info(f"Fetched {len(history_raw_data)} raw history records (Sales/Orders).")
-
-        history_smoothed_sales_data = crud.get_fact_history_data(
-            db=db,
-            client_ids=[client_id],
-            sku_ids=[sku_id],
-            start_period=start_period,
-            end_period=end_period,
-            sources=['sales'], # Smoothed sales is from sales source
-            key_figure_ids=[schemas.KEY_FIGURE_SMOOTHED_SALES_ID]
-        )
-        logger.info(f"Fetched {len(history_smoothed_sales_data)} smoothed sales history records (KF_SMOOTHED_SALES).")
-
-        history_smoothed_orders_data = crud.get_fact_history_data(
-            db=db,
-            client_ids=[client_id],
-            sku_ids=[sku_id],
-            start_period=start_period,
-            end_period=end_period,
-            sources=['order', 'shipments'], # Smoothed orders is from order/shipments source
-            key_figure_ids=[schemas.KEY_FIGURE_SMOOTHED_ORDERS_ID]
-        )
-        logger.info(f"Fetched {len(history_smoothed_orders_data)} smoothed orders history records (KF_SMOOTHED_ORDERS).")
-
-        # 1. Obtén los datos originales
-        forecast_stat_sales_data = crud.get_fact_forecast_stat_data(
-            db=db,
-            client_ids=[client_id],
-            sku_ids=[sku_id],
-            start_period=start_period,
-            end_period=end_period,
-            key_figure_ids=[schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID]
-        )
-        logger.info(f"Fetched {len(forecast_stat_sales_data)} statistical forecast sales records.")
-
-        forecast_stat_orders_data = crud.get_fact_forecast_stat_data(
-            db=db,
-            client_ids=[client_id],
-            sku_ids=[sku_id],
-            start_period=start_period,
-            end_period=end_period,
-            key_figure_ids=[schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID]
-        )
-        logger.info(f"Fetched {len(forecast_stat_orders_data)} statistical forecast orders records.")
-
-
-        manual_input_data = forecast_engine.calculate_manual_input_history( # Nuevo nombre de función
+        return await grid_service.get_grid_data_async(
             db=db,
             client_id=client_id,
             sku_id=sku_id,
             client_final_id=client_final_id,
             start_period=start_period,
-            end_period=end_period
-        )
-        logger.info(f"Fetched {len(manual_input_data)} manual input history records.")
-
-        final_forecast_data = forecast_engine.calculate_final_forecast(
-            db=db,
-            client_id=client_id,
-            sku_id=sku_id,
-            client_final_id=client_final_id,
-            start_period=start_period,
-            end_period=end_period
-        )
-        logger.info(f"Fetched {len(final_forecast_data)} final forecast records.")
-
-        all_comments = crud.get_manual_input_comment_data(
-            db=db,
-            client_ids=[client_id],
-            sku_ids=[sku_id],
-            start_period=start_period,
-            end_period=end_period
-        )
-        logger.info(f"Fetched {len(all_comments)} comment records.")
-        
-        manual_adj_qty_values = crud.get_fact_adjustments_for_calculation(
-            db=db, client_id=client_id, sku_id=sku_id, start_period=start_period, end_period=end_period,
-            key_figure_id=schemas.KEY_FIGURE_FINAL_FORECAST_ID, adjustment_type_ids=[schemas.ADJUSTMENT_TYPE_QTY_ID] # Ajustes a Final Forecast
-        )
-        logger.info(f"Fetched {len(manual_adj_qty_values)} manual quantity adjustment records.")
-
-        manual_adj_pct_values = crud.get_fact_adjustments_for_calculation(
-            db=db, client_id=client_id, sku_id=sku_id, start_period=start_period, end_period=end_period,
-            key_figure_id=schemas.KEY_FIGURE_FINAL_FORECAST_ID, adjustment_type_ids=[schemas.ADJUSTMENT_TYPE_PCT_ID] # Ajustes a Final Forecast
-        )
-        logger.info(f"Fetched {len(manual_adj_pct_values)} manual percentage adjustment records.")
-
-        override_values = crud.get_fact_adjustments_for_calculation(
-            db=db, client_id=client_id, sku_id=sku_id, start_period=start_period, end_period=end_period,
-            key_figure_id=schemas.KEY_FIGURE_FINAL_FORECAST_ID, # Override a Final Forecast
-            adjustment_type_ids=[schemas.ADJUSTMENT_TYPE_OVERRIDE_ID]
-        )
-        logger.info(f"Fetched {len(override_values)} override adjustment records.")
-
-
-        # 2. Consolidate all data into a flat list of dictionaries with consistent keys
-        consolidated_data = []
-
-        # Process Sales (raw history)
-        for item in history_raw_data:
-            if item.source == 'sales': # Solo Sales como figura clave 'Sales'
-                consolidated_data.append({
-                    "client_id": item.client_id, "sku_id": item.sku_id, "client_final_id": item.client_final_id,
-                    "period": item.period, "key_figure_id": schemas.KEY_FIGURE_SALES_ID,
-                    "key_figure_name": key_figure_name_map.get(schemas.KEY_FIGURE_SALES_ID, "Sales"),
-                    "value": item.value
-                })
-            elif item.source == 'order' or item.source == 'shipments': # Orders/Shipments como figura clave 'Orders'
-                consolidated_data.append({
-                    "client_id": item.client_id, "sku_id": item.sku_id, "client_final_id": item.client_final_id,
-                    "period": item.period, "key_figure_id": schemas.KEY_FIGURE_ORDERS_ID,
-                    "key_figure_name": key_figure_name_map.get(schemas.KEY_FIGURE_ORDERS_ID, "Orders"),
-                    "value": item.value
-                })
-
-        # Process Smoothed Sales
-        for item in history_smoothed_sales_data:
-            consolidated_data.append({
-                "client_id": item.client_id, "sku_id": item.sku_id, "client_final_id": item.client_final_id,
-                "period": item.period, "key_figure_id": schemas.KEY_FIGURE_SMOOTHED_SALES_ID,
-                "key_figure_name": key_figure_name_map.get(schemas.KEY_FIGURE_SMOOTHED_SALES_ID, "Smoothed Sales"),
-                "value": item.value
-            })
-        # Process Smoothed Orders
-        for item in history_smoothed_orders_data:
-            consolidated_data.append({
-                "client_id": item.client_id, "sku_id": item.sku_id, "client_final_id": item.client_final_id,
-                "period": item.period, "key_figure_id": schemas.KEY_FIGURE_SMOOTHED_ORDERS_ID,
-                "key_figure_name": key_figure_name_map.get(schemas.KEY_FIGURE_SMOOTHED_ORDERS_ID, "Smoothed Orders"),
-                "value": item.value
-            })
-        # 2. Obtén los overrides para ambos Key Figures
-        stat_sales_overrides = crud.get_fact_adjustments_for_calculation(
-            db=db,
-            client_id=client_id,
-            sku_id=sku_id,
-            start_period=start_period,
-            end_period=end_period,
-            key_figure_id=schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID,
-            adjustment_type_ids=[schemas.ADJUSTMENT_TYPE_OVERRIDE_ID]
-        )
-        stat_orders_overrides = crud.get_fact_adjustments_for_calculation(
-            db=db,
-            client_id=client_id,
-            sku_id=sku_id,
-            start_period=start_period,
             end_period=end_period,
-            key_figure_id=schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID,
-            adjustment_type_ids=[schemas.ADJUSTMENT_TYPE_OVERRIDE_ID]
-        )
-        stat_sales_overrides_map = {adj.period: adj.value for adj in stat_sales_overrides}
-        stat_orders_overrides_map = {adj.period: adj.value for adj in stat_orders_overrides}
-
-
-        # 3. Al consolidar los datos, aplica el override si existe
-        # Para "Statistical forecast Sales"
-        for item in forecast_stat_sales_data:
-            value_to_use = stat_sales_overrides_map.get(item.period, item.value)
-            consolidated_data.append({
-                "client_id": item.client_id, "sku_id": item.sku_id, "client_final_id": item.client_final_id,
-                "period": item.period, "key_figure_id": schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, 
-                "key_figure_name": key_figure_name_map.get(schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, "Statistical forecast Sales"),
-                "value": value_to_use
-            })
-        # Para "Statistical forecast Orders"
-        for item in forecast_stat_orders_data:
-            value_to_use = stat_orders_overrides_map.get(item.period, item.value)
-            consolidated_data.append({
-                "client_id": item.client_id, "sku_id": item.sku_id, "client_final_id": item.client_final_id,
-                "period": item.period, "key_figure_id": schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID, 
-                "key_figure_name": key_figure_name_map.get(schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID, "Statistical forecast Orders"),
-                "value": value_to_use
-            })
-        
-        # Process Manual input (from clean_history_data)
-        for item in manual_input_data: # clean_history_data from forecast_engine.calculate_manual_input_history
-            consolidated_data.append({
-                "client_id": item.client_id, "sku_id": item.sku_id, "client_final_id": item.client_final_id,
-                "period": item.period, "key_figure_id": schemas.KEY_FIGURE_MANUAL_INPUT_ID, 
-                "key_figure_name": key_figure_name_map.get(schemas.KEY_FIGURE_MANUAL_INPUT_ID, "Manual input"),
-                "value": item.value
-            })
-
-        # Process FinalForecastData 
-        for item in final_forecast_data:
-            consolidated_data.append({
-                "client_id": item.client_id, "sku_id": item.sku_id, "client_final_id": item.client_final_id,
-                "period": item.period, "key_figure_id": schemas.KEY_FIGURE_FINAL_FORECAST_ID, 
-                "key_figure_name": key_figure_name_map.get(schemas.KEY_FIGURE_FINAL_FORECAST_ID, "Final Forecast"),
-                "value": item.value
-            })
-        
-        logger.info(f"Consolidated data count: {len(consolidated_data)} records.")
-
-
-        if not consolidated_data:
-            logger.info("No consolidated data, returning empty rows and columns.")
-            return {"rows": [], "columns": []}
-
-        # 3. Prepare data for pivoting into rows and columns
-        unique_periods = sorted(list(set(item["period"] for item in consolidated_data)))
-        logger.info(f"Unique periods found: {len(unique_periods)}.")
-        
-        sorted_key_figure_names_for_rows = sorted(
-            list(set(item["key_figure_name"] for item in consolidated_data)),
-            key=lambda name: key_figure_order_map.get(name, 999) 
+            counters=request.state.change_counters
         )
-        logger.info(f"Sorted key figure names for rows: {len(sorted_key_figure_names_for_rows)}.")
-
-        # Map for comments to quickly check if a cell has comments
-        comments_map_for_grid = defaultdict(bool)
-        for comment in all_comments:
-            key = f"{comment.client_id}-{comment.sku_id}-{comment.period.isoformat()}-{comment.key_figure_id}"
-            comments_map_for_grid[key] = True
-        logger.info(f"Comments map populated with {len(comments_map_for_grid)} entries.")
-
-        # IDs de históricos y pronóstico
-        HISTORICAL_KF_IDS = [1, 2, 3, 4, 5]
-        FORECAST_KF_IDS = [6, 7, 8]
-
-        # Al armar las filas para la grilla:
-        all_kf_ids = HISTORICAL_KF_IDS + FORECAST_KF_IDS
-        all_kf_names = [key_figure_name_map[kf_id] for kf_id in all_kf_ids]
-
-
-        grid_rows_final = []
-        for kf_id in all_kf_ids:
-            kf_name = key_figure_name_map[kf_id]
-            current_row = {
-                "keyFigureName": kf_name,
-                "client_id": client_id,
-                "sku_id": sku_id,
-                "client_final_id": client_final_id,
-                "clientName": crud.get_client(db, client_id).client_name if crud.get_client(db, client_id) else "N/A",
-                "skuName": crud.get_sku(db, sku_id).sku_name if crud.get_sku(db, sku_id) else "N/A"
-            }
-            for period in unique_periods:
-                period_iso = period.isoformat()
-                data_field_name = f"date_{period_iso}"
-
-                # Para históricos: siempre mostrar lo que haya
-                if kf_id in HISTORICAL_KF_IDS:
-                    value_for_cell = next(
-                        (item["value"] for item in consolidated_data 
-                        if item["key_figure_id"] == kf_id and item["period"] == period),
-                        None
-                    )
-                    current_row[data_field_name] = value_for_cell
-
-                # Para forecast: solo mostrar si hay forecast generado
-                elif kf_id in FORECAST_KF_IDS:
-                    value_for_cell = next(
-                        (item["value"] for item in consolidated_data 
-                        if item["key_figure_id"] == kf_id and item["period"] == period),
-                        None
-                    )
-                    # Solo mostrar si hay forecast generado (es decir, si value_for_cell no es None)
-                    current_row[data_field_name] = value_for_cell if value_for_cell is not None else None
-
-                # ... lógica para comentarios, etc ...
-            grid_rows_final.append(current_row)
-            logger.info(f"Final grid rows generated: {len(grid_rows_final)} rows.")
-
-        # --- AJUSTE: Generar columnas: Key Figure + meses ---
-        dynamic_columns_for_grid = [
-            {
-                "headerName": "Key Figure",
-                "field": "keyFigureName",
-                "pinned": "left",
-                "editable": False  # El frontend decide si es editable
-            }
-        ]
-        for period in unique_periods:
-            period_iso = period.isoformat()
-            period_header = period.strftime('%b %Y')
-            dynamic_columns_for_grid.append({
-                "headerName": period_header,
-                "field": f"date_{period_iso}",
-                "colId": f"date_{period_iso}",
-                # "editable": False,  # El frontend decide si es editable
-                "type": "numericColumn"
-            })
-
-        logger.info(f"Dynamic columns generated: {len(dynamic_columns_for_grid)} columns.")
-
-        return {
-            "rows": grid_rows_final,
-            "columns": dynamic_columns_for_grid
-        }
 
     except Exception as e:
         logger.error(f"Error getting sales forecast data for grid: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve sales forecast data: {e}")
 
+@router.get("/cache/metrics", response_model=Dict[str, Any])
+def get_result_cache_metrics():
+    """
+    Hit / miss counters of the result cache (grid payload, Manual input history and Final Forecast)
+    since this process started, plus shared backend errors.
+    """
+    return result_cache.get_metrics()
+
+@router.get("/pool/metrics", response_model=Dict[str, Any])
+async def get_pool_metrics():
+    """
+    State of the database connection pools of this process (checked out, idle, overflow) and their
+    checkout counters: wait time, checkouts served from the overflow, checkouts that had to queue
+    for a connection and pool timeouts. Async so it still answers when the threadpool is saturated.
+    """
+    return pool_metrics.get_metrics()
+
 # ...existing code...
 
 # --- Endpoints para ForecastSmoothingParameters ---
@@ -607,7 +563,10 @@ def read_forecast_smoothing_parameters_api(
 
 # --- Endpoints para DimAdjustmentTypes ---
 @router.get("/adjustment_types/", response_model=List[schemas.DimAdjustmentType])
-def read_adjustment_types_api(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_adjustment_types_api(request: Request, response: Response, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    not_modified = conditional_get.check_not_modified(request, response, db, [crud.CHANGE_SCOPE_ADJUSTMENT_TYPES])
+    if not_modified:
+        return not_modified
     types = crud.get_adjustment_types(db, skip, limit)
     return types
 
@@ -1,11 +1,11 @@
 # backend/app/routers/skus.py - Versión ACTUALIZADA para filtrar SKUs por cliente
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid # Asegurarse de importar uuid
 
-from .. import crud, schemas, models # Asegúrate de que models esté importado si se usa DimSku en el router
+from .. import crud, schemas, models, conditional_get # Asegúrate de que models esté importado si se usa DimSku en el router
 from ..database import get_db
 
 router = APIRouter(
@@ -25,6 +25,8 @@ def validate_uuid_param(uuid_str: str, param_name: str):
 
 @router.get("/", response_model=List[schemas.DimSku])
 def read_skus_api(
+    request: Request,
+    response: Response,
     client_id: Optional[str] = Query(None, description="Filter SKUs by client UUID"), # Parámetro opcional
     skip: int = 0,
     limit: int = 100,
@@ -33,6 +35,14 @@ def read_skus_api(
     """
     Retrieve SKUs, optionally filtered by a client.
     """
+    # Los SKUs de un cliente salen de fact_history: también dependen de sus escrituras
+    scopes = [crud.CHANGE_SCOPE_SKUS]
+    if client_id:
+        scopes += [crud.CHANGE_SCOPE_FACT_HISTORY, crud.CHANGE_SCOPE_FACTS]
+    not_modified = conditional_get.check_not_modified(request, response, db, scopes)
+    if not_modified:
+        return not_modified
+
     if client_id:
         validated_client_id = validate_uuid_param(client_id, "client_id")
         skus = crud.get_skus_by_client(db, validated_client_id, skip=skip, limit=limit)
@@ -150,6 +150,85 @@ class ForecastVersion(BaseModel):
         from_attributes = True
 
 
+# --- ESQUEMAS PARA PRONÓSTICO POR LOTES ---
+class ForecastBatchRequest(BaseModel):
+    # None (o lista vacía) significa "todos" los clientes / SKUs con historia
+    client_ids: Optional[List[uuid.UUID]] = None
+    sku_ids: Optional[List[uuid.UUID]] = None
+    history_source: str = "sales"
+    smoothing_alpha: float = Field(0.5, ge=0.0, le=1.0)
+    model_name: str = "ETS"
+    forecast_horizon: int = Field(12, ge=1)
+    # True = ajustar también las series cuya entrada no cambió desde la última corrida
+    refit: bool = False
+
+
+# --- ESQUEMAS PARA TRABAJOS EN SEGUNDO PLANO (app/jobs.py) ---
+class ForecastJobRequest(BaseModel):
+    # Un par Cliente-SKU, mismos parámetros que /data/forecast/generate/
+    client_id: uuid.UUID
+    sku_id: uuid.UUID
+    history_source: str = "sales"
+    smoothing_alpha: float = Field(0.5, ge=0.0, le=1.0)
+    model_name: str = "ETS"
+    forecast_horizon: int = Field(12, ge=1)
+    # True = reajustar aunque haya un estado de modelo reutilizable
+    refit: bool = False
+
+class ForecastVersionSnapshotRequest(ForecastVersionCreate):
+    # None (o lista vacía) significa todos los SKUs del cliente
+    sku_ids: Optional[List[uuid.UUID]] = None
+
+class Job(BaseModel):
+    job_id: uuid.UUID
+    kind: str
+    status: str  # queued | running | succeeded | failed | cancelled
+    params: Dict[str, Any]
+    progress_done: int
+    progress_total: Optional[int] = None
+    progress_message: Optional[str] = None
+    error: Optional[str] = None
+    cancel_requested: bool
+    user_id: Optional[uuid.UUID] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class JobResult(BaseModel):
+    job_id: uuid.UUID
+    status: str
+    result: Optional[Dict[str, Any]] = None
+
+
+# --- ESQUEMAS PARA PRECISIÓN DE LOS PRONÓSTICOS (app/accuracy.py) ---
+class ForecastAccuracy(BaseModel):
+    forecast_source: str  # stat | versioned
+    key_figure_id: int
+    lag: int
+    level: str  # series | client | total
+    client_id: Optional[uuid.UUID] = None
+    sku_id: Optional[uuid.UUID] = None
+    periods: int
+    actual_sum: float
+    abs_error_sum: float
+    error_sum: float
+    wape: Optional[float] = None
+    mape: Optional[float] = None
+    bias: Optional[float] = None
+    computed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class AccuracyRefreshRequest(BaseModel):
+    max_lag: int = Field(36, ge=0)
+    # Primer período que NO se evalúa (por defecto el mes actual)
+    end_period: Optional[date] = None
+
+
 class FactForecastStatBase(BaseModel):
     client_id: uuid.UUID
     sku_id: uuid.UUID
@@ -198,6 +277,27 @@ class FactAdjustments(FactAdjustmentsBase):
     class Config:
         from_attributes = True
 
+# Carga masiva de ajustes (p.ej. una fila de 24 meses pegada en la grilla)
+class FactAdjustmentsBulkCreate(BaseModel):
+    adjustments: List[FactAdjustmentsCreate] = Field(..., min_length=1)
+
+class FactAdjustmentBulkResult(BaseModel):
+    index: int # posición de la celda en el request
+    client_id: uuid.UUID
+    sku_id: uuid.UUID
+    client_final_id: uuid.UUID
+    period: date
+    key_figure_id: int
+    status: str # 'inserted' | 'updated' | 'skipped' | 'error'
+    detail: Optional[str] = None
+
+class FactAdjustmentsBulkResponse(BaseModel):
+    message: str
+    inserted: int
+    updated: int
+    failed: int
+    results: List[FactAdjustmentBulkResult]
+
 class FactForecastVersionedBase(BaseModel):
     version_id: uuid.UUID
     client_id: uuid.UUID
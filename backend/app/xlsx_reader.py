@@ -0,0 +1,35 @@
+# backend/app/xlsx_reader.py
+# Lectura por bloques de la primera hoja de un .xlsx (openpyxl read_only). La usan
+# history_importer.read_history_file y la app Streamlit (ventas-pronostico-app/src/utils/excel_importer.py),
+# así que sólo depende de pandas y openpyxl: nada de config ni de la base.
+
+from typing import Iterator
+
+import pandas as pd
+
+
+def iter_xlsx_chunks(file, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Streams the first sheet of `file` (a path or a binary file object) with openpyxl in read_only
+    mode: rows are parsed as the XML is read and only `chunk_size` of them are kept in memory
+    (pd.read_excel loads the whole workbook).
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name).strip() if name is not None else f"column_{i}" for i, name in enumerate(header)]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
@@ -0,0 +1,76 @@
+# backend/benchmarks/bench_accuracy.py
+# Cálculo de las métricas de precisión (app.accuracy) a escala de portafolio con datos sintéticos:
+# N series con historia mensual y, por serie, pronósticos de Final Forecast a los lags 0..L, P
+# períodos por lag (como versiones mensuales). Mide la alineación con los reales + las sumas por
+# serie / cliente / total (accuracy.write_accuracy_metrics) y el COPY a forecast_accuracy, dentro de
+# una transacción que se descarta al final (la tabla real no cambia). No incluye la lectura de
+# fact_forecast_versioned / fact_history, que depende de la base (COPY, ver accuracy._read_forecasts).
+# Uso (desde backend/): python benchmarks/bench_accuracy.py [series] [lag máximo] [períodos por lag]
+
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import pandas as pd
+
+from app import accuracy, schemas
+from app.database import SessionLocal
+
+SERIES_PER_CLIENT = 50
+HISTORY_MONTHS = 72
+
+
+def synthetic_inputs(n_series: int, max_lag: int, periods_per_lag: int):
+    rng = np.random.default_rng(7)
+    first_month = 2020 * 12
+    client_ids = [str(uuid.uuid4()) for _ in range((n_series + SERIES_PER_CLIENT - 1) // SERIES_PER_CLIENT)]
+    series = [(client_ids[i // SERIES_PER_CLIENT], str(uuid.uuid4())) for i in range(n_series)]
+    actual_matrix = rng.gamma(2.0, 50.0, size=(n_series, HISTORY_MONTHS))
+    row_index = {
+        (uuid.UUID(client_id), uuid.UUID(sku_id), schemas.KEY_FIGURE_SALES_ID): row
+        for row, (client_id, sku_id) in enumerate(series)
+    }
+
+    # Celdas (serie, lag, período): los períodos son los últimos `periods_per_lag` meses de la historia
+    series_codes = np.repeat(np.arange(n_series), (max_lag + 1) * periods_per_lag)
+    lags = np.tile(np.repeat(np.arange(max_lag + 1), periods_per_lag), n_series)
+    months = first_month + HISTORY_MONTHS - 1 - np.tile(np.arange(periods_per_lag), n_series * (max_lag + 1))
+    actuals = actual_matrix[series_codes, months - first_month]
+    forecasts = pd.DataFrame({
+        "client_id": pd.Categorical([client_id for client_id, _ in series])[series_codes].astype(str),
+        "sku_id": pd.Categorical([sku_id for _, sku_id in series])[series_codes].astype(str),
+        "key_figure_id": schemas.KEY_FIGURE_FINAL_FORECAST_ID,
+        "month": months,
+        "created_month": months - lags,
+        "value": actuals * rng.normal(1.0, 0.05 + 0.01 * lags),
+    })
+    return {"versioned": forecasts, "stat": forecasts.iloc[:0]}, actual_matrix, row_index, first_month
+
+
+def main(n_series: int, max_lag: int, periods_per_lag: int):
+    started = time.perf_counter()
+    forecasts_by_source, actual_matrix, row_index, first_month = synthetic_inputs(n_series, max_lag, periods_per_lag)
+    print(f"{n_series:,} series x {max_lag + 1} lags x {periods_per_lag} periods = "
+          f"{len(forecasts_by_source['versioned']):,} forecast cells (built in {time.perf_counter() - started:.1f}s)")
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counts = accuracy.write_accuracy_metrics(db, forecasts_by_source, actual_matrix, row_index, first_month, max_lag)
+        elapsed = time.perf_counter() - started
+        print(f"align + metrics + COPY: {elapsed:.1f}s, {counts['versioned']['rows']:,} metric rows")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 35,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    )
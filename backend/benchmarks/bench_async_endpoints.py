@@ -0,0 +1,124 @@
+# backend/benchmarks/bench_async_endpoints.py
+# Prueba de carga de los endpoints de lectura: la versión sincrónica (def + Session de psycopg2 en el
+# threadpool de Starlette) contra la asíncrona (async def + AsyncSession de asyncpg) de la grilla
+# (/data/sales_forecast_data) y de una página de /data/history/.
+# Levanta uvicorn (un worker) en un subproceso con la app de abajo, que expone las dos versiones
+# sobre el mismo código de crud / grid_service, con result_cache desactivado para que cada request
+# vaya a la base. Con C requests concurrentes recorre las series de fact_history y reporta
+# requests/s y latencias p50 / p95.
+# Uso (desde backend/): python benchmarks/bench_async_endpoints.py [requests por nivel] [concurrencia ...]
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import crud, grid_service
+from app.database import SessionLocal, get_async_db, get_db
+
+PORT = 8765
+START_PERIOD, END_PERIOD = date(2022, 1, 1), date(2026, 12, 1)
+HISTORY_LIMIT = 500
+
+app = FastAPI()
+
+
+@app.get("/sync/grid")
+def sync_grid(client_id: uuid.UUID, sku_id: uuid.UUID, db: Session = Depends(get_db)):
+    return grid_service.get_grid_data(db, client_id, sku_id, client_id, START_PERIOD, END_PERIOD)
+
+
+@app.get("/async/grid")
+async def async_grid(client_id: uuid.UUID, sku_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    return await grid_service.get_grid_data_async(db, client_id, sku_id, client_id, START_PERIOD, END_PERIOD)
+
+
+@app.get("/sync/history")
+def sync_history(client_id: uuid.UUID, db: Session = Depends(get_db)):
+    return crud.get_fact_history_data(db, client_ids=[client_id], limit=HISTORY_LIMIT)
+
+
+@app.get("/async/history")
+async def async_history(client_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    return await crud.get_fact_history_data_async(db, client_ids=[client_id], limit=HISTORY_LIMIT)
+
+
+def load_series() -> List[tuple]:
+    db = SessionLocal()
+    try:
+        return db.execute(text("SELECT DISTINCT client_id, sku_id FROM fact_history ORDER BY 1, 2")).all()
+    finally:
+        db.close()
+
+
+async def run_level(path: str, series: List[tuple], n_requests: int, concurrency: int):
+    """(requests/s, p50 ms, p95 ms) of n_requests GETs to `path` with `concurrency` in flight."""
+    latencies = []
+    next_request = iter(range(n_requests))
+
+    async def worker(client: httpx.AsyncClient):
+        for i in next_request:
+            client_id, sku_id = series[i % len(series)]
+            started = time.perf_counter()
+            response = await client.get(path, params={"client_id": str(client_id), "sku_id": str(sku_id)})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=120) as client:
+        await client.get(path, params={"client_id": str(series[0][0]), "sku_id": str(series[0][1])})  # calentar
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return n_requests / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.95)] * 1000
+
+
+def wait_for_server():
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/docs", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("uvicorn did not start")
+
+
+def main(n_requests: int, levels: List[int]):
+    series = load_series()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "bench_async_endpoints:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    try:
+        wait_for_server()
+        print(f"{'endpoint':<16} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        for endpoint in ("grid", "history"):
+            for concurrency in levels:
+                for mode in ("sync", "async"):
+                    rps, p50, p95 = asyncio.run(run_level(f"/{mode}/{endpoint}", series, n_requests, concurrency))
+                    print(f"{mode + ' ' + endpoint:<16} {concurrency:>11} {rps:>8.1f} {p50:>8.1f} {p95:>8.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+        [int(arg) for arg in sys.argv[2:]] or [1, 16, 64]
+    )
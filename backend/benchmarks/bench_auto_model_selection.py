@@ -0,0 +1,84 @@
+# backend/benchmarks/bench_auto_model_selection.py
+# Costo y precisión de la selección automática de modelo (model_name 'AUTO') frente a un solo modelo.
+# Sobre las series de fact_history (ventana de historia de forecast_engine) mide, en un solo proceso,
+# el tiempo por serie de fit_forecast_model con ETS y ARIMA y de select_forecast_model, y el WAPE de
+# los últimos FORECAST_AUTO_HOLDOUT_PERIODS meses pronosticados con cada uno desde la historia previa
+# (fuera de muestra: el torneo no ve esos meses). También cuenta qué candidato gana.
+# Uso (desde backend/): python benchmarks/bench_auto_model_selection.py [cantidad máxima de series]
+
+import os
+import sys
+import time
+import warnings
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+from sqlalchemy import text
+
+from app import forecast_engine, schemas
+from app.config import settings
+from app.database import SessionLocal
+
+SMOOTHING_ALPHA = 0.5
+FORECAST_HORIZON = 12
+
+
+def load_series(max_series: int):
+    start_period, end_period = forecast_engine._history_window()
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            text(
+                """
+                SELECT client_id, sku_id, period, value FROM fact_history
+                WHERE key_figure_id = :kf AND period BETWEEN :start AND :end
+                ORDER BY client_id, sku_id, period
+                """
+            ),
+            {"kf": schemas.KEY_FIGURE_SALES_ID, "start": start_period, "end": end_period}
+        ).all()
+    finally:
+        db.close()
+    points_by_series = {}
+    for client_id, sku_id, period, value in rows:
+        points_by_series.setdefault((client_id, sku_id), []).append((period, value))
+    series = [forecast_engine._build_history_series(points) for points in points_by_series.values()]
+    return [s.to_numpy(dtype=np.float64) for s in series if s is not None][:max_series]
+
+
+def main(max_series: int):
+    warnings.filterwarnings("ignore")
+    series = load_series(max_series)
+    holdout = settings.FORECAST_AUTO_HOLDOUT_PERIODS
+    fitters = {
+        "ETS": lambda values, horizon: forecast_engine.fit_forecast_model(values, "ETS", SMOOTHING_ALPHA, horizon),
+        "ARIMA": lambda values, horizon: forecast_engine.fit_forecast_model(values, "ARIMA", SMOOTHING_ALPHA, horizon),
+        "AUTO": lambda values, horizon: forecast_engine.select_forecast_model(values, SMOOTHING_ALPHA, horizon)[0],
+    }
+    print(f"{len(series)} series, {len(series[0]) if series else 0} periods each (first one)")
+    print(f"{'model':<6} {'ms/series':>10} {'vs ETS':>7} {'vs ARIMA':>9} {'holdout WAPE':>13}")
+    timings = {}
+    for name, fit in fitters.items():
+        started = time.perf_counter()
+        for values in series:
+            fit(values, FORECAST_HORIZON)
+        timings[name] = (time.perf_counter() - started) * 1000 / len(series)
+
+        errors = actuals = 0.0
+        for values in series:
+            forecast = fit(values[:-holdout], holdout)
+            errors += np.abs(values[-holdout:] - forecast).sum()
+            actuals += np.abs(values[-holdout:]).sum()
+        print(
+            f"{name:<6} {timings[name]:>10.1f} {timings[name] / timings['ETS']:>7.2f} "
+            f"{(timings[name] / timings['ARIMA']) if 'ARIMA' in timings else float('nan'):>9.2f} {errors / actuals:>13.4f}"
+        )
+
+    winners = Counter(forecast_engine.select_forecast_model(values, SMOOTHING_ALPHA, FORECAST_HORIZON)[1] for values in series)
+    print("AUTO winners:", ", ".join(f"{model} {count}" for model, count in winners.most_common()))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,61 @@
+# backend/benchmarks/bench_batch_skip_unchanged.py
+# Pronóstico por lotes nocturno con y sin el salto de series sin cambios (forecast_input_hashes).
+# Corre forecast_engine.generate_forecast_batch sobre todas las series de la base tres veces:
+#   refit      refit=True, se ajustan todas (la corrida nocturna sin huellas)
+#   unchanged  refit=False con la historia igual: no se ajusta ninguna
+#   changed    refit=False con una fracción de series "cambiadas" (se borran sus huellas, que para el
+#              motor equivale a una entrada distinta)
+# ESCRIBE los pronósticos en fact_forecast_stat como la corrida nocturna real (usar una base de prueba).
+# Uso (desde backend/): python benchmarks/bench_batch_skip_unchanged.py [modelo] [fracción cambiada]
+
+import os
+import sys
+import uuid
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import text
+
+from app import forecast_engine
+from app.database import SessionLocal
+
+USER_ID = uuid.UUID('00000000-0000-0000-0000-000000000001')
+SMOOTHING_ALPHA = 0.5
+FORECAST_HORIZON = 12
+
+
+def main(model_name: str, changed_fraction: float):
+    warnings.filterwarnings("ignore")
+    db = SessionLocal()
+    try:
+        def run(label: str, refit: bool):
+            result = forecast_engine.generate_forecast_batch(
+                db, "sales", SMOOTHING_ALPHA, model_name, FORECAST_HORIZON, USER_ID, refit=refit
+            )
+            print(
+                f"{label:<10} {result['elapsed_seconds']:>9.2f} {result['series_forecasted']:>7} "
+                f"{result['series_skipped']:>7} {result['time_saved_seconds']:>11.2f}"
+            )
+            return result
+
+        print(f"model {model_name}, changed fraction {changed_fraction:.0%}")
+        print(f"{'run':<10} {'elapsed s':>9} {'fitted':>7} {'skipped':>7} {'saved s':>11}")
+        full = run("refit", True)
+        run("unchanged", False)
+        db.execute(
+            text("DELETE FROM forecast_input_hashes WHERE random() < :fraction AND key_figure_id = :kf"),
+            {"fraction": changed_fraction, "kf": forecast_engine._stat_forecast_kf_id("sales")}
+        )
+        db.commit()
+        changed = run("changed", False)
+        print(f"changed run / full run: {changed['elapsed_seconds'] / full['elapsed_seconds']:.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main(
+        sys.argv[1] if len(sys.argv) > 1 else "AUTO",
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    )
@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_fact_export.py
+# Benchmark de app.fact_exporter contra la paginación de /data/history/ (crud.get_fact_history_data).
+# Crea un schema "bench_export" con dim_clients, dim_skus, dim_keyfigures y fact_history sintéticos
+# (no toca las tablas reales; las consultas las resuelven vía search_path), exporta a Parquet y a
+# Arrow IPC y reporta filas/s y RSS pico. La paginación JSON se mide sobre una muestra.
+# Uso (desde backend/): python benchmarks/bench_fact_export.py [filas] [filas_muestra_paginacion]
+# Borrar con: DROP SCHEMA bench_export CASCADE;
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import psycopg2
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, fact_exporter
+from app.config import settings
+
+SEARCH_PATH_OPTIONS = "-c search_path=bench_export,public"
+
+
+def peak_rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def create_bench_schema(conn, n_rows: int):
+    """60 months x 2 key figures per series, 1000 clients, n_rows / 120 SKUs."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM pg_namespace WHERE nspname = 'bench_export'")
+        if cursor.fetchone()[0]:
+            cursor.execute("SELECT COUNT(*) FROM bench_export.fact_history")
+            if cursor.fetchone()[0] == max(n_rows // 120, 1) * 120:
+                return
+        cursor.execute("DROP SCHEMA IF EXISTS bench_export CASCADE")
+        cursor.execute("CREATE SCHEMA bench_export")
+        cursor.execute("CREATE TABLE bench_export.dim_keyfigures (LIKE public.dim_keyfigures INCLUDING DEFAULTS INCLUDING INDEXES)")
+        cursor.execute("INSERT INTO bench_export.dim_keyfigures SELECT * FROM public.dim_keyfigures")
+        cursor.execute(
+            """
+            CREATE TABLE bench_export.dim_clients (LIKE public.dim_clients INCLUDING DEFAULTS INCLUDING INDEXES);
+            INSERT INTO bench_export.dim_clients (client_id, client_name)
+            SELECT md5('client' || c)::uuid, 'Client ' || c FROM generate_series(0, 999) AS c
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE bench_export.dim_skus (LIKE public.dim_skus INCLUDING DEFAULTS INCLUDING INDEXES);
+            INSERT INTO bench_export.dim_skus (sku_id, sku_name)
+            SELECT md5('sku' || s)::uuid, 'SKU ' || s || ' (Organic, 6ct)'
+            FROM generate_series(0, GREATEST(%s / 120, 1) - 1) AS s
+            """,
+            (n_rows,)
+        )
+        cursor.execute(
+            """
+            CREATE TABLE bench_export.fact_history (LIKE public.fact_history INCLUDING DEFAULTS);
+            INSERT INTO bench_export.fact_history (client_id, sku_id, client_final_id, period, source, key_figure_id, value)
+            SELECT md5('client' || (s %% 1000))::uuid, md5('sku' || s)::uuid, md5('client' || (s %% 1000))::uuid,
+                   make_date(2021, 1, 1) + make_interval(months => m), kf.source, kf.key_figure_id,
+                   round((random() * 1000)::numeric, 2)
+            FROM generate_series(0, GREATEST(%s / 120, 1) - 1) AS s
+            CROSS JOIN generate_series(0, 59) AS m
+            CROSS JOIN (VALUES (1, 'sales'), (3, 'shipments')) AS kf(key_figure_id, source);
+            ALTER TABLE bench_export.fact_history
+                ADD PRIMARY KEY (client_id, sku_id, client_final_id, period, key_figure_id, source);
+            ANALYZE bench_export.fact_history;
+            """,
+            (n_rows,)
+        )
+    conn.commit()
+
+
+def main(n_rows: int, sample_rows: int):
+    conn = psycopg2.connect(settings.DATABASE_URL, options=SEARCH_PATH_OPTIONS)
+    started = time.perf_counter()
+    create_bench_schema(conn, n_rows)
+    print(f"bench_export.fact_history: {n_rows:,} rows ready in {time.perf_counter() - started:.1f} s")
+
+    print(f"{'method':<34} {'rows':>12} {'seconds':>8} {'rows/s':>10} {'MB':>8} {'peak RSS MB':>12}")
+    for export_format in ("parquet", "arrow"):
+        path = os.path.join(tempfile.gettempdir(), f"bench_export_history.{fact_exporter.EXPORT_FORMATS[export_format][1]}")
+        started = time.perf_counter()
+        rows = sum(fact_exporter.write_export(conn, "history", path, export_format))
+        elapsed = time.perf_counter() - started
+        print(f"{'fact_exporter ' + export_format:<34} {rows:>12,} {elapsed:>8.1f} {rows / elapsed:>10,.0f} "
+              f"{os.path.getsize(path) / 2**20:>8,.1f} {peak_rss_mb():>12,.0f}")
+        os.remove(path)
+    conn.close()
+
+    # /data/history/ con paginación skip/limit (limit=100 por defecto) sobre una muestra
+    engine = create_engine(settings.DATABASE_URL, connect_args={"options": SEARCH_PATH_OPTIONS})
+    db = sessionmaker(bind=engine)()
+    for limit in (100, 10000):
+        started = time.perf_counter()
+        rows = 0
+        while rows < sample_rows:
+            page = crud.get_fact_history_data(db, skip=rows, limit=limit)
+            if not page:
+                break
+            rows += len(page)
+            db.expunge_all()
+        elapsed = time.perf_counter() - started
+        print(f"{f'get_fact_history_data limit={limit}':<34} {rows:>12,} {elapsed:>8.1f} {rows / elapsed:>10,.0f} {'':>8} {peak_rss_mb():>12,.0f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    )
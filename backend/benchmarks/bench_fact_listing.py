@@ -0,0 +1,83 @@
+# backend/benchmarks/bench_fact_listing.py
+# Páginas grandes de /data/history/: consulta + serialización JSON como la hace FastAPI
+# (validación contra List[schemas.FactHistory] y dump a JSON), con joinedload de client / sku /
+# key_figure (como antes) contra columnas del hecho + app.dimension_cache (crud.get_fact_history_data).
+# Reporta ms por página y la memoria pico asignada (tracemalloc). Usa el schema sintético
+# "bench_export" de bench_fact_export.py (lo crea si no existe) vía search_path.
+# Uso (desde backend/): python benchmarks/bench_fact_listing.py [filas] [limit ...]
+
+import os
+import sys
+import time
+import tracemalloc
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import psycopg2
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, joinedload
+
+from app import crud, models, schemas, dimension_cache
+from app.config import settings
+from bench_fact_export import SEARCH_PATH_OPTIONS, create_bench_schema
+
+REPEATS = 3
+RESPONSE_ADAPTER = TypeAdapter(List[schemas.FactHistory])
+
+
+def joinedload_page(db, limit: int):
+    """get_fact_history_data before the dimension cache."""
+    columns = [getattr(models.FactHistory, column.key) for column in models.FactHistory.__table__.primary_key.columns]
+    return db.query(models.FactHistory).options(
+        joinedload(models.FactHistory.client),
+        joinedload(models.FactHistory.sku),
+        joinedload(models.FactHistory.key_figure)
+    ).order_by(*columns).limit(limit).all()
+
+
+def cached_page(db, limit: int):
+    return crud.get_fact_history_data(db, limit=limit)
+
+
+def measure(db, fetch, limit: int):
+    """(best ms of REPEATS, peak MB allocated during one page, response bytes)."""
+    best = float("inf")
+    for repeat in range(REPEATS + 1):
+        if repeat == REPEATS:
+            tracemalloc.start()
+        started = time.perf_counter()
+        body = RESPONSE_ADAPTER.dump_json(RESPONSE_ADAPTER.validate_python(fetch(db, limit)))
+        elapsed = time.perf_counter() - started
+        db.expunge_all()
+        if repeat == REPEATS:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        elif repeat:  # la primera vuelta calienta la caché de dimensiones
+            best = min(best, elapsed)
+    return best * 1000, peak / 2**20, len(body)
+
+
+def main(n_rows: int, limits: List[int]):
+    conn = psycopg2.connect(settings.DATABASE_URL, options=SEARCH_PATH_OPTIONS)
+    create_bench_schema(conn, n_rows)
+    conn.close()
+
+    engine = create_engine(settings.DATABASE_URL, connect_args={"options": SEARCH_PATH_OPTIONS})
+    db = sessionmaker(bind=engine)()
+    dimension_cache.invalidate()
+    print(f"{'method':<16} {'limit':>8} {'ms/page':>10} {'peak MB':>10} {'JSON MB':>10}")
+    for limit in limits:
+        for name, fetch in (("joinedload", joinedload_page), ("dimension_cache", cached_page)):
+            ms, peak_mb, body_bytes = measure(db, fetch, limit)
+            print(f"{name:<16} {limit:>8,} {ms:>10.0f} {peak_mb:>10.1f} {body_bytes / 2**20:>10.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000,
+        [int(arg) for arg in sys.argv[2:]] or [1_000, 10_000, 50_000]
+    )
@@ -0,0 +1,33 @@
+# backend/benchmarks/bench_final_forecast.py
+# Tiempo de final_forecast.compute_final_forecast_values frente a la implementación de referencia
+# (el bucle por periodo anterior) sobre un caso aleatorio. La equivalencia de ambas la verifica
+# tests/test_final_forecast.py, de donde salen la referencia y el generador de casos.
+# Uso (desde backend/): python benchmarks/bench_final_forecast.py [periodos]
+
+import os
+import sys
+import random
+import timeit
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "tests"))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/forecaist")  # no se abre ninguna conexión
+
+from app import final_forecast
+
+from test_final_forecast import random_case, reference_final_forecast
+
+
+def main(n_periods: int):
+    case = random_case(random.Random(2024), n_periods)
+    reference_runs, reference_total = timeit.Timer(lambda: reference_final_forecast(*case)).autorange()
+    vectorized_runs, vectorized_total = timeit.Timer(lambda: final_forecast.compute_final_forecast_values(*case)).autorange()
+    reference_ms = reference_total / reference_runs * 1000
+    vectorized_ms = vectorized_total / vectorized_runs * 1000
+    print(f"{n_periods} periods: per-period loop {reference_ms:.2f} ms, vectorized {vectorized_ms:.3f} ms "
+          f"({reference_ms / vectorized_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 120)
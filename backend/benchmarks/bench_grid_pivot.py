@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_grid_pivot.py
+# Micro-benchmark del pivot de la grilla (grid_service.build_grid_rows): índice (key_figure_id, period)
+# contra el recorrido lineal anterior con next(...) por cada celda.
+# Uso (desde backend/): python benchmarks/bench_grid_pivot.py [periodos ...]
+
+import os
+import sys
+import random
+import timeit
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/forecaist")  # no se abre ninguna conexión
+
+from app import grid_service
+
+KEY_FIGURE_NAMES = {
+    1: "Sales", 2: "Smoothed Sales", 3: "Orders", 4: "Smoothed Orders", 5: "Manual input",
+    6: "Statistical forecast Sales", 7: "Statistical forecast Orders", 8: "Final Forecast"
+}
+
+
+def make_consolidated_data(n_periods: int):
+    """8 key figures x n_periods: history KFs cover the first 3/4 of the window, forecast KFs the rest."""
+    rng = random.Random(42)
+    periods = [date(2015 + month // 12, month % 12 + 1, 1) for month in range(n_periods)]
+    split = n_periods * 3 // 4
+    records = []
+    for kf_id in grid_service.HISTORICAL_KF_IDS:
+        records.extend({"period": p, "key_figure_id": kf_id, "value": rng.random() * 1000} for p in periods[:split])
+    for kf_id in grid_service.FORECAST_KF_IDS:
+        records.extend({"period": p, "key_figure_id": kf_id, "value": rng.random() * 1000} for p in periods[split:])
+    rng.shuffle(records)
+    return records
+
+
+def build_grid_rows_linear_scan(consolidated_data, key_figure_name_map, row_fields):
+    """Implementación anterior: un next(...) sobre todos los registros por cada celda."""
+    unique_periods = sorted(set(item["period"] for item in consolidated_data))
+    grid_rows = []
+    for kf_id in grid_service.HISTORICAL_KF_IDS + grid_service.FORECAST_KF_IDS:
+        current_row = {"keyFigureName": key_figure_name_map[kf_id], **row_fields}
+        for period in unique_periods:
+            current_row[f"date_{period.isoformat()}"] = next(
+                (item["value"] for item in consolidated_data
+                 if item["key_figure_id"] == kf_id and item["period"] == period),
+                None
+            )
+        grid_rows.append(current_row)
+    return grid_rows, unique_periods
+
+
+def main(period_counts):
+    row_fields = {"client_id": "c", "sku_id": "s", "client_final_id": "c", "clientName": "Client", "skuName": "SKU"}
+    print(f"{'periods':>8} {'records':>8} {'linear scan ms':>15} {'hash index ms':>14} {'speed-up':>9}")
+    for n_periods in period_counts:
+        data = make_consolidated_data(n_periods)
+        assert build_grid_rows_linear_scan(data, KEY_FIGURE_NAMES, row_fields) == \
+            grid_service.build_grid_rows(data, KEY_FIGURE_NAMES, row_fields)
+
+        linear_runs, linear_total = timeit.Timer(
+            lambda: build_grid_rows_linear_scan(data, KEY_FIGURE_NAMES, row_fields)).autorange()
+        indexed_runs, indexed_total = timeit.Timer(
+            lambda: grid_service.build_grid_rows(data, KEY_FIGURE_NAMES, row_fields)).autorange()
+        linear_ms = linear_total / linear_runs * 1000
+        indexed_ms = indexed_total / indexed_runs * 1000
+        print(f"{n_periods:>8} {len(data):>8} {linear_ms:>15.2f} {indexed_ms:>14.3f} {linear_ms / indexed_ms:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [36, 120, 240])
@@ -0,0 +1,85 @@
+# backend/benchmarks/bench_history_import.py
+# Benchmark de app.history_importer sobre un extracto CSV sintético (5M filas por defecto).
+# Genera el archivo, lo carga con COPY a la tabla temporal, hace el upsert a fact_history y
+# reporta filas/s por etapa. Al final hace ROLLBACK: la base queda como estaba.
+# Uso (desde backend/, con DATABASE_URL apuntando a una base con forecaist_schema.sql):
+# python benchmarks/bench_history_import.py [filas] [archivo.csv]
+
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import history_importer
+from app.config import settings
+
+
+def write_synthetic_extract(path: str, n_rows: int, chunk_size: int = 1_000_000):
+    """
+    Extract with the DB.xlsx columns: 60 months x ('Sales', 'Shipments') per client/SKU pair,
+    400 clients and n_rows / 120 series.
+    """
+    rng = np.random.default_rng(42)
+    months = pd.date_range("2021-01-01", periods=60, freq="MS").strftime("%Y-%m-%d").to_numpy()
+    key_figures = np.array(["Sales", "Shipments"])
+    with open(path, "w") as f:
+        f.write("Month,DPG,SKU,Sum of Quantity,KeyFigure\n")
+        for start in range(0, n_rows, chunk_size):
+            row = np.arange(start, min(start + chunk_size, n_rows))
+            series = row // 120
+            pd.DataFrame({
+                "Month": months[(row // 2) % 60],
+                "DPG": "Client " + (series % 400).astype(str),
+                "SKU": "SKU " + series.astype(str),
+                "Sum of Quantity": rng.integers(0, 1000, len(row)),
+                "KeyFigure": key_figures[row % 2]
+            }).to_csv(f, header=False, index=False)
+
+
+def main(n_rows: int, path: str):
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        write_synthetic_extract(path, n_rows)
+        print(f"Synthetic extract: {n_rows:,} rows written to {path} in {time.perf_counter() - started:.1f} s")
+
+    conn = psycopg2.connect(settings.DATABASE_URL)
+    try:
+        started = time.perf_counter()
+        history_import = history_importer.HistoryImport(conn)
+        read_seconds = 0.0
+        chunks = history_importer.read_history_file(path)
+        while True:
+            read_started = time.perf_counter()
+            chunk = next(chunks, None)
+            read_seconds += time.perf_counter() - read_started
+            if chunk is None:
+                break
+            history_import.add_chunk(chunk)
+        staged = time.perf_counter()
+        result = history_import.merge()
+        finished = time.perf_counter()
+    finally:
+        conn.rollback()
+        conn.close()
+
+    rows = result["rows_read"]
+    total = finished - started
+    print(f"rows read {rows:,}  staged {result['rows_staged']:,}  merged into fact_history {result['rows_merged']:,}  "
+          f"clients {result['clients']}  skus {result['skus']}")
+    print(f"{'stage':<28} {'seconds':>8} {'rows/s':>12}")
+    print(f"{'read CSV':<28} {read_seconds:>8.1f} {rows / read_seconds:>12,.0f}")
+    print(f"{'normalize + COPY':<28} {staged - started - read_seconds:>8.1f} {rows / (staged - started - read_seconds):>12,.0f}")
+    print(f"{'upsert fact_history':<28} {finished - staged:>8.1f} {rows / (finished - staged):>12,.0f}")
+    print(f"{'total':<28} {total:>8.1f} {rows / total:>12,.0f}")
+
+
+if __name__ == "__main__":
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.gettempdir(), f"history_extract_{n_rows}.csv")
+    main(n_rows, path)
@@ -0,0 +1,109 @@
+# backend/benchmarks/bench_history_streaming.py
+# Memoria pico (RSS) y filas/s al leer un extracto grande: pd.read_excel del archivo completo contra
+# la lectura por bloques de app.history_importer.read_history_file (openpyxl read_only / CSV).
+# Cada modo corre en un proceso aparte para que el RSS pico de uno no afecte al otro.
+# Nota: los .xlsx sintéticos (openpyxl write_only) no traen <dimension>, así que openpyxl recorre la
+# hoja una vez al abrirla; los guardados por Excel sí lo traen.
+# El modo "import" además carga los bloques a la base (COPY + upsert) y hace ROLLBACK al final.
+# Uso (desde backend/):
+# python benchmarks/bench_history_streaming.py [filas ...] [--import]
+
+import os
+import sys
+import time
+import resource
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/forecaist")  # sólo el modo "import" se conecta
+
+import pandas as pd
+
+from app import history_importer
+
+
+def write_synthetic_extract(path: str, n_rows: int):
+    """DB.xlsx layout: 60 months x ('Sales', 'Shipments') per client/SKU pair. Writes .xlsx or .csv."""
+    months = pd.date_range("2021-01-01", periods=60, freq="MS").to_pydatetime()
+    header = ["Month", "DPG", "SKU", "Sum of Quantity", "KeyFigure"]
+    rows = (
+        (months[(row // 2) % 60], f"Client {row // 120 % 400}", f"SKU {row // 120}", row % 997, ("Sales", "Shipments")[row % 2])
+        for row in range(n_rows)
+    )
+    if path.endswith(".csv"):
+        pd.DataFrame(rows, columns=header).to_csv(path, index=False)
+        return
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process. VmHWM (Linux) restarts at exec, ru_maxrss keeps the parent's peak."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode: str, path: str):
+    """Runs in the child process and prints 'rows seconds peak_rss_mb'."""
+    started = time.perf_counter()
+    if mode == "baseline":  # sólo los imports: el RSS que no depende del archivo
+        rows = 0
+    elif mode == "read_excel":
+        rows = len(pd.read_excel(path))
+    elif mode == "stream":
+        rows = sum(len(chunk) for chunk in history_importer.read_history_file(path))
+    else:
+        import psycopg2
+        from app.config import settings
+
+        conn = psycopg2.connect(settings.DATABASE_URL)
+        try:
+            history_import = history_importer.HistoryImport(conn)
+            for chunk in history_importer.read_history_file(path):
+                history_import.add_chunk(chunk)
+            rows = history_import.merge()["rows_read"]
+        finally:
+            conn.rollback()
+            conn.close()
+    print(rows, time.perf_counter() - started, peak_rss_mb())
+
+
+def main(row_counts, with_import: bool):
+    print(f"{'file':<6} {'rows':>10} {'mode':<12} {'seconds':>8} {'rows/s':>10} {'peak RSS MB':>12}")
+    for n_rows in row_counts:
+        for ext in ("xlsx", "csv"):
+            path = os.path.join(tempfile.gettempdir(), f"history_extract_{n_rows}.{ext}")
+            if not os.path.exists(path):
+                write_synthetic_extract(path, n_rows)
+            modes = ["baseline", "read_excel", "stream"] if ext == "xlsx" else ["stream"]
+            if with_import:
+                modes.append("import")
+            for mode in modes:
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--mode", mode, path],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                rows, seconds, rss = int(output[0]), float(output[1]), float(output[2])
+                print(f"{ext:<6} {n_rows:>10,} {mode:<12} {seconds:>8.1f} {rows / max(seconds, 1e-9):>10,.0f} {rss:>12,.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2], sys.argv[3])
+    else:
+        row_counts = [int(arg) for arg in sys.argv[1:] if arg != "--import"]
+        # Dos tamaños: con lectura por bloques el RSS pico no debería crecer con el archivo
+        main(row_counts or [100_000, 500_000], "--import" in sys.argv[1:])
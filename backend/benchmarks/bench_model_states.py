@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_model_states.py
+# Costo de re-pronosticar desde un estado de modelo guardado (forecast_model_states) frente a reajustar.
+# Sobre las series de fact_history (ventana de historia de forecast_engine) mide, por modelo y en un
+# solo proceso, el tiempo por serie de:
+#   fit     ajuste completo sobre la historia sin el último mes (lo que hace generate_forecast sin estado)
+#   reuse   pronóstico desde ese estado con otro horizonte (misma historia)
+#   update  avance del estado con el último mes + pronóstico (llegó un mes nuevo)
+#   refit   ajuste completo sobre la historia entera (lo que se evita con update)
+# y la diferencia media entre el pronóstico con el estado avanzado y el reajustado, relativa al nivel
+# de la serie. No incluye la lectura / escritura en la base.
+# Uso (desde backend/): python benchmarks/bench_model_states.py [cantidad máxima de series]
+
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+from app import forecast_engine
+
+from bench_auto_model_selection import load_series
+
+SMOOTHING_ALPHA = 0.5
+FORECAST_HORIZON = 12
+REUSE_HORIZON = 18
+
+
+def fit(values: np.ndarray, model_name: str):
+    if model_name == forecast_engine.AUTO_MODEL_NAME:
+        return forecast_engine.select_model_state(values, SMOOTHING_ALPHA)[0]
+    return forecast_engine.fit_model_state(values, model_name, SMOOTHING_ALPHA, FORECAST_HORIZON)[1]
+
+
+def timed(function, items):
+    started = time.perf_counter()
+    results = [function(item) for item in items]
+    return results, (time.perf_counter() - started) * 1000 / len(items)
+
+
+def main(max_series: int):
+    warnings.filterwarnings("ignore")
+    series = load_series(max_series)
+    print(f"{len(series)} series, {len(series[0]) if series else 0} periods each (first one)")
+    print(f"{'model':<6} {'fit ms':>8} {'reuse ms':>9} {'update ms':>10} {'refit ms':>9} {'refit/update':>13} {'update vs refit':>16}")
+    for model_name in ("ETS", "ARIMA", forecast_engine.AUTO_MODEL_NAME):
+        states, fit_ms = timed(lambda values: fit(values[:-1], model_name), series)
+        _, reuse_ms = timed(
+            lambda k: forecast_engine.forecast_from_model_state(states[k], series[k][:-1], REUSE_HORIZON), range(len(series))
+        )
+
+        def update(k):
+            values = series[k]
+            state, _ = forecast_engine.advance_model_state(states[k], values[-1:], values)
+            return forecast_engine.forecast_from_model_state(state, values, FORECAST_HORIZON)
+        updated, update_ms = timed(update, range(len(series)))
+
+        def refit(values):
+            return forecast_engine.forecast_from_model_state(fit(values, model_name), values, FORECAST_HORIZON)
+        refitted, refit_ms = timed(refit, series)
+
+        # Cuánto se aparta el pronóstico del estado avanzado del de un reajuste, relativo al nivel de la serie
+        gaps = [np.abs(a - b).mean() / max(np.abs(values).mean(), 1e-9) for a, b, values in zip(updated, refitted, series)]
+        print(
+            f"{model_name:<6} {fit_ms:>8.2f} {reuse_ms:>9.3f} {update_ms:>10.3f} {refit_ms:>9.2f} "
+            f"{refit_ms / update_ms:>12.0f}x {np.mean(gaps):>15.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
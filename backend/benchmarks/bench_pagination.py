@@ -0,0 +1,65 @@
+# backend/benchmarks/bench_pagination.py
+# Costo de una página de /data/history/ (crud.get_fact_history_data) según su posición en el listado:
+# skip/limit (OFFSET) contra page_token (keyset sobre la PK). Usa el schema sintético "bench_export" de
+# bench_fact_export.py (lo crea si no existe) vía search_path; no toca las tablas reales.
+# Uso (desde backend/): python benchmarks/bench_pagination.py [filas] [limit]
+# Borrar con: DROP SCHEMA bench_export CASCADE;
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import psycopg2
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.config import settings
+from bench_fact_export import SEARCH_PATH_OPTIONS, create_bench_schema
+
+REPEATS = 5
+
+
+def time_page(db, **kwargs) -> float:
+    """Best of REPEATS, in ms."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        crud.get_fact_history_data(db, **kwargs)
+        best = min(best, time.perf_counter() - started)
+        db.expunge_all()
+    return best * 1000
+
+
+def main(n_rows: int, limit: int):
+    conn = psycopg2.connect(settings.DATABASE_URL, options=SEARCH_PATH_OPTIONS)
+    create_bench_schema(conn, n_rows)
+    conn.close()
+
+    engine = create_engine(settings.DATABASE_URL, connect_args={"options": SEARCH_PATH_OPTIONS})
+    db = sessionmaker(bind=engine)()
+    total = db.query(models.FactHistory).count()
+    print(f"bench_export.fact_history: {total:,} rows, limit={limit}")
+    print(f"{'position':>12} {'skip/limit ms':>14} {'page_token ms':>14}")
+    for position in (0, 10_000, 100_000, 1_000_000, total // 2, total - limit):
+        if position < 0 or position > total - limit:
+            continue
+        page_after = None
+        if position:
+            # La fila anterior a la posición: la que habría devuelto la página previa
+            previous = crud.get_fact_history_data(db, skip=position - 1, limit=1)[0]
+            page_after = crud.decode_page_token(models.FactHistory, crud.encode_page_token(models.FactHistory, previous))
+        offset_ms = time_page(db, skip=position, limit=limit)
+        keyset_ms = time_page(db, page_after=page_after, limit=limit)
+        print(f"{position:>12,} {offset_ms:>14.1f} {keyset_ms:>14.1f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    )
@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_startup.py
+# Arranque de un proceso de la API y memoria por worker, para dimensionar el reciclado de workers
+# y el autoescalado. Cada escenario corre en un intérprete nuevo (como un worker recién creado) y
+# mide el tiempo de importación / primer request y el RSS del proceso al terminar:
+#   api             import app.main (lo que paga cada worker de uvicorn al arrancar)
+#   api + /clients  lo anterior + arranque de la app y un GET /clients/ (worker que sólo sirve listados)
+#   api + modeling  lo anterior a /clients + forecast_engine.load_modeling_stack (worker que ajusta, o
+#                   FORECAST_PRELOAD_MODELING_STACK=true)
+#   fit worker      lo que carga un proceso del ejecutor de ajustes (fitting_executor._init_worker)
+# Los escenarios no arrancan los workers de la cola de trabajos (JOB_WORKERS=0).
+# Uso (desde backend/): python benchmarks/bench_startup.py [repeticiones]
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+HEAVY_MODULES = ("pandas", "statsmodels", "scipy", "pyarrow")
+
+# Se ejecuta en el proceso hijo: `setup` es el código medido, el resto reporta tiempo, RSS y módulos
+CHILD_TEMPLATE = """
+import json, sys, time
+started = time.perf_counter()
+{setup}
+elapsed = time.perf_counter() - started
+rss_kb = 0
+with open("/proc/self/status") as status:
+    for line in status:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": rss_kb / 1024,
+    "heavy": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+SCENARIOS = [
+    ("api", "import app.main"),
+    ("api + /clients", (
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "with TestClient(app) as client:\n"
+        "    client.get('/clients/').raise_for_status()"
+    )),
+    ("api + modeling", (
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "from app import forecast_engine\n"
+        "with TestClient(app) as client:\n"
+        "    client.get('/clients/').raise_for_status()\n"
+        "forecast_engine.load_modeling_stack()"
+    )),
+    ("fit worker", "from app import fitting_executor\nfitting_executor._init_worker()"),
+]
+
+
+def run_scenario(setup: str) -> dict:
+    env = dict(os.environ, JOB_WORKERS="0", FORECAST_PRELOAD_MODELING_STACK="false")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_TEMPLATE.format(setup=setup, heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(repeats: int):
+    print(f"{repeats} fresh interpreters per scenario (median)")
+    print(f"{'scenario':<16} {'seconds':>8} {'RSS MB':>8}  heavy modules loaded")
+    for label, setup in SCENARIOS:
+        runs = [run_scenario(setup) for _ in range(repeats)]
+        print(
+            f"{label:<16} {statistics.median(r['seconds'] for r in runs):>8.2f} "
+            f"{statistics.median(r['rss_mb'] for r in runs):>8.0f}  {', '.join(runs[-1]['heavy']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
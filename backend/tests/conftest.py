@@ -0,0 +1,10 @@
+# backend/tests/conftest.py
+# Las pruebas importan los módulos de app/ como los benchmarks (desde backend/). app.config exige
+# DATABASE_URL; las pruebas no abren conexiones, así que alcanza con un valor por defecto.
+# Uso (desde backend/): python -m pytest -q tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/forecaist")
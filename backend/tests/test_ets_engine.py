@@ -0,0 +1,92 @@
+# backend/tests/test_ets_engine.py
+# Paridad del motor ETS nativo (forecast_engine.ets_forecast_matrix) con statsmodels: con los mismos
+# estados iniciales ('simple') y los mismos parámetros, sin optimizar, los pronósticos tienen que
+# coincidir, tanto en Holt-Winters aditivo como en el SES de las series cortas.
+
+import warnings
+
+import numpy as np
+import pytest
+from statsmodels.tsa.api import ExponentialSmoothing, SimpleExpSmoothing
+
+from app import forecast_engine
+
+SEASONAL_PERIODS = 12
+# Más de un ciclo: statsmodels reusa el estacional previo a la última actualización cada 12 pasos
+FORECAST_HORIZON = 30
+
+
+def _seasonal_series(n_series: int, n_periods: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_periods)
+    level = rng.uniform(50, 500, (n_series, 1))
+    slope = rng.uniform(-2, 4, (n_series, 1))
+    amplitude = rng.uniform(0, 60, (n_series, 1))
+    noise = rng.normal(0, 8, (n_series, n_periods))
+    return level + slope * t + amplitude * np.sin(2 * np.pi * t / SEASONAL_PERIODS) + noise
+
+
+def _statsmodels_holt_winters(values: np.ndarray, alpha: float, beta: float, gamma: float):
+    # Inicialización 'simple': nivel = media del primer ciclo, tendencia = diferencia de medias de
+    # los dos primeros ciclos / m, estacionales = primer ciclo menos el nivel
+    initial_level = values[:SEASONAL_PERIODS].mean()
+    initial_trend = (values[SEASONAL_PERIODS:2 * SEASONAL_PERIODS].mean() - initial_level) / SEASONAL_PERIODS
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ExponentialSmoothing(
+            values,
+            trend="add",
+            seasonal="add",
+            seasonal_periods=SEASONAL_PERIODS,
+            initialization_method="known",
+            initial_level=initial_level,
+            initial_trend=initial_trend,
+            initial_seasonal=values[:SEASONAL_PERIODS] - initial_level,
+        ).fit(smoothing_level=alpha, smoothing_trend=beta, smoothing_seasonal=gamma, optimized=False)
+
+
+@pytest.mark.parametrize("n_periods", [24, 30, 36])
+@pytest.mark.parametrize("alpha", [0.2, 0.5, 0.9])
+def test_holt_winters_matches_statsmodels(n_periods, alpha):
+    history_matrix = _seasonal_series(8, n_periods, seed=n_periods)
+    native = forecast_engine.ets_forecast_matrix(history_matrix, alpha, FORECAST_HORIZON, SEASONAL_PERIODS)
+    beta, gamma, sse, *_ = forecast_engine._fit_holt_winters_grid(history_matrix, alpha, SEASONAL_PERIODS)
+
+    for row, values in enumerate(history_matrix):
+        fitted = _statsmodels_holt_winters(values, alpha, beta[row], gamma[row])
+        np.testing.assert_allclose(native[row], fitted.forecast(FORECAST_HORIZON), rtol=1e-9, atol=1e-8)
+        np.testing.assert_allclose(sse[row], fitted.sse, rtol=1e-9)
+
+
+def test_holt_winters_grid_picks_least_statsmodels_sse():
+    alpha = 0.5
+    history_matrix = _seasonal_series(4, 36, seed=7)
+    beta, gamma, *_ = forecast_engine._fit_holt_winters_grid(history_matrix, alpha, SEASONAL_PERIODS)
+    candidates = [
+        (b, g) for b in forecast_engine.ETS_TREND_GRID for g in forecast_engine.ETS_SEASONAL_GRID if g <= 1 - alpha
+    ]
+    for row, values in enumerate(history_matrix):
+        best_sse = min(_statsmodels_holt_winters(values, alpha, b, g).sse for b, g in candidates)
+        chosen_sse = _statsmodels_holt_winters(values, alpha, beta[row], gamma[row]).sse
+        assert chosen_sse == pytest.approx(best_sse, rel=1e-9)
+
+
+@pytest.mark.parametrize("n_periods", [2, 6, 23])
+@pytest.mark.parametrize("alpha", [0.1, 0.5, 1.0])
+def test_short_series_ses_matches_statsmodels(n_periods, alpha):
+    history_matrix = _seasonal_series(5, n_periods, seed=n_periods)
+    native = forecast_engine.ets_forecast_matrix(history_matrix, alpha, FORECAST_HORIZON, SEASONAL_PERIODS)
+
+    for row, values in enumerate(history_matrix):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            # Nivel inicial = primera observación ('simple' de SES)
+            fitted = SimpleExpSmoothing(values, initialization_method="known", initial_level=values[0]).fit(
+                smoothing_level=alpha, optimized=False
+            )
+        np.testing.assert_allclose(native[row], fitted.forecast(FORECAST_HORIZON), rtol=1e-9, atol=1e-8)
+
+
+def test_empty_history_raises():
+    with pytest.raises(RuntimeError):
+        forecast_engine.ets_forecast_matrix(np.empty((3, 0)), 0.5, FORECAST_HORIZON)
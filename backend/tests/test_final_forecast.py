@@ -0,0 +1,173 @@
+# backend/tests/test_final_forecast.py
+# final_forecast.compute_final_forecast_values contra una implementación de referencia (el bucle por
+# periodo anterior, con la búsqueda de Stat Sales / Stat Orders corregida) sobre casos aleatorios con
+# semilla fija, más algunos casos puntuales de las reglas de precedencia.
+
+import math
+import random
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from app import final_forecast, schemas
+
+GENERAL_KF_IDS = [schemas.KEY_FIGURE_FINAL_FORECAST_ID, schemas.KEY_FIGURE_MANUAL_INPUT_ID]
+
+
+def reference_final_forecast(all_periods_in_range, all_stat_forecasts, manual_adjustments, history_map):
+    """Bucle por periodo con filtros de DataFrame, como la implementación anterior."""
+    forecast_df = pd.DataFrame(
+        [{'period': f.period, 'key_figure_id': f.key_figure_id, 'value': f.value} for f in all_stat_forecasts],
+        columns=['period', 'key_figure_id', 'value']
+    )
+    adjustments_df = pd.DataFrame(
+        [{'period': a.period, 'key_figure_id': a.key_figure_id, 'adjustment_type_id': a.adjustment_type_id, 'value': a.value}
+         for a in manual_adjustments if a.value is not None],
+        columns=['period', 'key_figure_id', 'adjustment_type_id', 'value']
+    )
+    forecast_start_date = forecast_df['period'].min() if not forecast_df.empty else None
+
+    def first_value(frame):
+        return float(frame['value'].iloc[0]) if not frame.empty else None
+
+    results = []
+    for period in all_periods_in_range:
+        period_is_historical = forecast_start_date is None or period < forecast_start_date
+        if period_is_historical:
+            base = history_map.get((period, schemas.KEY_FIGURE_MANUAL_INPUT_ID))
+            if base is None:
+                base = history_map.get((period, schemas.KEY_FIGURE_SALES_ID))
+        else:
+            period_stats = forecast_df[(forecast_df['period'] == period) & forecast_df['value'].notna()]
+            stat_sales = first_value(period_stats[period_stats['key_figure_id'] == schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID])
+            stat_orders = first_value(period_stats[period_stats['key_figure_id'] == schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID])
+            if stat_sales is not None and stat_orders is not None:
+                base = stat_sales + stat_orders
+            else:
+                base = stat_sales if stat_sales is not None else stat_orders
+        if base is None:
+            results.append((period, None))
+            continue
+
+        adjusted = base
+        period_adjustments = adjustments_df[adjustments_df['period'] == period]
+        overrides = period_adjustments[period_adjustments['adjustment_type_id'] == schemas.ADJUSTMENT_TYPE_OVERRIDE_ID]
+        override = first_value(overrides[overrides['key_figure_id'].isin(GENERAL_KF_IDS)])
+        if override is None and not period_is_historical:
+            override = first_value(overrides[overrides['key_figure_id'] == schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID])
+            if override is None:
+                override = first_value(overrides[overrides['key_figure_id'] == schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID])
+        if override is not None:
+            adjusted = override
+        else:
+            general = period_adjustments[period_adjustments['key_figure_id'].isin(GENERAL_KF_IDS)]
+            quantity = first_value(general[general['adjustment_type_id'] == schemas.ADJUSTMENT_TYPE_QTY_ID])
+            if quantity is not None:
+                adjusted += quantity
+            percentage = first_value(general[general['adjustment_type_id'] == schemas.ADJUSTMENT_TYPE_PCT_ID])
+            if percentage is not None:
+                adjusted *= (1 + percentage / 100)
+        results.append((period, adjusted))
+    return results
+
+
+def random_case(rng: random.Random, n_periods: int):
+    periods = [date(2020 + month // 12, month % 12 + 1, 1) for month in range(n_periods)]
+    split = rng.randint(0, n_periods)
+
+    def maybe_value(scale):
+        return None if rng.random() < 0.05 else round(rng.uniform(-scale, scale) if scale < 100 else rng.uniform(0, scale), 2)
+
+    history_map = {}
+    for period in periods[:split]:
+        for kf_id in (schemas.KEY_FIGURE_SALES_ID, schemas.KEY_FIGURE_MANUAL_INPUT_ID):
+            if rng.random() < 0.7:
+                history_map[(period, kf_id)] = round(rng.uniform(0, 1000), 2)
+    stat_forecasts = [
+        SimpleNamespace(period=period, key_figure_id=kf_id, value=maybe_value(1000))
+        for period in periods[split:]
+        for kf_id in (schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID)
+        if rng.random() < 0.8
+    ]
+    adjustments = []
+    for _ in range(rng.randint(0, 2 * n_periods)):
+        adjustment_type_id = rng.choice([schemas.ADJUSTMENT_TYPE_QTY_ID, schemas.ADJUSTMENT_TYPE_PCT_ID, schemas.ADJUSTMENT_TYPE_OVERRIDE_ID])
+        adjustments.append(SimpleNamespace(
+            period=rng.choice(periods),
+            key_figure_id=rng.choice([5, 6, 7, 8]),
+            adjustment_type_id=adjustment_type_id,
+            value=maybe_value(50 if adjustment_type_id == schemas.ADJUSTMENT_TYPE_PCT_ID else 500)
+        ))
+    adjustments.sort(key=lambda a: a.period)  # crud los devuelve ordenados por period
+    return periods, stat_forecasts, adjustments, history_map
+
+
+def assert_same_results(expected, actual):
+    assert [p for p, _ in actual] == [p for p, _ in expected]
+    for (period, e), (_, a) in zip(expected, actual):
+        if e is None:
+            assert a is None, f"{period}: expected no value, got {a}"
+        else:
+            assert a is not None and math.isclose(e, a, rel_tol=1e-12, abs_tol=1e-9), f"{period}: expected {e}, got {a}"
+
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_reference_on_random_cases(seed):
+    rng = random.Random(2024 + seed)
+    for _ in range(20):
+        case = random_case(rng, rng.randint(1, 48))
+        assert_same_results(reference_final_forecast(*case), final_forecast.compute_final_forecast_values(*case))
+
+
+def _adjustment(period, key_figure_id, adjustment_type_id, value):
+    return SimpleNamespace(period=period, key_figure_id=key_figure_id, adjustment_type_id=adjustment_type_id, value=value)
+
+
+def test_precedence_rules():
+    history_period, forecast_period = date(2025, 12, 1), date(2026, 1, 1)
+    stat_forecasts = [
+        SimpleNamespace(period=forecast_period, key_figure_id=schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, value=100.0),
+        SimpleNamespace(period=forecast_period, key_figure_id=schemas.KEY_FIGURE_STAT_FORECAST_ORDERS_ID, value=20.0),
+    ]
+    history_map = {
+        (history_period, schemas.KEY_FIGURE_SALES_ID): 50.0,
+        (history_period, schemas.KEY_FIGURE_MANUAL_INPUT_ID): 60.0,
+    }
+    periods = [history_period, forecast_period]
+
+    # Base: Manual input en la historia, Stat Sales + Stat Orders en el pronóstico
+    assert final_forecast.compute_final_forecast_values(periods, stat_forecasts, [], history_map) == [
+        (history_period, 60.0), (forecast_period, 120.0)
+    ]
+
+    # Cantidad y luego porcentaje
+    adjustments = [
+        _adjustment(forecast_period, schemas.KEY_FIGURE_FINAL_FORECAST_ID, schemas.ADJUSTMENT_TYPE_QTY_ID, 30.0),
+        _adjustment(forecast_period, schemas.KEY_FIGURE_MANUAL_INPUT_ID, schemas.ADJUSTMENT_TYPE_PCT_ID, 10.0),
+    ]
+    result = dict(final_forecast.compute_final_forecast_values(periods, stat_forecasts, adjustments, history_map))
+    assert result[forecast_period] == pytest.approx(165.0)
+
+    # El override de Stat Sales le gana a los ajustes de cantidad / porcentaje, sólo en el pronóstico
+    adjustments += [
+        _adjustment(forecast_period, schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, schemas.ADJUSTMENT_TYPE_OVERRIDE_ID, 7.0),
+        _adjustment(history_period, schemas.KEY_FIGURE_STAT_FORECAST_SALES_ID, schemas.ADJUSTMENT_TYPE_OVERRIDE_ID, 8.0),
+    ]
+    result = dict(final_forecast.compute_final_forecast_values(periods, stat_forecasts, adjustments, history_map))
+    assert result == {history_period: 60.0, forecast_period: 7.0}
+
+    # El override de Final Forecast / Manual input le gana a todo
+    adjustments.append(
+        _adjustment(forecast_period, schemas.KEY_FIGURE_FINAL_FORECAST_ID, schemas.ADJUSTMENT_TYPE_OVERRIDE_ID, 9.0)
+    )
+    result = dict(final_forecast.compute_final_forecast_values(periods, stat_forecasts, adjustments, history_map))
+    assert result[forecast_period] == 9.0
+
+
+def test_periods_without_base_stay_empty():
+    period = date(2026, 1, 1)
+    adjustments = [_adjustment(period, schemas.KEY_FIGURE_FINAL_FORECAST_ID, schemas.ADJUSTMENT_TYPE_QTY_ID, 5.0)]
+    assert final_forecast.compute_final_forecast_values([period], [], adjustments, {}) == [(period, None)]
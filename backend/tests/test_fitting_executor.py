@@ -0,0 +1,28 @@
+# backend/tests/test_fitting_executor.py
+# Un error en una serie queda registrado en su resultado y no corta el resto del lote.
+
+import numpy as np
+
+from app import fitting_executor
+
+
+def _fit_or_fail(values: np.ndarray) -> np.ndarray:
+    if values[0] < 0:
+        raise IndexError()
+    if values[0] == 0:
+        raise KeyError("state")
+    return values * 2
+
+
+def test_any_error_is_recorded_per_series():
+    series = [np.array([1.0, 2.0]), np.array([-1.0]), np.array([0.0]), np.array([3.0])]
+    results = {
+        position: (fitted, error)
+        for position, fitted, error in fitting_executor.fit_many(_fit_or_fail, series, {}, chunk_size=len(series))
+    }
+
+    assert sorted(results) == [0, 1, 2, 3]
+    np.testing.assert_array_equal(results[0][0], [2.0, 4.0])
+    np.testing.assert_array_equal(results[3][0], [6.0])
+    assert results[1] == (None, "IndexError")
+    assert results[2] == (None, "'state'")
@@ -105,25 +105,83 @@ export const updateAdjustment = async (adjustmentData) => {
     }
 };
 
+// Función para actualizar muchas celdas de ajuste en un solo request (p.ej. una fila pegada)
+// Devuelve { message, inserted, updated, failed, results } con el estado de cada celda
+export const updateAdjustmentsBulk = async (adjustmentsData) => {
+    try {
+        const response = await fetch(`${API_BASE_URL}/data/adjustments/bulk/`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ adjustments: adjustmentsData }),
+        });
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.detail || 'Error al actualizar los ajustes.');
+        }
+        return await response.json();
+    } catch (error) {
+        console.error('Error updating adjustments in bulk:', error);
+        throw error;
+    }
+};
+
 // Función para generar el pronóstico estadístico
+// Intervalo de consulta del estado de un trabajo en segundo plano (ms)
+const JOB_POLL_INTERVAL_MS = 1000;
+
+// Espera a que termine un trabajo de /jobs y devuelve su resultado
+const waitForJob = async (jobId) => {
+    for (;;) {
+        const response = await fetch(`${API_BASE_URL}/jobs/${jobId}`);
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.detail || 'Error al consultar el estado del trabajo.');
+        }
+        const job = await response.json();
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'El trabajo falló.');
+        }
+        if (job.status === 'cancelled') {
+            throw new Error('El trabajo fue cancelado.');
+        }
+        if (job.status === 'succeeded') {
+            const resultResponse = await fetch(`${API_BASE_URL}/jobs/${jobId}/result`);
+            if (!resultResponse.ok) {
+                const errorData = await resultResponse.json();
+                throw new Error(errorData.detail || 'Error al obtener el resultado del trabajo.');
+            }
+            return (await resultResponse.json()).result;
+        }
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+};
+
+// El pronóstico corre como trabajo en segundo plano (POST /jobs/forecast) y se consulta hasta que termina
 export const generateStatisticalForecast = async (clientId, skuId, historySource, smoothingAlpha, modelName, forecastHorizon) => {
     try {
-        const url = new URL(`${API_BASE_URL}/data/forecast/generate/`);
-        url.searchParams.append('clientId', clientId);
-        url.searchParams.append('skuId', skuId);
-        url.searchParams.append('historySource', historySource); // 'sales', 'shipments', 'order'
-        url.searchParams.append('smoothing_alpha', smoothingAlpha);
-        url.searchParams.append('model_name', modelName);
-        url.searchParams.append('forecast_horizon', forecastHorizon);
-
-        const response = await fetch(url.toString(), {
+        const response = await fetch(`${API_BASE_URL}/jobs/forecast`, {
             method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                client_id: clientId,
+                sku_id: skuId,
+                history_source: historySource, // 'sales', 'shipments', 'order'
+                smoothing_alpha: smoothingAlpha,
+                model_name: modelName,
+                forecast_horizon: forecastHorizon,
+            }),
         });
         if (!response.ok) {
             const errorData = await response.json();
             throw new Error(errorData.detail || 'Error al generar el pronóstico estadístico.');
         }
-        return await response.json();
+        const job = await response.json();
+        const result = await waitForJob(job.job_id);
+        return { message: 'Pronóstico generado y guardado exitosamente', result };
     } catch (error) {
         console.error('Error generating statistical forecast:', error);
         throw error;
@@ -745,6 +745,7 @@ function SalesForecastData({ clientFinalId: propClientFinalId }) {
                             >
                                 <MenuItem value="ETS">ETS (Exponential Smoothing)</MenuItem>
                                 <MenuItem value="ARIMA">ARIMA</MenuItem>
+                                <MenuItem value="AUTO">AUTO (mejor modelo por serie)</MenuItem>
                             </Select>
                         </FormControl>
 
@@ -20,7 +20,8 @@ def main():
             index=['DPG', 'SKU'],
             columns=data['Month'].dt.strftime('%Y-%m'),
             values='Sum of Quantity',
-            aggfunc='sum'
+            aggfunc='sum',
+            observed=True  # DPG y SKU llegan como category: sólo las combinaciones existentes
         ).reset_index()
 
         # -------- FILTROS --------
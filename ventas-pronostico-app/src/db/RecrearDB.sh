@@ -7,4 +7,34 @@ psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/foreca
 # luego, migrar la data
 
 # Desde la RAÍZ de Wirebi
-python ventas-pronostico-app/src/db/migrate_data.py
\ No newline at end of file
+python ventas-pronostico-app/src/db/migrate_data.py
+# o con otro extracto (.xlsx o .csv con las columnas de DB.xlsx):
+# python ventas-pronostico-app/src/db/migrate_data.py ruta/al/extracto.csv
+
+# Índices secundarios sobre una base ya creada (forecaist_schema.sql ya los incluye)
+psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/fact_indexes.sql
+
+# OPCIONAL: particionar fact_history y fact_forecast_versioned por period
+# psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/fact_partitioning.sql
+
+# Final Forecast materializado (sólo para bases creadas antes de agregarlo a forecaist_schema.sql)
+# psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/final_forecast_materialization.sql
+# y materializar las series existentes (desde la RAÍZ de Wirebi)
+# python ventas-pronostico-app/src/db/materialize_final_forecast.py
+
+# Contadores de cambios para ETag / GET condicional (sólo para bases creadas antes de agregarlos a forecaist_schema.sql)
+# psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/change_counters.sql
+
+# Cola de trabajos en segundo plano (sólo para bases creadas antes de agregarla a forecaist_schema.sql)
+# psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/jobs.sql
+
+# Métricas de precisión de los pronósticos (sólo para bases creadas antes de agregarlas a forecaist_schema.sql)
+# psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/forecast_accuracy.sql
+# Cálculo nocturno de las métricas (desde la RAÍZ de Wirebi)
+# python ventas-pronostico-app/src/db/compute_accuracy.py
+
+# Estados de modelo ajustado para re-pronosticar sin reajustar (sólo para bases creadas antes de agregarlos a forecaist_schema.sql)
+# psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/forecast_model_states.sql
+
+# Huellas de la entrada del pronóstico por lotes (sólo para bases creadas antes de agregarlas a forecaist_schema.sql)
+# psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/forecast_input_hashes.sql
@@ -6,6 +6,13 @@ truncate public.manual_input_comments cascade;
 truncate public.forecast_versions cascade;
 truncate public.fact_forecast_versioned cascade;
 truncate public.fact_history cascade;
+truncate public.fact_final_forecast cascade;
+truncate public.final_forecast_series cascade;
+truncate public.change_counters cascade;
+truncate public.jobs cascade;
+truncate public.forecast_accuracy cascade;
+truncate public.forecast_model_states cascade;
+truncate public.forecast_input_hashes cascade;
 truncate public.forecast_smoothing_parameters cascade;
 truncate public.dim_clients cascade;
 truncate public.dim_skus cascade;
@@ -18,6 +25,13 @@ drop table public.manual_input_comments cascade;
 drop table public.forecast_versions cascade;
 drop table public.fact_forecast_versioned cascade;
 drop table public.fact_history cascade;
+drop table public.fact_final_forecast cascade;
+drop table public.final_forecast_series cascade;
+drop table public.change_counters cascade;
+drop table public.jobs cascade;
+drop table public.forecast_accuracy cascade;
+drop table public.forecast_model_states cascade;
+drop table public.forecast_input_hashes cascade;
 drop table public.forecast_smoothing_parameters cascade;
 drop table public.dim_clients cascade;
 drop table public.dim_skus cascade;
\ No newline at end of file
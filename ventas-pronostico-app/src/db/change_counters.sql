@@ -0,0 +1,19 @@
+-- Migración: contadores de cambios para ETag / Last-Modified (GET condicional).
+-- Una fila por alcance ("scope") con un número de versión que las escrituras del backend suben en la
+-- misma transacción (crud.bump_change_counters). Los GET de dimensiones y de la grilla arman el ETag
+-- con estas versiones y responden 304 sin leer las tablas de hechos si no cambió nada.
+-- Alcances: 'dim_clients', 'dim_skus', 'dim_keyfigures', 'dim_adjustment_types', 'fact_history',
+-- 'facts' (cargas masivas) y 'series:<client_id>:<sku_id>'.
+--
+-- Después de cargas que no pasan por el backend (scripts SQL) subir la versión global:
+-- INSERT INTO change_counters (scope) VALUES ('facts')
+--     ON CONFLICT (scope) DO UPDATE SET version = change_counters.version + 1, changed_at = CURRENT_TIMESTAMP;
+--
+-- Uso (desde la RAÍZ de Wirebi):
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/change_counters.sql
+
+CREATE TABLE IF NOT EXISTS change_counters (
+    scope TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
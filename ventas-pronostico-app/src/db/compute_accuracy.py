@@ -0,0 +1,47 @@
+# ventas-pronostico-app/src/db/compute_accuracy.py
+# Recalcula las métricas de precisión de los pronósticos (tabla forecast_accuracy, carga nocturna).
+# Usa app.accuracy.refresh_accuracy_metrics; lo mismo que el trabajo POST /jobs/accuracy del backend.
+#
+# Uso (desde la RAÍZ de Wirebi, con DATABASE_URL definida como para el backend):
+# python ventas-pronostico-app/src/db/compute_accuracy.py
+# python ventas-pronostico-app/src/db/compute_accuracy.py --max-lag 12 --end-period 2025-07-01
+
+import argparse
+import os
+import sys
+from datetime import date
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_parent_dir = os.path.abspath(os.path.join(current_dir, '..', '..', '..', 'backend'))
+if backend_parent_dir not in sys.path:
+    sys.path.insert(0, backend_parent_dir)
+
+from app import accuracy
+from app.database import SessionLocal
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recalcula forecast_accuracy (WAPE, MAPE y bias por lag).")
+    parser.add_argument("--max-lag", type=int, default=accuracy.DEFAULT_MAX_LAG, help="lag máximo en meses")
+    parser.add_argument("--end-period", type=date.fromisoformat, help="primer período que no se evalúa (por defecto el mes actual)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        summary = accuracy.refresh_accuracy_metrics(db, max_lag=args.max_lag, end_period=args.end_period)
+    finally:
+        db.close()
+    for forecast_source in accuracy.FORECAST_SOURCES:
+        counts = summary[forecast_source]
+        print(
+            f"{forecast_source}: {counts['forecast_cells']:,} celdas pronosticadas, "
+            f"{counts['compared_cells']:,} comparadas con reales, {counts['rows']:,} filas de métricas"
+        )
+    print(f"Listo en {summary['elapsed_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# ventas-pronostico-app/src/db/export_facts.py
+# Exporta un cubo de hechos completo a Parquet o Arrow IPC (carga nocturna de BI).
+# Usa app.fact_exporter: cursor del lado del servidor, lotes de EXPORT_BATCH_SIZE filas y memoria constante.
+#
+# Uso (desde la RAÍZ de Wirebi, con DATABASE_URL definida como para el backend):
+# python ventas-pronostico-app/src/db/export_facts.py history history.parquet
+# python ventas-pronostico-app/src/db/export_facts.py forecast_versioned versioned.arrows --format arrow \
+#     --version-id <uuid> --start-period 2025-01-01 --end-period 2025-12-01
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import date
+
+import psycopg2
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_parent_dir = os.path.abspath(os.path.join(current_dir, '..', '..', '..', 'backend'))
+if backend_parent_dir not in sys.path:
+    sys.path.insert(0, backend_parent_dir)
+
+from app import fact_exporter
+from app.config import settings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Exporta fact_history / fact_forecast_stat / fact_forecast_versioned / fact_final_forecast.")
+    parser.add_argument("dataset", choices=list(fact_exporter.EXPORT_DATASETS))
+    parser.add_argument("output", help="Archivo de salida")
+    parser.add_argument("--format", choices=list(fact_exporter.EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--client-id", dest="client_ids", action="append", type=uuid.UUID, default=[])
+    parser.add_argument("--sku-id", dest="sku_ids", action="append", type=uuid.UUID, default=[])
+    parser.add_argument("--start-period", type=date.fromisoformat)
+    parser.add_argument("--end-period", type=date.fromisoformat)
+    parser.add_argument("--key-figure-id", dest="key_figure_ids", action="append", type=int, default=[])
+    parser.add_argument("--source", dest="sources", action="append", default=[], help="sólo history")
+    parser.add_argument("--forecast-run-id", dest="forecast_run_ids", action="append", type=uuid.UUID, default=[], help="sólo forecast_stat")
+    parser.add_argument("--version-id", dest="version_ids", action="append", type=uuid.UUID, default=[], help="sólo forecast_versioned")
+    parser.add_argument("--batch-size", type=int, default=None, help=f"filas por lote (por defecto {settings.EXPORT_BATCH_SIZE})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    filters = {
+        name: getattr(args, name)
+        for name in ("client_ids", "sku_ids", "start_period", "end_period", "key_figure_ids", "sources", "forecast_run_ids", "version_ids")
+    }
+    started = time.perf_counter()
+    rows = 0
+    conn = psycopg2.connect(settings.DATABASE_URL)
+    try:
+        for batch_rows in fact_exporter.write_export(conn, args.dataset, args.output, args.format, filters, args.batch_size):
+            rows += batch_rows
+            print(f"\r{rows:,} filas", end="", flush=True)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    print(f"\rSe exportaron {rows:,} filas de {args.dataset} a {args.output} "
+          f"({os.path.getsize(args.output) / 2**20:,.1f} MB) en {elapsed:.1f} s ({rows / max(elapsed, 1e-9):,.0f} filas/s).")
+
+
+if __name__ == "__main__":
+    main()
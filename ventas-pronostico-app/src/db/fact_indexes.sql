@@ -0,0 +1,50 @@
+-- Migración: índices secundarios para las tablas de hechos.
+-- Las PK empiezan por (client_id, sku_id, client_final_id, ...), así que las consultas de crud.py
+-- que filtran por rango de period, key_figure_id, source o forecast_run_id sin ese prefijo
+-- terminan en un seq scan. Las que filtran por client_id + sku_id ya usan la PK y no necesitan
+-- índices extra (ver fact_indexes_benchmark.sql).
+-- Cada índice indica la consulta de backend/app/crud.py que atiende.
+--
+-- Uso (desde la RAÍZ de Wirebi; CONCURRENTLY no bloquea escrituras y no puede correr en una transacción):
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/fact_indexes.sql
+
+-- fact_history
+-- load_fact_history_matrix (pronóstico por lotes sobre "todos") y get_fact_history_data
+-- filtrando sólo por key_figure_ids / sources / periodos. INCLUDE (value) permite index-only scans.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fact_history_kf_source_period
+    ON fact_history (key_figure_id, source, period) INCLUDE (value);
+-- get_fact_history_data filtrando sólo por rango de periodos.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fact_history_period
+    ON fact_history (period);
+
+-- fact_forecast_stat
+-- get_fact_forecast_stat_data sólo con forecast_run_ids.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fact_forecast_stat_run
+    ON fact_forecast_stat (forecast_run_id);
+-- get_fact_forecast_stat_data sólo con key_figure_ids y/o rango de periodos.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fact_forecast_stat_kf_period
+    ON fact_forecast_stat (key_figure_id, period);
+
+-- fact_adjustments
+-- get_fact_adjustments_data filtrando sólo por rango de periodos.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fact_adjustments_period
+    ON fact_adjustments (period);
+
+-- fact_forecast_versioned (la PK empieza por version_id)
+-- get_fact_forecast_versioned_data con client_ids / sku_ids y rango de periodos, sin version_ids.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fact_forecast_versioned_client_sku_period
+    ON fact_forecast_versioned (client_id, sku_id, period);
+-- get_fact_forecast_versioned_data sólo con rango de periodos / key_figure_ids.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_fact_forecast_versioned_period_kf
+    ON fact_forecast_versioned (period, key_figure_id);
+
+-- Tablas auxiliares: filtros por client_id (parámetros de suavizado y versiones)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forecast_smoothing_parameters_client
+    ON forecast_smoothing_parameters (client_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_forecast_versions_client
+    ON forecast_versions (client_id);
+
+ANALYZE fact_history;
+ANALYZE fact_forecast_stat;
+ANALYZE fact_adjustments;
+ANALYZE fact_forecast_versioned;
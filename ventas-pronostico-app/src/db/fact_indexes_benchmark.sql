@@ -0,0 +1,159 @@
+-- Benchmark de fact_indexes.sql sobre datos sintéticos (no toca las tablas reales).
+-- Genera fact_history, fact_forecast_stat y fact_adjustments en el schema "bench" y mide las
+-- consultas de crud.py antes y después de crear los índices secundarios.
+-- El tamaño se controla con la variable bench_rows (filas de fact_history, 50M por defecto;
+-- fact_forecast_stat y fact_adjustments usan aprox. 1/5 de esa cantidad).
+--
+-- Uso:
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/fact_indexes_benchmark.sql
+-- psql ... -v bench_rows=1000000 -f ventas-pronostico-app/src/db/fact_indexes_benchmark.sql
+-- Al final muestra before_ms / after_ms por consulta. Borrar con: DROP SCHEMA bench CASCADE;
+
+\if :{?bench_rows}
+\else
+\set bench_rows 50000000
+\endif
+
+\set ON_ERROR_STOP on
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+
+-- 60 meses x 2 fuentes (key figure 1 'sales' y 3 'shipments') por serie
+CREATE TABLE bench.series AS
+SELECT s AS series_no,
+       md5('client' || (s % 1000))::uuid AS client_id,
+       md5('sku' || s)::uuid AS sku_id
+FROM generate_series(0, GREATEST(:bench_rows / 120, 1) - 1) AS s;
+
+CREATE TABLE bench.fact_history (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    client_final_id UUID NOT NULL,
+    period DATE NOT NULL,
+    key_figure_id INT NOT NULL,
+    value NUMERIC,
+    source TEXT NOT NULL,
+    PRIMARY KEY (client_id, sku_id, client_final_id, period, key_figure_id, source)
+);
+INSERT INTO bench.fact_history
+SELECT s.client_id, s.sku_id, s.client_id, make_date(2021, 1, 1) + make_interval(months => m),
+       kf.key_figure_id, round((random() * 1000)::numeric, 2), kf.source
+FROM bench.series s
+CROSS JOIN generate_series(0, 59) AS m
+CROSS JOIN (VALUES (1, 'sales'), (3, 'shipments')) AS kf(key_figure_id, source);
+
+CREATE TABLE bench.fact_forecast_stat (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    client_final_id UUID NOT NULL,
+    period DATE NOT NULL,
+    value NUMERIC,
+    model_used TEXT,
+    forecast_run_id UUID,
+    key_figure_id INT NOT NULL,
+    PRIMARY KEY (client_id, sku_id, client_final_id, period, key_figure_id)
+);
+-- Una corrida por cliente (como generate_forecast_batch), 12 meses de Stat Sales y Stat Orders
+INSERT INTO bench.fact_forecast_stat
+SELECT s.client_id, s.sku_id, s.client_id, make_date(2026, 1, 1) + make_interval(months => m),
+       round((random() * 1000)::numeric, 2), 'ETS', md5('run' || (s.series_no % 1000))::uuid, kf.key_figure_id
+FROM bench.series s
+CROSS JOIN generate_series(0, 11) AS m
+CROSS JOIN (VALUES (6), (7)) AS kf(key_figure_id);
+
+CREATE TABLE bench.fact_adjustments (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    client_final_id UUID NOT NULL,
+    period DATE NOT NULL,
+    key_figure_id INT NOT NULL,
+    adjustment_type_id INT NOT NULL,
+    value NUMERIC,
+    PRIMARY KEY (client_id, sku_id, client_final_id, period, key_figure_id)
+);
+INSERT INTO bench.fact_adjustments
+SELECT s.client_id, s.sku_id, s.client_id, make_date(2021, 1, 1) + make_interval(months => m),
+       5, 1 + (m % 3), round((random() * 100)::numeric, 2)
+FROM bench.series s
+CROSS JOIN generate_series(0, 59) AS m
+WHERE (s.series_no + m) % 10 < 4;
+
+ANALYZE bench.fact_history;
+ANALYZE bench.fact_forecast_stat;
+ANALYZE bench.fact_adjustments;
+
+SELECT (SELECT COUNT(*) FROM bench.fact_history) AS fact_history_rows,
+       (SELECT COUNT(*) FROM bench.fact_forecast_stat) AS fact_forecast_stat_rows,
+       (SELECT COUNT(*) FROM bench.fact_adjustments) AS fact_adjustments_rows;
+
+-- Consultas con la forma de las de crud.py; cada una se corre 5 veces y se guarda la mediana.
+CREATE TABLE bench.queries (query_name TEXT PRIMARY KEY, query_sql TEXT NOT NULL);
+INSERT INTO bench.queries VALUES
+('get_fact_history_for_calculation (client+sku+kf+source+period)', $q$
+    SELECT period, value FROM bench.fact_history
+    WHERE client_id = md5('client7')::uuid AND sku_id = md5('sku7')::uuid
+      AND key_figure_id = 1 AND source = 'sales'
+      AND period BETWEEN '2023-01-01' AND '2025-12-01' ORDER BY period $q$),
+('load_fact_history_matrix (kf+source+period, 1 año)', $q$
+    SELECT COUNT(*), SUM(value) FROM bench.fact_history
+    WHERE key_figure_id = 3 AND source = 'shipments'
+      AND period BETWEEN '2025-01-01' AND '2025-12-01' $q$),
+('get_fact_history_data (sólo period, 1 mes)', $q$
+    SELECT COUNT(*) FROM bench.fact_history WHERE period = '2024-06-01' $q$),
+('get_fact_forecast_stat_data (forecast_run_id)', $q$
+    SELECT COUNT(*) FROM bench.fact_forecast_stat WHERE forecast_run_id = md5('run7')::uuid $q$),
+('get_fact_forecast_stat_data (client+sku+kf+period)', $q$
+    SELECT period, value FROM bench.fact_forecast_stat
+    WHERE client_id = md5('client7')::uuid AND sku_id = md5('sku7')::uuid
+      AND key_figure_id = 6 AND period BETWEEN '2026-01-01' AND '2026-12-01' $q$),
+('get_fact_adjustments_for_calculation (client+sku+period)', $q$
+    SELECT period, key_figure_id, adjustment_type_id, value FROM bench.fact_adjustments
+    WHERE client_id = md5('client7')::uuid AND sku_id = md5('sku7')::uuid
+      AND period BETWEEN '2023-01-01' AND '2025-12-01' ORDER BY period $q$);
+
+CREATE TABLE bench.results (query_name TEXT, phase TEXT, elapsed_ms NUMERIC);
+
+CREATE FUNCTION bench.run_queries(run_phase TEXT) RETURNS VOID AS $$
+DECLARE
+    q RECORD;
+    started TIMESTAMPTZ;
+    timings NUMERIC[];
+    i INT;
+BEGIN
+    FOR q IN SELECT query_name, query_sql FROM bench.queries LOOP
+        timings := ARRAY[]::NUMERIC[];
+        FOR i IN 1..5 LOOP
+            started := clock_timestamp();
+            EXECUTE q.query_sql;
+            timings := timings || (EXTRACT(EPOCH FROM clock_timestamp() - started) * 1000)::NUMERIC;
+        END LOOP;
+        INSERT INTO bench.results
+        SELECT q.query_name, run_phase, percentile_cont(0.5) WITHIN GROUP (ORDER BY t)::NUMERIC
+        FROM unnest(timings) AS t;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT bench.run_queries('before');
+
+-- Mismos índices que fact_indexes.sql (las consultas por client + sku sirven de control: usan la PK)
+CREATE INDEX ON bench.fact_history (key_figure_id, source, period) INCLUDE (value);
+CREATE INDEX ON bench.fact_history (period);
+CREATE INDEX ON bench.fact_forecast_stat (forecast_run_id);
+CREATE INDEX ON bench.fact_forecast_stat (key_figure_id, period);
+CREATE INDEX ON bench.fact_adjustments (period);
+VACUUM ANALYZE bench.fact_history;
+VACUUM ANALYZE bench.fact_forecast_stat;
+VACUUM ANALYZE bench.fact_adjustments;
+
+SELECT bench.run_queries('after');
+
+SELECT b.query_name,
+       round(b.elapsed_ms, 2) AS before_ms,
+       round(a.elapsed_ms, 2) AS after_ms,
+       round(b.elapsed_ms / NULLIF(a.elapsed_ms, 0), 1) AS speedup
+FROM bench.results b
+JOIN bench.results a ON a.query_name = b.query_name AND a.phase = 'after'
+WHERE b.phase = 'before'
+ORDER BY b.query_name;
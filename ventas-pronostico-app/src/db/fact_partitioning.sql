@@ -0,0 +1,89 @@
+-- Migración OPCIONAL: particionado por rango de period de fact_history y fact_forecast_versioned.
+-- Convierte cada tabla en una tabla particionada con una partición por año (desde el año del
+-- periodo más antiguo hasta dos años después del más reciente) más una partición DEFAULT.
+-- Las consultas con rango de period (grilla, pronóstico por lotes, exportaciones) leen sólo
+-- las particiones del rango, y los años viejos se pueden archivar con DETACH PARTITION.
+--
+-- Correrla en una ventana de mantenimiento: copia los datos y bloquea ambas tablas mientras dura.
+-- Aplicar después de fact_indexes.sql (los índices se recrean sobre las tablas particionadas).
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/fact_partitioning.sql
+--
+-- Para agregar años nuevos más adelante:
+-- SELECT create_yearly_period_partitions('fact_history', 2030, 2030);
+
+CREATE OR REPLACE FUNCTION create_yearly_period_partitions(parent_table TEXT, from_year INT, to_year INT)
+RETURNS VOID AS $$
+DECLARE
+    partition_year INT;
+BEGIN
+    FOR partition_year IN from_year..to_year LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            parent_table || '_' || partition_year, parent_table,
+            make_date(partition_year, 1, 1), make_date(partition_year + 1, 1, 1)
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+BEGIN;
+
+-- fact_history
+ALTER TABLE fact_history RENAME TO fact_history_unpartitioned;
+ALTER INDEX fact_history_pkey RENAME TO fact_history_unpartitioned_pkey;
+
+CREATE TABLE fact_history (
+    LIKE fact_history_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (period);
+ALTER TABLE fact_history ADD PRIMARY KEY (client_id, sku_id, client_final_id, period, key_figure_id, source);
+ALTER TABLE fact_history ADD FOREIGN KEY (key_figure_id) REFERENCES dim_keyfigures(key_figure_id);
+ALTER TABLE fact_history ADD FOREIGN KEY (client_id) REFERENCES dim_clients(client_id);
+ALTER TABLE fact_history ADD FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id);
+
+SELECT create_yearly_period_partitions(
+    'fact_history',
+    COALESCE((SELECT EXTRACT(YEAR FROM MIN(period))::INT FROM fact_history_unpartitioned), EXTRACT(YEAR FROM CURRENT_DATE)::INT - 3),
+    COALESCE((SELECT EXTRACT(YEAR FROM MAX(period))::INT FROM fact_history_unpartitioned), EXTRACT(YEAR FROM CURRENT_DATE)::INT) + 2
+);
+CREATE TABLE fact_history_default PARTITION OF fact_history DEFAULT;
+
+INSERT INTO fact_history SELECT * FROM fact_history_unpartitioned;
+DROP TABLE fact_history_unpartitioned;
+
+CREATE INDEX ix_fact_history_kf_source_period
+    ON fact_history (key_figure_id, source, period) INCLUDE (value);
+CREATE INDEX ix_fact_history_period
+    ON fact_history (period);
+
+-- fact_forecast_versioned
+ALTER TABLE fact_forecast_versioned RENAME TO fact_forecast_versioned_unpartitioned;
+ALTER INDEX fact_forecast_versioned_pkey RENAME TO fact_forecast_versioned_unpartitioned_pkey;
+
+CREATE TABLE fact_forecast_versioned (
+    LIKE fact_forecast_versioned_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (period);
+ALTER TABLE fact_forecast_versioned ADD PRIMARY KEY (version_id, client_id, sku_id, client_final_id, period, key_figure_id);
+ALTER TABLE fact_forecast_versioned ADD FOREIGN KEY (version_id) REFERENCES forecast_versions(version_id);
+ALTER TABLE fact_forecast_versioned ADD FOREIGN KEY (key_figure_id) REFERENCES dim_keyfigures(key_figure_id);
+ALTER TABLE fact_forecast_versioned ADD FOREIGN KEY (client_id) REFERENCES dim_clients(client_id);
+ALTER TABLE fact_forecast_versioned ADD FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id);
+
+SELECT create_yearly_period_partitions(
+    'fact_forecast_versioned',
+    COALESCE((SELECT EXTRACT(YEAR FROM MIN(period))::INT FROM fact_forecast_versioned_unpartitioned), EXTRACT(YEAR FROM CURRENT_DATE)::INT - 3),
+    COALESCE((SELECT EXTRACT(YEAR FROM MAX(period))::INT FROM fact_forecast_versioned_unpartitioned), EXTRACT(YEAR FROM CURRENT_DATE)::INT) + 2
+);
+CREATE TABLE fact_forecast_versioned_default PARTITION OF fact_forecast_versioned DEFAULT;
+
+INSERT INTO fact_forecast_versioned SELECT * FROM fact_forecast_versioned_unpartitioned;
+DROP TABLE fact_forecast_versioned_unpartitioned;
+
+CREATE INDEX ix_fact_forecast_versioned_client_sku_period
+    ON fact_forecast_versioned (client_id, sku_id, period);
+CREATE INDEX ix_fact_forecast_versioned_period_kf
+    ON fact_forecast_versioned (period, key_figure_id);
+
+COMMIT;
+
+ANALYZE fact_history;
+ANALYZE fact_forecast_versioned;
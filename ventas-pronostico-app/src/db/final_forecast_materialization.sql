@@ -0,0 +1,33 @@
+-- Migración: Final Forecast (key figure 8) materializado.
+-- fact_final_forecast guarda el valor calculado por celda (client, sku, period) y final_forecast_series
+-- marca qué cliente/SKU ya está materializado. El backend materializa una serie al escribir ajustes,
+-- historia o pronóstico estadístico, y al importar historia (crud.refresh_final_forecast); las lecturas
+-- no escriben, una serie sin materializar se calcula en memoria en cada lectura.
+--
+-- Después de crear las tablas, y después de cargas masivas que no pasan por el backend (scripts SQL),
+-- vaciar final_forecast_series y materializar todo de nuevo:
+-- TRUNCATE final_forecast_series, fact_final_forecast;
+-- python ventas-pronostico-app/src/db/materialize_final_forecast.py
+--
+-- Uso (desde la RAÍZ de Wirebi):
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/final_forecast_materialization.sql
+
+CREATE TABLE IF NOT EXISTS fact_final_forecast (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    period DATE NOT NULL,
+    value FLOAT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (client_id, sku_id, period),
+    FOREIGN KEY (client_id) REFERENCES dim_clients(client_id),
+    FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id)
+);
+
+CREATE TABLE IF NOT EXISTS final_forecast_series (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (client_id, sku_id),
+    FOREIGN KEY (client_id) REFERENCES dim_clients(client_id),
+    FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id)
+);
@@ -185,4 +185,129 @@ CREATE TABLE IF NOT EXISTS manual_input_comments (
     FOREIGN KEY (key_figure_id) REFERENCES dim_keyfigures(key_figure_id),
     FOREIGN KEY (client_id) REFERENCES dim_clients(client_id), 
     FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id) 
-);
\ No newline at end of file
+);
+
+-- Final Forecast materializado (lo mantiene el backend, ver crud.refresh_final_forecast)
+CREATE TABLE IF NOT EXISTS fact_final_forecast (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    period DATE NOT NULL,
+    value FLOAT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (client_id, sku_id, period),
+    FOREIGN KEY (client_id) REFERENCES dim_clients(client_id),
+    FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id)
+);
+
+CREATE TABLE IF NOT EXISTS final_forecast_series (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (client_id, sku_id),
+    FOREIGN KEY (client_id) REFERENCES dim_clients(client_id),
+    FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id)
+);
+
+-- Contadores de cambios para ETag / Last-Modified (los suben las escrituras del backend, ver change_counters.sql)
+CREATE TABLE IF NOT EXISTS change_counters (
+    scope TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Cola de trabajos en segundo plano (ver jobs.sql y app/jobs.py)
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id UUID PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed', 'cancelled')),
+    params JSONB NOT NULL DEFAULT '{}',
+    progress_done BIGINT NOT NULL DEFAULT 0,
+    progress_total BIGINT,
+    progress_message TEXT,
+    result JSONB,
+    error TEXT,
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    user_id UUID,
+    worker TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_queued ON jobs (created_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at);
+
+-- Métricas de precisión de los pronósticos por lag (ver forecast_accuracy.sql y app/accuracy.py)
+CREATE TABLE IF NOT EXISTS forecast_accuracy (
+    accuracy_id BIGSERIAL PRIMARY KEY,
+    forecast_source TEXT NOT NULL CHECK (forecast_source IN ('stat', 'versioned')),
+    key_figure_id INT NOT NULL,
+    lag INT NOT NULL,
+    level TEXT NOT NULL CHECK (level IN ('series', 'client', 'total')),
+    client_id UUID,
+    sku_id UUID,
+    periods INT NOT NULL,
+    actual_sum FLOAT NOT NULL,
+    abs_error_sum FLOAT NOT NULL,
+    error_sum FLOAT NOT NULL,
+    wape FLOAT,
+    mape FLOAT,
+    bias FLOAT,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_forecast_accuracy_level ON forecast_accuracy (level, forecast_source, key_figure_id, lag);
+CREATE INDEX IF NOT EXISTS ix_forecast_accuracy_client_sku ON forecast_accuracy (client_id, sku_id);
+
+-- Estados de modelo ajustado por serie y corrida (ver forecast_model_states.sql y app/forecast_engine.py)
+CREATE TABLE IF NOT EXISTS forecast_model_states (
+    forecast_run_id UUID NOT NULL,
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    history_source TEXT NOT NULL,
+    history_key_figure_id INT NOT NULL,
+    model_name TEXT NOT NULL,
+    model_used TEXT NOT NULL,
+    model_kind TEXT NOT NULL CHECK (model_kind IN ('holt_winters', 'ses', 'seasonal_naive', 'croston', 'arima')),
+    params JSONB NOT NULL,
+    state JSONB NOT NULL,
+    rmse FLOAT NOT NULL,
+    history_start DATE NOT NULL,
+    history_values FLOAT[] NOT NULL,
+    updates_since_fit INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (forecast_run_id, client_id, sku_id),
+    FOREIGN KEY (forecast_run_id) REFERENCES forecast_smoothing_parameters(forecast_run_id),
+    FOREIGN KEY (client_id) REFERENCES dim_clients(client_id),
+    FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_forecast_model_states_series ON forecast_model_states (client_id, sku_id, history_source, model_name, created_at);
+
+-- Huellas de la entrada del pronóstico por lotes (ver forecast_input_hashes.sql y app/forecast_engine.py)
+CREATE TABLE IF NOT EXISTS forecast_input_hashes (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    key_figure_id INT NOT NULL,
+    input_hash TEXT NOT NULL,
+    forecast_run_id UUID NOT NULL,
+    forecast_periods INT NOT NULL,
+    forecast_seconds FLOAT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (client_id, sku_id, key_figure_id),
+    FOREIGN KEY (forecast_run_id) REFERENCES forecast_smoothing_parameters(forecast_run_id),
+    FOREIGN KEY (client_id) REFERENCES dim_clients(client_id),
+    FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id),
+    FOREIGN KEY (key_figure_id) REFERENCES dim_keyfigures(key_figure_id)
+);
+
+-- Índices secundarios (para una base existente usar fact_indexes.sql, que los crea CONCURRENTLY)
+CREATE INDEX IF NOT EXISTS ix_fact_history_kf_source_period ON fact_history (key_figure_id, source, period) INCLUDE (value);
+CREATE INDEX IF NOT EXISTS ix_fact_history_period ON fact_history (period);
+CREATE INDEX IF NOT EXISTS ix_fact_forecast_stat_run ON fact_forecast_stat (forecast_run_id);
+CREATE INDEX IF NOT EXISTS ix_fact_forecast_stat_kf_period ON fact_forecast_stat (key_figure_id, period);
+CREATE INDEX IF NOT EXISTS ix_fact_adjustments_period ON fact_adjustments (period);
+CREATE INDEX IF NOT EXISTS ix_fact_forecast_versioned_client_sku_period ON fact_forecast_versioned (client_id, sku_id, period);
+CREATE INDEX IF NOT EXISTS ix_fact_forecast_versioned_period_kf ON fact_forecast_versioned (period, key_figure_id);
+CREATE INDEX IF NOT EXISTS ix_forecast_smoothing_parameters_client ON forecast_smoothing_parameters (client_id);
+CREATE INDEX IF NOT EXISTS ix_forecast_versions_client ON forecast_versions (client_id);
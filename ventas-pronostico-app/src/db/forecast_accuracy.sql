@@ -0,0 +1,31 @@
+-- Migración: métricas de precisión de los pronósticos (app/accuracy.py).
+-- Compara lo pronosticado (fact_forecast_versioned de cada versión y fact_forecast_stat) con la
+-- historia real de los períodos ya cerrados, por lag = meses entre la creación del pronóstico (la
+-- versión o la corrida) y el período pronosticado. Una fila por (origen, key figure, lag) y nivel:
+-- 'series' (cliente/SKU), 'client' y 'total'. Las sumas permiten reagregar; wape, mape y bias quedan
+-- calculadas. La tabla se reconstruye completa en cada cálculo (nocturno: compute_accuracy.py o
+-- POST /jobs/accuracy), por eso no tiene claves foráneas.
+--
+-- Uso (desde la RAÍZ de Wirebi):
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/forecast_accuracy.sql
+
+CREATE TABLE IF NOT EXISTS forecast_accuracy (
+    accuracy_id BIGSERIAL PRIMARY KEY,
+    forecast_source TEXT NOT NULL CHECK (forecast_source IN ('stat', 'versioned')),
+    key_figure_id INT NOT NULL,
+    lag INT NOT NULL,
+    level TEXT NOT NULL CHECK (level IN ('series', 'client', 'total')),
+    client_id UUID,
+    sku_id UUID,
+    periods INT NOT NULL,
+    actual_sum FLOAT NOT NULL,
+    abs_error_sum FLOAT NOT NULL,
+    error_sum FLOAT NOT NULL,
+    wape FLOAT,
+    mape FLOAT,
+    bias FLOAT,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_forecast_accuracy_level ON forecast_accuracy (level, forecast_source, key_figure_id, lag);
+CREATE INDEX IF NOT EXISTS ix_forecast_accuracy_client_sku ON forecast_accuracy (client_id, sku_id);
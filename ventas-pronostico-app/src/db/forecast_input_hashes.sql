@@ -0,0 +1,25 @@
+-- Migración: huellas de la entrada del pronóstico por lotes (forecast_engine.generate_forecast_batch).
+-- Una fila por serie y key figure del pronóstico estadístico con el hash de su historia de entrada y
+-- de la configuración del modelo, y la corrida que escribió su pronóstico. Si en la corrida siguiente
+-- la huella es la misma y las filas de fact_forecast_stat siguen siendo las de esa corrida, la serie no
+-- se vuelve a ajustar. forecast_seconds es el tiempo de ajuste y escritura por serie de esa corrida (el
+-- ahorro estimado).
+--
+-- Uso (desde la RAÍZ de Wirebi):
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/forecast_input_hashes.sql
+
+CREATE TABLE IF NOT EXISTS forecast_input_hashes (
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    key_figure_id INT NOT NULL,
+    input_hash TEXT NOT NULL,
+    forecast_run_id UUID NOT NULL,
+    forecast_periods INT NOT NULL,
+    forecast_seconds FLOAT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (client_id, sku_id, key_figure_id),
+    FOREIGN KEY (forecast_run_id) REFERENCES forecast_smoothing_parameters(forecast_run_id),
+    FOREIGN KEY (client_id) REFERENCES dim_clients(client_id),
+    FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id),
+    FOREIGN KEY (key_figure_id) REFERENCES dim_keyfigures(key_figure_id)
+);
@@ -0,0 +1,38 @@
+-- Migración: estados de modelo ajustado por serie y corrida (forecast_engine.generate_forecast).
+-- Guarda los parámetros ajustados, los estados finales (nivel / tendencia / estacionalidad, o los
+-- coeficientes ARIMA) y la historia que resumen, ligados a la corrida de
+-- forecast_smoothing_parameters. Con la misma historia se re-pronostica desde el estado y con meses
+-- nuevos el estado avanza sin volver a correr el optimizador.
+--
+-- Uso (desde la RAÍZ de Wirebi):
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/forecast_model_states.sql
+
+CREATE TABLE IF NOT EXISTS forecast_model_states (
+    forecast_run_id UUID NOT NULL,
+    client_id UUID NOT NULL,
+    sku_id UUID NOT NULL,
+    history_source TEXT NOT NULL,
+    history_key_figure_id INT NOT NULL,
+    model_name TEXT NOT NULL,
+    model_used TEXT NOT NULL,
+    model_kind TEXT NOT NULL CHECK (model_kind IN ('holt_winters', 'ses', 'seasonal_naive', 'croston', 'arima')),
+    params JSONB NOT NULL,
+    state JSONB NOT NULL,
+    rmse FLOAT NOT NULL,
+    history_start DATE NOT NULL,
+    history_values FLOAT[] NOT NULL,
+    updates_since_fit INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (forecast_run_id, client_id, sku_id),
+    FOREIGN KEY (forecast_run_id) REFERENCES forecast_smoothing_parameters(forecast_run_id),
+    FOREIGN KEY (client_id) REFERENCES dim_clients(client_id),
+    FOREIGN KEY (sku_id) REFERENCES dim_skus(sku_id)
+);
+
+-- Tablas creadas con la clave anterior (forecast_run_id, sku_id): una corrida por lotes es por
+-- cliente y cubre muchos SKUs, así que la serie se identifica con cliente y SKU como en las demás tablas
+ALTER TABLE forecast_model_states
+    DROP CONSTRAINT IF EXISTS forecast_model_states_pkey,
+    ADD PRIMARY KEY (forecast_run_id, client_id, sku_id);
+
+CREATE INDEX IF NOT EXISTS ix_forecast_model_states_series ON forecast_model_states (client_id, sku_id, history_source, model_name, created_at);
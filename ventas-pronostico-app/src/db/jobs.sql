@@ -0,0 +1,31 @@
+-- Migración: cola persistente de trabajos en segundo plano (app/jobs.py).
+-- Pronósticos (uno o por lotes), snapshots de versiones e importaciones de historia se encolan acá y
+-- los ejecutan los workers de los procesos del backend, que toman cada trabajo con
+-- SELECT ... FOR UPDATE SKIP LOCKED. status: queued -> running -> succeeded | failed | cancelled.
+-- heartbeat_at lo renueva el worker mientras corre; un trabajo 'running' sin latido se marca failed.
+--
+-- Uso (desde la RAÍZ de Wirebi):
+-- psql -h localhost -U fr94901 -d forecaist -f ventas-pronostico-app/src/db/jobs.sql
+
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id UUID PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed', 'cancelled')),
+    params JSONB NOT NULL DEFAULT '{}',
+    progress_done BIGINT NOT NULL DEFAULT 0,
+    progress_total BIGINT,
+    progress_message TEXT,
+    result JSONB,
+    error TEXT,
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    user_id UUID,
+    worker TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+-- Cola: los workers buscan el trabajo 'queued' más antiguo
+CREATE INDEX IF NOT EXISTS ix_jobs_queued ON jobs (created_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at);
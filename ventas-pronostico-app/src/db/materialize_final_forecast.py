@@ -0,0 +1,46 @@
+# ventas-pronostico-app/src/db/materialize_final_forecast.py
+# Materializa el Final Forecast (fact_final_forecast) de las series que todavía no lo tienen: bases
+# creadas antes de la materialización o cargas que no pasan por el backend (scripts SQL). Hasta
+# entonces esas series se calculan en memoria en cada lectura. Usa app.crud.materialize_pending_final_forecast.
+#
+# Uso (desde la RAÍZ de Wirebi, con DATABASE_URL definida como para el backend):
+# python ventas-pronostico-app/src/db/materialize_final_forecast.py
+# python ventas-pronostico-app/src/db/materialize_final_forecast.py --chunk-size 1000
+
+import argparse
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_parent_dir = os.path.abspath(os.path.join(current_dir, '..', '..', '..', 'backend'))
+if backend_parent_dir not in sys.path:
+    sys.path.insert(0, backend_parent_dir)
+
+from app import crud
+from app.database import SessionLocal
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Materializa el Final Forecast de las series pendientes.")
+    parser.add_argument("--chunk-size", type=int, default=500, help="series por transacción")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started_at = time.perf_counter()
+    db = SessionLocal()
+    try:
+        series = crud.materialize_pending_final_forecast(
+            db,
+            chunk_size=args.chunk_size,
+            progress_callback=lambda done, total: print(f"{done:,} / {total:,} series", end="\r")
+        )
+    finally:
+        db.close()
+    print(f"{series:,} series materializadas en {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -37,7 +37,7 @@ backend_parent_dir = os.path.abspath(os.path.join(current_dir, '..', '..', '..',
 if backend_parent_dir not in sys.path:
     sys.path.insert(0, backend_parent_dir)
 
-from app import models, schemas
+from app import models, schemas, history_importer
 from app.database import SessionLocal, engine
 
 
@@ -105,174 +105,49 @@ def get_key_figure_id_by_name(conn, name):
         result = cur.fetchone()
         return result[0] if result else None
 
+def insert_initial_forecast_version(conn, client_id):
+    """Crea la corrida de suavizado y la versión inicial asociadas a la carga del Excel."""
+    initial_forecast_run_id = uuid.uuid4()
+    initial_version_id = uuid.uuid4()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO forecast_smoothing_parameters (forecast_run_id, client_id, alpha, user_id)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (forecast_run_id) DO NOTHING;
+            """, (initial_forecast_run_id, client_id, 0.5, DEFAULT_USER_ID))
+
+            cur.execute("""
+                INSERT INTO forecast_versions (version_id, client_id, name, created_at, created_by, history_source, model_used, forecast_run_id, notes)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP, %s, %s, %s, %s, %s)
+                ON CONFLICT (version_id) DO NOTHING;
+            """, (initial_version_id, client_id, 'Initial Excel Load Version', DEFAULT_USER_ID, 'sales', 'Manual Excel Load', initial_forecast_run_id, 'Version created during initial data migration from DB.xlsx'))
+        conn.commit()
+    except Exception as e:
+        print(f"Advertencia: Error al insertar/verificar registros iniciales para tablas auxiliares: {e}. Puede que ya existan o haya un problema de FK.")
+        conn.rollback()
+
 def migrate_db_xlsx_to_postgres(file_path):
     """
-    Lee el archivo DB.xlsx e inserta todos los datos relevantes en fact_history.
+    Lee el archivo DB.xlsx (o un CSV con las mismas columnas) e inserta todos los datos relevantes
+    en fact_history: clientes y SKUs, historia cruda ('Sales', 'Order', 'Shipments') y Manual input.
+    La carga la hace app.history_importer (COPY a una tabla temporal + un único upsert).
     """
     try:
-        df = pd.read_excel(file_path)
-        print(f"Archivo '{file_path}' leído exitosamente. Primeras 5 filas:")
-        print(df.head())
-
-        df.rename(columns={
-            'Month': 'period',
-            'DPG': 'client_name',
-            'SKU': 'sku_name',
-            'Sum of Quantity': 'value',
-            'KeyFigure': 'key_figure_name' # Contendrá 'Sales', 'Order', 'Shipments'
-        }, inplace=True)
-
-        df.dropna(subset=['key_figure_name', 'period', 'value', 'client_name', 'sku_name'], inplace=True)
-        
-        df['period'] = pd.to_datetime(df['period']).dt.date
-
         with get_db_connection() as conn:
             insert_dim_keyfigures(conn)
             insert_dim_adjustment_types(conn)
-            
-            # Obtener los IDs de las nuevas Key Figures por nombre
-            sales_kf_id = get_key_figure_id_by_name(conn, 'Sales') 
-            orders_kf_id = get_key_figure_id_by_name(conn, 'Orders')
-            manual_input_kf_id = get_key_figure_id_by_name(conn, 'Manual input')
-            
-            if sales_kf_id is None:
-                print("Error: 'Sales' KeyFigure ID no encontrado. No se puede migrar fact_history.")
-                return
-            if orders_kf_id is None:
-                print("Error: 'Orders' KeyFigure ID no encontrado. No se puede migrar fact_history.")
-                return
-            if manual_input_kf_id is None:
-                print("Error: 'Manual input' KeyFigure ID no encontrado. No se puede migrar fact_history.")
-                return
-
 
-            history_data_to_insert_dicts = {} 
-            manual_input_data_to_insert_dicts = {} # Datos para 'Manual input' (ID 5)
-            
-            client_name_to_uuid_map = {}
-            sku_name_to_uuid_map = {}
-            
-            try:
-                with conn.cursor() as cur:
-                    unique_client_names = df['client_name'].unique()
-                    for c_name in unique_client_names:
-                        c_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, str(c_name).strip())
-                        client_name_to_uuid_map[c_name] = c_uuid
-                        cur.execute("""
-                            INSERT INTO dim_clients (client_id, client_name)
-                            VALUES (%s, %s)
-                            ON CONFLICT (client_id) DO UPDATE SET client_name = EXCLUDED.client_name;
-                        """, (c_uuid, c_name.strip()))
-                    
-                    unique_sku_names = df['sku_name'].unique()
-                    for s_name in unique_sku_names:
-                        s_uuid = uuid.uuid5(uuid.NAMESPACE_DNS, str(s_name).strip())
-                        sku_name_to_uuid_map[s_name] = s_uuid
-                        cur.execute("""
-                            INSERT INTO dim_skus (sku_id, sku_name)
-                            VALUES (%s, %s)
-                            ON CONFLICT (sku_id) DO UPDATE SET sku_name = EXCLUDED.sku_name;
-                        """, (s_uuid, s_name.strip()))
-                    conn.commit()
-                    print("Nombres de clientes y SKUs insertados/verificados en tablas dimensionales.")
+            result = history_importer.import_history(
+                conn, history_importer.read_history_file(file_path), user_id=DEFAULT_USER_ID
+            )
+            print(f"Clientes: {result['clients']}, SKUs: {result['skus']} insertados/verificados en tablas dimensionales.")
+            print(f"Se leyeron {result['rows_read']} filas, {result['rows_staged']} válidas; "
+                  f"se insertaron/actualizaron {result['rows_merged']} filas (historia cruda + Manual input) en fact_history.")
+            print(f"Tiempo de carga: {result['seconds']:.1f} s ({result['rows_read'] / max(result['seconds'], 1e-9):,.0f} filas/s).")
 
-                    initial_forecast_run_id = uuid.uuid4()
-                    initial_version_id = uuid.uuid4()
-                    
-                    dummy_client_id_for_forecast = next(iter(client_name_to_uuid_map.values()), uuid.UUID('a1b2c3d4-e5f6-7890-1234-567890abcdef'))
-                    
-                    cur.execute("""
-                        INSERT INTO forecast_smoothing_parameters (forecast_run_id, client_id, alpha, user_id)
-                        VALUES (%s, %s, %s, %s)
-                        ON CONFLICT (forecast_run_id) DO NOTHING;
-                    """, (initial_forecast_run_id, dummy_client_id_for_forecast, 0.5, DEFAULT_USER_ID))
-                    conn.commit()
-                    
-                    cur.execute("""
-                        INSERT INTO forecast_versions (version_id, client_id, name, created_at, created_by, history_source, model_used, forecast_run_id, notes)
-                        VALUES (%s, %s, %s, CURRENT_TIMESTAMP, %s, %s, %s, %s, %s)
-                        ON CONFLICT (version_id) DO NOTHING;
-                    """, (initial_version_id, dummy_client_id_for_forecast, 'Initial Excel Load Version', DEFAULT_USER_ID, 'sales', 'Manual Excel Load', initial_forecast_run_id, 'Version created during initial data migration from DB.xlsx'))
-                    conn.commit()
-
-            except Exception as e:
-                print(f"Advertencia: Error al insertar/verificar registros iniciales para tablas auxiliares o dim_clients/skus: {e}. Puede que ya existan o haya un problema de FK.")
-                conn.rollback()
-
-            df_processed = df.copy()
-            
-            df_processed = df_processed[df_processed['key_figure_name'].isin(['Sales', 'Order', 'Shipments'])].copy()
-
-            for _, row in df_processed.iterrows():
-                client_name = str(row['client_name']).strip()
-                sku_name = str(row['sku_name']).strip()
-                key_figure_name_from_excel = str(row['key_figure_name']).strip() # 'Sales', 'Order', 'Shipments'
-                value = row['value']
-
-                current_client_id = client_name_to_uuid_map.get(client_name)
-                current_sku_id = sku_name_to_uuid_map.get(sku_name)
-                
-                client_final_combined_id = f"{client_name}-{sku_name}"
-                current_client_final_id = uuid.uuid5(uuid.NAMESPACE_DNS, client_final_combined_id)
-
-                kf_id_for_raw_history = None
-                source_for_raw_history = key_figure_name_from_excel.lower() # 'sales', 'order', 'shipments'
-
-                if key_figure_name_from_excel == 'Sales':
-                    kf_id_for_raw_history = sales_kf_id
-                elif key_figure_name_from_excel == 'Order' or key_figure_name_from_excel == 'Shipments':
-                    kf_id_for_raw_history = orders_kf_id # Mapeamos 'Order' y 'Shipments' a la KF 'Orders'
-                
-                if current_client_id and current_sku_id and kf_id_for_raw_history and source_for_raw_history and pd.notna(value):
-                    pk_tuple_raw_history = (current_client_id, current_sku_id, current_client_final_id, row['period'], kf_id_for_raw_history, source_for_raw_history)
-                    history_data_to_insert_dicts[pk_tuple_raw_history] = (
-                        current_client_id, current_sku_id, current_client_final_id, row['period'],
-                        source_for_raw_history, kf_id_for_raw_history, value, DEFAULT_USER_ID
-                    )
-                    
-                    if pd.notna(value): 
-                         pk_tuple_manual_input = (current_client_id, current_sku_id, current_client_final_id, row['period'], manual_input_kf_id, 'sales') # La fuente para Manual input
-                         manual_input_data_to_insert_dicts[pk_tuple_manual_input] = (
-                            current_client_id, current_sku_id, current_client_final_id, row['period'],
-                            'sales', manual_input_kf_id, value, 
-                            DEFAULT_USER_ID
-                        )
-                else:
-                    print(f"Advertencia: Faltan IDs o valores nulos para la fila ({client_name}, {sku_name}, {row['period']}, {key_figure_name_from_excel}, {value}). Fila omitida.")
-            
-            # Convertir diccionarios a listas de tuplas para execute_values
-            history_data_to_insert_final = list(history_data_to_insert_dicts.values())
-            manual_input_data_to_insert_final = list(manual_input_data_to_insert_dicts.values())
-
-
-            if len(history_data_to_insert_final) < len(history_data_to_insert_dicts): 
-                print(f"Eliminadas {len(history_data_to_insert_dicts) - len(history_data_to_insert_final)} filas duplicadas internas para Historial Crudo.")
-            if len(manual_input_data_to_insert_final) < len(manual_input_data_to_insert_dicts): 
-                print(f"Eliminadas {len(manual_input_data_to_insert_dicts) - len(manual_input_data_to_insert_final)} filas duplicadas internas para Manual input.")
-            
-            with conn.cursor() as cursor:
-                # Query para Historial Crudo y Manual Input (ambos van a fact_history)
-                history_query = """
-                    INSERT INTO fact_history (client_id, sku_id, client_final_id, period, source, key_figure_id, value, user_id)
-                    VALUES %s
-                    ON CONFLICT (client_id, sku_id, client_final_id, period, key_figure_id, source) DO UPDATE
-                    SET value = EXCLUDED.value, updated_at = CURRENT_TIMESTAMP, user_id = EXCLUDED.user_id;
-                """
-                if history_data_to_insert_final:
-                    extras.execute_values(cursor, history_query, history_data_to_insert_final,
-                                            template="(%s, %s, %s, %s, %s, %s, %s, %s)")
-                    print(f"Se insertaron/actualizaron {len(history_data_to_insert_final)} filas de Historial Crudo en fact_history.")
-                else:
-                    print("No hay datos de historial crudo para insertar.")
-                
-                if manual_input_data_to_insert_final: 
-                    extras.execute_values(cursor, history_query, manual_input_data_to_insert_final, 
-                                            template="(%s, %s, %s, %s, %s, %s, %s, %s)")
-                    print(f"Se insertaron/actualizaron {len(manual_input_data_to_insert_final)} filas de Manual input en fact_history.")
-                else:
-                    print("No hay datos de Manual input para insertar.")
-
-            conn.commit()
+            dummy_client_id_for_forecast = next(iter(result['client_ids'].values()), uuid.UUID('a1b2c3d4-e5f6-7890-1234-567890abcdef'))
+            insert_initial_forecast_version(conn, dummy_client_id_for_forecast)
             print("Migración de datos desde DB.xlsx a PostgreSQL completada.")
 
     except FileNotFoundError:
@@ -281,8 +156,6 @@ def migrate_db_xlsx_to_postgres(file_path):
         print(f"Error: Columna faltante en el archivo XLSX o nombre incorrecto: {e}. Revisa tus nombres de columnas en 'DB.xlsx' y el mapeo en el script.")
     except Exception as e:
         print(f"Ocurrió un error inesperado durante la migración: {e}")
-        if 'conn' in locals() and conn:
-            conn.rollback()
 
 if __name__ == "__main__":
     print("Iniciando migración de datos desde DB.xlsx con mapeo por nombre de KeyFigure...")
@@ -296,5 +169,6 @@ if __name__ == "__main__":
             conn.commit()
             print("Datos existentes en fact_history y fact_forecast_stat eliminados.")
     
-    migrate_db_xlsx_to_postgres(XLSX_FILE_PATH)
+    # Opcional: ruta a otro extracto (.xlsx o .csv) como primer argumento
+    migrate_db_xlsx_to_postgres(sys.argv[1] if len(sys.argv) > 1 else XLSX_FILE_PATH)
     print("Proceso de migración finalizado.")
\ No newline at end of file
@@ -1,10 +1,41 @@
-import pandas as pd
+import os
+import sys
 
 import pandas as pd
+from pandas.api.types import union_categoricals
+
+# El lector por bloques es el mismo de la importación de historia del backend (app/xlsx_reader.py)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_parent_dir = os.path.abspath(os.path.join(current_dir, '..', '..', '..', 'backend'))
+if backend_parent_dir not in sys.path:
+    sys.path.insert(0, backend_parent_dir)
+
+from app.xlsx_reader import iter_xlsx_chunks
+
+CHUNK_SIZE = 100_000
 
-def import_excel(file):
+def import_excel(file, chunk_size=CHUNK_SIZE):
+    """
+    Importa el Excel por bloques. Las columnas de texto (DPG, SKU, KeyFigure...) se guardan como
+    category en cada bloque, así el DataFrame final ocupa una fracción de lo que ocupa con object.
+    """
     try:
-        data = pd.read_excel(file)
-        return data
+        chunks = []
+        for chunk in iter_xlsx_chunks(file, chunk_size):
+            for column in chunk.columns:
+                if pd.api.types.infer_dtype(chunk[column], skipna=True) == 'string':
+                    chunk[column] = chunk[column].astype('category')
+            chunks.append(chunk)
+        if not chunks:
+            return pd.DataFrame()
+        # pd.concat convierte a object las category con distintas categorías: esas columnas se unen aparte
+        category_columns = [
+            column for column in chunks[0].columns
+            if all(isinstance(chunk[column].dtype, pd.CategoricalDtype) for chunk in chunks)
+        ]
+        data = pd.concat([chunk.drop(columns=category_columns) for chunk in chunks], ignore_index=True)
+        for column in category_columns:
+            data[column] = union_categoricals([chunk[column] for chunk in chunks])
+        return data[list(chunks[0].columns)]
     except Exception as e:
-        raise ValueError(f"An error occurred while importing the Excel file: {e}")
\ No newline at end of file
+        raise ValueError(f"An error occurred while importing the Excel file: {e}")